@@ -1,22 +1,45 @@
 from flask import Flask, request
+from flask.logging import default_handler
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
-from fluent.asynchandler import FluentHandler
+from .logging_pipeline import LogPipeline, BoundedQueueHandler, FluentBatchHandler
+from .log_events import log_event, parse_sample_rates
+from .pool import engine_options, init_pool_metrics, warm_up
+from .querylog import init_query_log
+from .metrics import init_metrics
+from .profiling import init_profiling
+from .replicas import replica_bind_keys, init_replicas
+from .routing import RoutingSession
 import logging
 import os
 from flask_marshmallow import Marshmallow
 
-db = SQLAlchemy()
+# Statements are routed to the user's shard or a read replica when those are configured
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 ma = Marshmallow()
 
 def create_app():
     app = Flask(__name__)
     CORS(app)
-    app.secret_key = os.urandom(24)
-    
+
     # Set up logging
     setup_logging(app)
 
+    # Every worker and restart must sign sessions with the same key
+    secret_key = os.environ.get('SECRET_KEY')
+    if not secret_key:
+        secret_key = os.urandom(24)
+        app.logger.warning({
+            'event': 'secret_key_missing',
+            'message': 'SECRET_KEY is not set; sessions will not survive restarts or be shared between workers'
+        })
+    app.secret_key = secret_key
+
+    # Sessions live in the signed cookie ('cookie') or in a shared table ('database')
+    app.config['SESSION_BACKEND'] = os.environ.get('SESSION_BACKEND', 'cookie')
+    app.config['SESSION_CLEANUP_PROBABILITY'] = float(os.environ.get('SESSION_CLEANUP_PROBABILITY', 0.01))
+    app.config['PERMANENT_SESSION_LIFETIME'] = int(os.environ.get('SESSION_LIFETIME', 31 * 24 * 3600))
+
     # Log a message indicating that Fluentd logger setup was successful
     app.logger.info({
         'event': 'fluentd_setup',
@@ -25,14 +48,84 @@ def create_app():
     
     # Configure the database
     app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///default.db')
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
+    session_database_uri = os.environ.get('SESSION_DATABASE_URL', app.config['SQLALCHEMY_DATABASE_URI'])
+    app.config['SQLALCHEMY_BINDS'] = {
+        # Server-side sessions may use a dedicated store shared by all hosts
+        'sessions': {'url': session_database_uri, **engine_options(session_database_uri)}
+    }
+
+    # Optional read replicas, e.g. DATABASE_REPLICA_URLS='postgresql://...@replica1/flaskdb,postgresql://...@replica2/flaskdb'
+    replicas = replica_bind_keys(os.environ.get('DATABASE_REPLICA_URLS', ''))
+    app.config['SQLALCHEMY_BINDS'].update({key: {'url': url, **engine_options(url)} for key, url in replicas.items()})
+    app.config['REPLICA_BINDS'] = list(replicas)
+    app.config['REPLICA_STICKY_SECONDS'] = float(os.environ.get('REPLICA_STICKY_SECONDS', 5))
+
+    # Optional shards for the per-user log tables; users and sessions stay in the directory database above
+    from .shards import shard_bind_keys, create_shard_tables
+    shards = shard_bind_keys(os.environ.get('SHARD_DATABASE_URLS', ''))
+    app.config['SQLALCHEMY_BINDS'].update({key: {'url': url, **engine_options(url)} for key, url in shards.items()})
+    app.config['SHARD_BINDS'] = list(shards)
     db.init_app(app)
 
+    # Export pool checkout/wait/in-use counters and open the first connections up front
+    app.config['DB_POOL_SLOW_CHECKOUT_MS'] = float(os.environ.get('DB_POOL_SLOW_CHECKOUT_MS', 100))
+    app.config['DB_POOL_WARMUP'] = int(os.environ.get('DB_POOL_WARMUP', 1))
+    init_pool_metrics(app, db)
+
+    # Per-request statement counts and timing, slow statements and statements repeated in one request
+    app.config['SQL_SLOW_QUERY_MS'] = float(os.environ.get('SQL_SLOW_QUERY_MS', 200))
+    app.config['SQL_REPEAT_THRESHOLD'] = int(os.environ.get('SQL_REPEAT_THRESHOLD', 10))
+    app.config['SQL_DEBUG_HEADERS'] = os.environ.get('SQL_DEBUG_HEADERS', 'false').lower() == 'true'
+    init_query_log(app, db)
+
+    # Prometheus-style request, latency and database metrics, summed over all worker processes at /metrics
+    app.config['METRICS_DIR'] = os.environ.get('METRICS_DIR', os.path.join(app.instance_path, 'metrics'))
+    app.config['METRICS_FLUSH_INTERVAL'] = float(os.environ.get('METRICS_FLUSH_INTERVAL', 1))
+    app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')
+    init_metrics(app, db)
+
+    # On-demand CPU/memory profiles of single requests for callers holding PROFILE_TOKEN; disabled when unset
+    app.config['PROFILE_TOKEN'] = os.environ.get('PROFILE_TOKEN')
+    app.config['PROFILE_DIR'] = os.environ.get('PROFILE_DIR', os.path.join(app.instance_path, 'profiles'))
+    app.config['PROFILE_RATE_LIMIT'] = int(os.environ.get('PROFILE_RATE_LIMIT', 10))
+    app.config['PROFILE_RATE_WINDOW'] = float(os.environ.get('PROFILE_RATE_WINDOW', 60))
+    app.config['PROFILE_KEEP'] = int(os.environ.get('PROFILE_KEEP', 100))
+    init_profiling(app)
+
+    # Per-event log sampling, e.g. LOG_SAMPLE_RATES='route_access=0.01,daily_summary_success=0.1'
+    app.config['LOG_SAMPLE_RATES'] = parse_sample_rates(os.environ.get('LOG_SAMPLE_RATES', ''))
+
+    # Validate flat log payloads without marshmallow unless disabled
+    app.config['FAST_LOG_VALIDATION'] = os.environ.get('FAST_LOG_VALIDATION', 'true').lower() == 'true'
+
+    # Configure the per-process daily summary cache
+    app.config['SUMMARY_CACHE_MAX_ENTRIES'] = int(os.environ.get('SUMMARY_CACHE_MAX_ENTRIES', 1024))
+    app.config['SUMMARY_CACHE_TTL'] = int(os.environ.get('SUMMARY_CACHE_TTL', 300))
+    from .cache import summary_cache
+    summary_cache.init_app(app)
+
+    # Move log rows older than ARCHIVE_AFTER_DAYS to compressed per-user monthly files with 'flask archive-logs'
+    app.config['ARCHIVE_DIR'] = os.environ.get('ARCHIVE_DIR', os.path.join(app.instance_path, 'archive'))
+    app.config['ARCHIVE_AFTER_DAYS'] = int(os.environ.get('ARCHIVE_AFTER_DAYS', 90))
+
+    from .sessions import init_sessions
+    init_sessions(app)
+    init_replicas(app)
+
     # Import models
     from .models.models import User, FoodLog, FitnessLog, UserSchema, FoodLogSchema, FitnessLogSchema
     
     # Create database tables within the app context
     with app.app_context():
+        from .rollup import rollup_missing, backfill_daily_totals
+        backfill = rollup_missing()
         db.create_all()
+        create_shard_tables()
+        # Databases created before the rollup get it filled from their logs once, when the table is created
+        if backfill:
+            backfill_daily_totals(app)
+    warm_up(app, db)
 
     # Import and initialize route modules
     from .routes.routes_auth import init_auth_routes
@@ -41,6 +134,10 @@ def create_app():
     from .routes.routes_fitness import init_fitness_routes
     from .routes.routes_summary import init_summary_routes
     from .routes.routes_goals import init_goals_routes
+    from .routes.routes_export import init_export_routes
+    from .routes.routes_import import init_import_routes
+    from .routes.routes_metrics import init_metrics_routes
+    from .routes.routes_profiles import init_profile_routes
     
     # Initialize routes
     init_auth_routes(app)
@@ -49,12 +146,19 @@ def create_app():
     init_fitness_routes(app)
     init_summary_routes(app)
     init_goals_routes(app)
+    init_export_routes(app)
+    init_import_routes(app)
+    init_metrics_routes(app)
+    init_profile_routes(app)
+
+    # Register command line helpers
+    from .commands import init_commands
+    init_commands(app)
 
     @app.before_request
     def log_request_info():
-        # Log incoming requests as structured data
-        app.logger.debug({
-            'event': 'request_received',
+        # Log incoming requests as structured data, building the payload only if DEBUG is enabled
+        log_event(logging.DEBUG, 'request_received', lambda: {
             'method': request.method,
             'url': request.url,
             'headers': dict(request.headers)
@@ -70,16 +174,29 @@ def setup_logging(app):
                 record.msg = {'message': str(record.msg)}
             return True
 
+    # Configure the queue between request threads and the log handlers
+    app.config['LOG_QUEUE_SIZE'] = int(os.environ.get('LOG_QUEUE_SIZE', 10000))
+    app.config['LOG_QUEUE_POLICY'] = os.environ.get('LOG_QUEUE_POLICY', 'drop')
+    app.config['LOG_QUEUE_BLOCK_TIMEOUT'] = float(os.environ.get('LOG_QUEUE_BLOCK_TIMEOUT', 0.05))
+    app.config['LOG_BATCH_SIZE'] = int(os.environ.get('LOG_BATCH_SIZE', 100))
+
+    # Flask's default handler writes synchronously on the request thread and duplicates the console handler
+    app.logger.removeHandler(default_handler)
+
+    # Replace the pipeline of a previously created app instead of stacking handlers
+    for handler in list(app.logger.handlers):
+        if isinstance(handler, BoundedQueueHandler):
+            app.logger.removeHandler(handler)
+            handler.pipeline.stop()
+
+    handlers = []
+
     # Set up Fluentd logging handler
     try:
-        fluent_handler = FluentHandler('app', host=os.environ.get('FLUENTD_HOST', 'localhost'), port=24224)
+        fluent_handler = FluentBatchHandler('app', host=os.environ.get('FLUENTD_HOST', 'localhost'), port=24224)
         fluent_handler.setFormatter(logging.Formatter())
         fluent_handler.addFilter(StructuringFilter())
-        app.logger.addHandler(fluent_handler)
-        app.logger.info({
-            'event': 'fluentd_setup',
-            'message': 'Fluentd logger setup successfully!'
-        })
+        handlers.append(fluent_handler)
     except Exception as e:
         app.logger.warning({
             'event': 'fluentd_setup',
@@ -90,7 +207,19 @@ def setup_logging(app):
     console_handler = logging.StreamHandler()
     console_handler.setFormatter(logging.Formatter('[%(asctime)s] %(levelname)s in %(module)s: %(message)s'))
     console_handler.addFilter(StructuringFilter())
-    app.logger.addHandler(console_handler)
+    handlers.append(console_handler)
+
+    # Hand all records to a background listener so formatting and I/O stay off the request thread
+    pipeline = LogPipeline(
+        handlers,
+        maxsize=app.config['LOG_QUEUE_SIZE'],
+        policy=app.config['LOG_QUEUE_POLICY'],
+        block_timeout=app.config['LOG_QUEUE_BLOCK_TIMEOUT'],
+        batch_size=app.config['LOG_BATCH_SIZE']
+    )
+    pipeline.start()
+    app.logger.addHandler(BoundedQueueHandler(pipeline))
+    app.extensions['log_pipeline'] = pipeline
 
     # Set the log level for the app
     app.logger.setLevel(logging.INFO)
@@ -1,15 +1,15 @@
 # app/app.py
 from app import create_app
+from app.server import serve
 import logging
-import os
 
 app = create_app()
 
 if __name__ == '__main__':
     logging.basicConfig(level=logging.INFO)
     logging.info("Starting the Flask application")
-    port = int(os.getenv('PORT', 8000))
     try:
-        app.run(debug=False)
+        # Bind address, worker and thread counts come from HOST, PORT, WEB_WORKERS and WEB_THREADS
+        serve(app)
     finally:
-        logging.info("Shutting down the Flask application")
\ No newline at end of file
+        logging.info("Shutting down the Flask application")
@@ -0,0 +1,271 @@
+# app/archive.py
+from flask import current_app
+from collections import defaultdict
+from datetime import date, timedelta
+from sqlalchemy import select, delete
+from .models.models import FoodLog, FitnessLog, parse_date, DATE_FORMAT
+from .shards import log_shards, using_shard
+from .cache import summary_cache
+from . import db
+import gzip
+import json
+import os
+
+# Archived log kinds and the columns kept for each
+ARCHIVED_MODELS = {
+    'food': (FoodLog, ('id', 'date', 'food', 'calories', 'protein', 'fat', 'carbs')),
+    'fitness': (FitnessLog, ('id', 'date', 'exercise', 'kcal_burned'))
+}
+
+def archive_path(user_id, year, month):
+    """Path of the gzip JSONL file holding one user's archived logs of one month."""
+    return os.path.join(current_app.config['ARCHIVE_DIR'], str(user_id), f'{year:04d}-{month:02d}.jsonl.gz')
+
+def archive_cutoff(days=None):
+    """First day that stays in the hot tables."""
+    days = current_app.config['ARCHIVE_AFTER_DAYS'] if days is None else days
+    return date.today() - timedelta(days=days)
+
+def index_path(user_id):
+    """Path of the per-user index summarizing every archive month."""
+    return os.path.join(current_app.config['ARCHIVE_DIR'], str(user_id), 'index.json')
+
+def month_summary(entries):
+    """Count the entries of a month per kind, with the newest [date, id] of each kind."""
+    summary = {}
+    for entry in entries:
+        kind = summary.setdefault(entry['kind'], {'count': 0, 'newest': None})
+        kind['count'] += 1
+        key = [entry['date'], entry['id']]
+        if kind['newest'] is None or key > kind['newest']:
+            kind['newest'] = key
+    return summary
+
+def write_index(user_id, index):
+    path = index_path(user_id)
+    temporary = f'{path}.tmp'
+    with open(temporary, 'w', encoding='utf-8') as output:
+        json.dump(index, output, sort_keys=True)
+    os.replace(temporary, path)
+
+def archive_index(user_id):
+    """Return {'YYYY-MM': {kind: {'count', 'newest'}}} for a user's archives, or {} when there are none.
+
+    The index is kept next to the month files by the writers; archives
+    written before it existed are indexed once on first use.
+    """
+    directory = os.path.join(current_app.config['ARCHIVE_DIR'], str(user_id))
+    if not os.path.isdir(directory):
+        return {}
+    try:
+        with open(index_path(user_id), encoding='utf-8') as index:
+            return json.load(index)
+    except FileNotFoundError:
+        pass
+    index = {
+        name[:7]: month_summary(read_archive(os.path.join(directory, name)))
+        for name in os.listdir(directory) if name.endswith('.jsonl.gz')
+    }
+    write_index(user_id, index)
+    return index
+
+def update_index(user_id, year, month, entries):
+    """Record the full entry list of one month in the user's index; an empty list drops the month."""
+    index = archive_index(user_id)
+    if entries:
+        index[f'{year:04d}-{month:02d}'] = month_summary(entries)
+    else:
+        index.pop(f'{year:04d}-{month:02d}', None)
+    write_index(user_id, index)
+
+def read_archive(path):
+    """Return the entries of an archive file, or an empty list if there is none."""
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as archive:
+            return [json.loads(line) for line in archive if line.strip()]
+    except FileNotFoundError:
+        return []
+
+def write_archive(path, entries):
+    # Write to a temporary file first so readers never see a half-written archive
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f'{path}.tmp'
+    with gzip.open(temporary, 'wt', encoding='utf-8') as archive:
+        for entry in entries:
+            archive.write(json.dumps(entry, separators=(',', ':')) + '\n')
+    os.replace(temporary, path)
+
+def merge_entries(existing, new):
+    # Re-running an interrupted job must not archive the same row twice
+    seen = {json.dumps(entry, sort_keys=True) for entry in existing}
+    merged = list(existing)
+    for entry in new:
+        key = json.dumps(entry, sort_keys=True)
+        if key not in seen:
+            seen.add(key)
+            merged.append(entry)
+    return merged
+
+# Ids per DELETE ... WHERE id IN (...) statement, below SQLite's bound parameter limit
+ARCHIVE_DELETE_CHUNK = 500
+
+def archive_logs(older_than=None, user_id=None):
+    """Move food and fitness rows older than the cutoff into per-user, per-month archives.
+
+    Users are processed one at a time, so memory is bounded by one user's
+    old rows. Archives are written before the rows are deleted, and only the
+    rows that were written are deleted (by id), so a back-dated row inserted
+    meanwhile waits for the next run instead of being lost. An interrupted
+    run can be repeated. The daily_totals rollup keeps its rows, so totals
+    of archived days are still served from the database. Returns the number
+    of archived rows per kind.
+    """
+    cutoff = archive_cutoff(older_than)
+    archived = {kind: 0 for kind in ARCHIVED_MODELS}
+
+    for shard in log_shards(user_id):
+        with using_shard(shard):
+            for kind, (model, columns) in ARCHIVED_MODELS.items():
+                if user_id is not None:
+                    owners = [user_id]
+                else:
+                    owners = db.session.execute(select(model.user_id).where(model.date < cutoff).distinct()).scalars().all()
+                for owner in owners:
+                    archived[kind] += archive_user_logs(kind, model, columns, owner, cutoff)
+
+    return archived
+
+def archive_user_logs(kind, model, columns, user_id, cutoff):
+    """Archive one user's rows of one kind older than the cutoff and return how many were moved."""
+    rows = db.session.execute(
+        select(*(getattr(model, column) for column in columns)).where(model.user_id == user_id, model.date < cutoff)
+    ).mappings().all()
+    if not rows:
+        return 0
+
+    by_month = defaultdict(list)
+    for row in rows:
+        entry = {'kind': kind, **{column: row[column] for column in columns}}
+        entry['date'] = row['date'].strftime(DATE_FORMAT)
+        by_month[(row['date'].year, row['date'].month)].append(entry)
+
+    for (year, month), entries in by_month.items():
+        path = archive_path(user_id, year, month)
+        merged = merge_entries(read_archive(path), entries)
+        write_archive(path, merged)
+        update_index(user_id, year, month, merged)
+
+    ids = [row['id'] for row in rows]
+    for offset in range(0, len(ids), ARCHIVE_DELETE_CHUNK):
+        db.session.execute(
+            delete(model).where(model.id.in_(ids[offset:offset + ARCHIVE_DELETE_CHUNK])).execution_options(synchronize_session=False)
+        )
+    summary_cache.invalidate_user(user_id)
+    db.session.commit()
+    return len(rows)
+
+def delete_archived(kind, user_id, ids=None, day=None):
+    """Remove the user's archived entries of one kind matching the ids or the day, rewriting their month files.
+
+    Returns the removed entries with parsed dates, so callers can subtract
+    them from the rollup.
+    """
+    index = archive_index(user_id)
+    months = sorted(name for name, summary in index.items() if summary.get(kind, {}).get('count'))
+    if day is not None:
+        months = [name for name in months if name == day.strftime('%Y-%m')]
+        wanted_day = day.strftime(DATE_FORMAT)
+    else:
+        wanted = {int(item_id) for item_id in ids if str(item_id).isdigit()}
+
+    removed = []
+    for name in months:
+        year, month = (int(part) for part in name.split('-'))
+        path = archive_path(user_id, year, month)
+        entries = read_archive(path)
+        kept = []
+        for entry in entries:
+            matches = entry['kind'] == kind and (entry['date'] == wanted_day if day is not None else entry['id'] in wanted)
+            (removed if matches else kept).append(entry)
+        if len(kept) == len(entries):
+            continue
+
+        if kept:
+            write_archive(path, kept)
+        else:
+            os.remove(path)
+        update_index(user_id, year, month, kept)
+        if day is None and len(removed) >= len(wanted):
+            break
+
+    return [{**entry, 'date': parse_date(entry['date'])} for entry in removed]
+
+def archived_items(user_id, day):
+    """Return the archived (food_log, fitness_log) items of one day, shaped like the summary items."""
+    food_log = []
+    fitness_log = []
+    wanted = day.strftime(DATE_FORMAT)
+    for entry in read_archive(archive_path(user_id, day.year, day.month)):
+        if entry['date'] != wanted:
+            continue
+        item = {key: value for key, value in entry.items() if key not in ('kind', 'date')}
+        (food_log if entry['kind'] == 'food' else fitness_log).append(item)
+    return food_log, fitness_log
+
+def archived_entries(user_id=None):
+    """Yield (user_id, entries) for every archive file, with entry dates parsed back into dates."""
+    root = current_app.config['ARCHIVE_DIR']
+    owners = [str(user_id)] if user_id is not None else (os.listdir(root) if os.path.isdir(root) else [])
+    for owner in owners:
+        directory = os.path.join(root, owner)
+        if not owner.isdigit() or not os.path.isdir(directory):
+            continue
+        for name in sorted(os.listdir(directory)):
+            if name.endswith('.jsonl.gz'):
+                entries = read_archive(os.path.join(directory, name))
+                yield int(owner), [{**entry, 'date': parse_date(entry['date'])} for entry in entries]
+
+def newest_archived(kind, user_id):
+    """Return the newest archived (date, id) of one kind for a user, or None if nothing is archived."""
+    newest = [month[kind]['newest'] for month in archive_index(user_id).values() if month.get(kind, {}).get('count')]
+    if not newest:
+        return None
+    day, item_id = max(newest)
+    return parse_date(day), item_id
+
+def archived_history(kind, user_id, limit, cursor=None, start=None, end=None):
+    """Return up to limit archived rows of one kind, newest first, as (id, date, ...) tuples past the cursor.
+
+    Months the index shows without rows of that kind are never opened.
+    """
+    index = archive_index(user_id)
+    columns = ARCHIVED_MODELS[kind][1]
+    bounds = [day for day in (end, cursor[0] if cursor else None) if day is not None]
+    upper = min(bounds) if bounds else None
+
+    rows = []
+    for name in sorted(index, reverse=True):
+        if not index[name].get(kind, {}).get('count'):
+            continue
+        year, month = (int(part) for part in name.split('-'))
+        if upper is not None and (year, month) > (upper.year, upper.month):
+            continue
+        if start is not None and (year, month) < (start.year, start.month):
+            break
+
+        for entry in read_archive(archive_path(user_id, year, month)):
+            if entry['kind'] != kind:
+                continue
+            day = parse_date(entry['date'])
+            if (start is not None and day < start) or (end is not None and day > end):
+                continue
+            if cursor is not None and (day, entry['id']) >= cursor:
+                continue
+            rows.append((entry['id'], day, *(entry[column] for column in columns[2:])))
+
+        # Months are visited newest first, so once a page is full older months cannot contribute
+        if len(rows) >= limit:
+            break
+
+    rows.sort(key=lambda row: (row[1], row[0]), reverse=True)
+    return rows[:limit]
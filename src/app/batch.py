@@ -0,0 +1,95 @@
+# app/batch.py
+from marshmallow import ValidationError
+from sqlalchemy import insert, delete, select
+from .rollup import TOTAL_COLUMNS, apply_deltas, sum_deltas
+from .cache import summary_cache
+from .models.models import parse_date
+from .archive import ARCHIVED_MODELS, delete_archived
+from .validation import load_log_entry
+from . import db
+
+# Largest number of entries accepted by a single batch request
+MAX_BATCH_SIZE = 500
+
+def load_batch(schema, entries, user_id):
+    """Validate each entry with the schema, returning the loaded rows and per-index errors."""
+    rows = []
+    errors = {}
+    for index, entry in enumerate(entries):
+        try:
+            # The owner always comes from the session, never from the payload
+            rows.append(load_log_entry(schema, entry, user_id))
+        except ValidationError as err:
+            errors[index] = err.messages
+    return rows, errors
+
+def bulk_insert(model, rows):
+    """Insert rows with a single executemany and return their new ids in input order."""
+    if not rows:
+        return []
+    statement = insert(model).returning(model.id, sort_by_parameter_order=True)
+    return db.session.scalars(statement, rows).all()
+
+def parse_delete_selector(data):
+    """Read a bulk delete selector of the form {'ids': [...]} or {'date': 'YYYY-MM-DD'}.
+
+    Returns (ids, day) with exactly one of them set, or raises ValueError.
+    """
+    if not isinstance(data, dict) or ('ids' in data) == ('date' in data):
+        raise ValueError('Provide either a list of ids or a date')
+
+    if 'date' in data:
+        try:
+            return None, parse_date(str(data['date']))
+        except ValueError:
+            raise ValueError('Invalid date format. Use YYYY-MM-DD.')
+
+    ids = data['ids']
+    if not isinstance(ids, list) or not ids or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+        raise ValueError('ids must be a non-empty list of integers')
+    if len(ids) > MAX_BATCH_SIZE:
+        raise ValueError(f'A batch may contain at most {MAX_BATCH_SIZE} ids')
+    return ids, None
+
+def bulk_delete(model, user_id, ids=None, day=None):
+    """Delete the user's rows matching the ids and/or date in one statement.
+
+    Returns the removed rows (id, date and rollup columns) so callers can
+    report them and subtract them from the rollup.
+    """
+    conditions = [model.user_id == user_id]
+    if ids is not None:
+        conditions.append(model.id.in_(ids))
+    if day is not None:
+        conditions.append(model.date == day)
+    returned = [model.id, model.date, *(getattr(model, column) for column in TOTAL_COLUMNS if hasattr(model, column))]
+
+    statement = delete(model).where(*conditions).execution_options(synchronize_session=False)
+    if db.session.get_bind(model).dialect.delete_returning:
+        return db.session.execute(statement.returning(*returned)).mappings().all()
+
+    # Without DELETE ... RETURNING, lock and read the rows first within the same transaction
+    rows = db.session.execute(select(*returned).where(*conditions).with_for_update()).mappings().all()
+    db.session.execute(statement)
+    return rows
+
+def delete_logs(model, user_id, ids=None, day=None):
+    """Delete the user's matching rows, subtract them from the rollup and commit, returning the removed ids.
+
+    Ids not found in the log table, and every entry of a date, are also
+    removed from the archives. The month files are rewritten before the
+    commit; if the commit then fails, 'flask rebuild-daily-totals' brings the
+    rollup back in line with the archives.
+    """
+    removed = list(bulk_delete(model, user_id, ids=ids, day=day))
+    kind = next(kind for kind, (archived_model, _) in ARCHIVED_MODELS.items() if archived_model is model)
+    found = {str(row['id']) for row in removed}
+    missing = None if ids is None else [item_id for item_id in ids if str(item_id) not in found]
+    if day is not None or missing:
+        removed += delete_archived(kind, user_id, ids=missing, day=day)
+    deltas_by_day = sum_deltas(removed, sign=-1)
+    apply_deltas(user_id, deltas_by_day)
+    if deltas_by_day:
+        summary_cache.invalidate_days(user_id, deltas_by_day)
+    db.session.commit()
+    return [row['id'] for row in removed]
@@ -0,0 +1,123 @@
+# app/cache.py
+from collections import OrderedDict
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from threading import Lock
+import hashlib
+import json
+import time
+
+class SummaryCache:
+    """Bounded LRU cache of daily summary payloads keyed by (user_id, date), with a TTL per entry.
+
+    The cache is local to a worker process. Within an app, every entry also
+    records the user's summary version (see SummaryVersion) it was built from,
+    and invalidating bumps that version in the database, so a write handled by
+    one worker retires the entries cached by all the others. The invalidate
+    methods must be called before the write's commit, which carries the bump.
+    """
+
+    def __init__(self, max_entries=1024, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.versioned = False
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def init_app(self, app):
+        self.max_entries = app.config.get('SUMMARY_CACHE_MAX_ENTRIES', self.max_entries)
+        self.ttl = app.config.get('SUMMARY_CACHE_TTL', self.ttl)
+        self.versioned = True
+        self.clear()
+        app.extensions['summary_cache'] = self
+
+    def version(self, user_id):
+        """Return the user's current summary version, or None when not versioned.
+
+        This is the one statement a cached summary costs. It is routed like the
+        summary itself, so inside @read_replica it reads a replica, which the
+        writer's own sticky reads skip until it has caught up.
+        """
+        if not self.versioned or self.max_entries <= 0:
+            return None
+        from .models.models import SummaryVersion
+        from . import db
+        version = db.session.execute(select(SummaryVersion.version).where(SummaryVersion.user_id == user_id)).scalar()
+        return version or 0
+
+    def bump(self, user_id):
+        """Advance the user's summary version within the current transaction; the caller's commit publishes it."""
+        if not self.versioned:
+            return
+        from .models.models import SummaryVersion
+        from . import db
+        engine = db.engine
+        insert = postgresql.insert if engine.dialect.name == 'postgresql' else sqlite.insert
+        statement = insert(SummaryVersion).values(user_id=user_id, version=1)
+        statement = statement.on_conflict_do_update(
+            index_elements=[SummaryVersion.user_id],
+            set_={'version': SummaryVersion.version + 1}
+        )
+        db.session.execute(statement, bind_arguments={'bind': engine})
+
+    @staticmethod
+    def make_etag(payload):
+        """Derive a strong ETag from the serialized payload."""
+        body = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+        return hashlib.sha1(body.encode('utf-8')).hexdigest()
+
+    def get(self, user_id, day, version=None):
+        """Return (payload, etag) for a fresh entry built from the given version, or None."""
+        key = (user_id, day)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            payload, etag, expires_at, entry_version = entry
+            if expires_at < time.monotonic() or entry_version != version:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return payload, etag
+
+    def set(self, user_id, day, payload, version=None):
+        """Store a payload built from the given version and return its ETag.
+
+        The version must be read before the payload, so a write that lands in
+        between leaves the entry already retired.
+        """
+        if self.max_entries <= 0:
+            return self.make_etag(payload)
+        etag = self.make_etag(payload)
+        with self._lock:
+            self._entries[(user_id, day)] = (payload, etag, time.monotonic() + self.ttl, version)
+            self._entries.move_to_end((user_id, day))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return etag
+
+    def invalidate(self, user_id, day):
+        """Drop the cached summary of a single day here, and every summary of the user in the other workers."""
+        with self._lock:
+            self._entries.pop((user_id, day), None)
+        self.bump(user_id)
+
+    def invalidate_days(self, user_id, days):
+        """Drop the cached summaries of several days of a user with a single version bump."""
+        with self._lock:
+            for day in days:
+                self._entries.pop((user_id, day), None)
+        self.bump(user_id)
+
+    def invalidate_user(self, user_id):
+        """Drop every cached summary of a user, e.g. after their goals changed."""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == user_id]:
+                del self._entries[key]
+        self.bump(user_id)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+summary_cache = SummaryCache()
@@ -0,0 +1,206 @@
+# app/commands.py
+import click
+import gzip
+from flask import current_app
+import os
+from sqlalchemy import inspect, text
+from .models.models import User, FoodLog, FitnessLog, parse_date, DATE_FORMAT
+from .rollup import rebuild_daily_totals
+from .sessions import cleanup_expired_sessions
+from .shards import pin_user_shards, move_user, shard_for, using_shard
+from .archive import archive_logs
+from .importer import import_logs, guess_format, IMPORT_FORMATS, IMPORT_KINDS
+from .seed import seed_database, SEED_BATCH_SIZE
+from . import db
+
+# Log tables that carry a per-user date column
+LOG_MODELS = (FoodLog, FitnessLog)
+
+def migrate_log_dates():
+    """Convert legacy string date columns to DATE and create the (user_id, date) indexes, on every shard."""
+    converted = []
+    for shard in current_app.config.get('SHARD_BINDS') or [None]:
+        tables = _migrate_log_dates(db.engines[shard])
+        converted.extend(f'{shard}.{table}' if shard else table for table in tables)
+    return converted
+
+def _migrate_log_dates(engine):
+    inspector = inspect(engine)
+    converted = []
+
+    with engine.begin() as conn:
+        for model in LOG_MODELS:
+            table = model.__table__
+            if not inspector.has_table(table.name):
+                continue
+
+            column = next(c for c in inspector.get_columns(table.name) if c['name'] == 'date')
+            is_string = 'CHAR' in str(column['type']).upper() or 'TEXT' in str(column['type']).upper()
+
+            if is_string and engine.dialect.name == 'postgresql':
+                # Postgres can cast every stored YYYY-MM-DD string in place
+                conn.execute(text(
+                    f'ALTER TABLE {table.name} ALTER COLUMN date TYPE DATE USING date::date'
+                ))
+                converted.append(table.name)
+            elif is_string:
+                # SQLite keeps DATE values as ISO strings, so only non-padded values need rewriting
+                rows = conn.execute(text(f'SELECT DISTINCT date FROM {table.name}')).scalars()
+                for value in list(rows):
+                    normalized = parse_date(value).strftime(DATE_FORMAT)
+                    if normalized != value:
+                        conn.execute(
+                            text(f'UPDATE {table.name} SET date = :new WHERE date = :old'),
+                            {'new': normalized, 'old': value}
+                        )
+                converted.append(table.name)
+
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+
+    return converted
+
+# Register command line helpers on the application
+def init_commands(app):
+
+    @app.cli.command('migrate-log-dates')
+    def migrate_log_dates_command():
+        """Migrate food/fitness log dates to native DATE columns with indexes.
+
+        When upgrading a database created before the daily_totals rollup,
+        the app fills the rollup from the logs on its first start. If that
+        fails (it logs a daily_totals_backfill warning), run this command and
+        then 'flask rebuild-daily-totals'; until then past days show zero totals.
+        """
+        converted = migrate_log_dates()
+        app.logger.info({
+            'event': 'migrate_log_dates',
+            'message': 'Log date migration finished',
+            'converted_tables': converted
+        })
+        click.echo(f"Converted tables: {', '.join(converted) or 'none'}")
+
+    @app.cli.command('rebuild-daily-totals')
+    @click.option('--user-id', type=int, default=None, help='Only rebuild the rollup for this user.')
+    def rebuild_daily_totals_command(user_id):
+        """Recompute the daily_totals rollup from the raw food and fitness logs."""
+        rows = rebuild_daily_totals(user_id)
+        app.logger.info({
+            'event': 'rebuild_daily_totals',
+            'message': 'Daily totals rollup rebuilt',
+            'user_id': user_id,
+            'rows': rows
+        })
+        click.echo(f"Rebuilt {rows} daily total rows")
+
+    @app.cli.command('archive-logs')
+    @click.option('--older-than', type=int, default=None, help='Archive rows older than this many days (default: $ARCHIVE_AFTER_DAYS or 90).')
+    @click.option('--user-id', type=int, default=None, help='Only archive this user.')
+    def archive_logs_command(older_than, user_id):
+        """Move old food/fitness log rows into compressed per-user monthly archives."""
+        archived = archive_logs(older_than, user_id)
+        app.logger.info({
+            'event': 'archive_logs',
+            'message': 'Old log rows archived',
+            'user_id': user_id,
+            'rows': archived
+        })
+        click.echo(f"Archived {archived['food']} food and {archived['fitness']} fitness rows")
+
+    @app.cli.command('import-logs')
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--username', required=True, help='User who receives the entries.')
+    @click.option('--format', 'import_format', type=click.Choice(IMPORT_FORMATS), default=None, help='File format (default: from the file name).')
+    @click.option('--kind', type=click.Choice(list(IMPORT_KINDS)), default=None, help='Log kind of every row (default: the row\'s kind column).')
+    def import_logs_command(path, username, import_format, kind):
+        """Stream a CSV or NDJSON file (optionally .gz) into a user's food/fitness logs."""
+        user_id = db.session.execute(db.select(User.id).filter_by(username=username)).scalar()
+        if user_id is None:
+            raise click.BadParameter(f"Unknown user: {username}", param_hint='--username')
+
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'rt', encoding='utf-8', newline='') as lines, using_shard(shard_for(user_id)):
+            result = import_logs(lines, user_id, import_format or guess_format(path), kind)
+        app.logger.info({
+            'event': 'import_logs',
+            'message': 'Log import finished',
+            'username': username,
+            'accepted': result['accepted'],
+            'rejected': result['rejected']
+        })
+        click.echo(f"Accepted {result['accepted']} rows, rejected {result['rejected']}")
+        for error in result['errors']:
+            click.echo(f"  line {error['line']}: {error['errors']}")
+
+    @app.cli.command('seed')
+    @click.option('--users', type=int, default=100, help='Users to create (default: 100).')
+    @click.option('--days', type=int, default=365, help='Days of history per user, ending today (default: 365).')
+    @click.option('--seed', 'seed', type=int, default=0, help='Random seed; the same seed gives the same data (default: 0).')
+    @click.option('--prefix', default='user', help='Usernames are <prefix>_0, <prefix>_1, ... (default: user).')
+    @click.option('--password', 'passwords', multiple=True, help='Password of the users, assigned round-robin; repeatable (default: password).')
+    @click.option('--batch-size', type=int, default=SEED_BATCH_SIZE, help=f'Rows per INSERT or COPY (default: {SEED_BATCH_SIZE}).')
+    @click.option('--no-rollup', is_flag=True, help='Skip rebuilding the daily_totals rollup.')
+    def seed_command(users, days, seed, prefix, passwords, batch_size, no_rollup):
+        """Fill the database with synthetic users and food/fitness logs."""
+        try:
+            counts = seed_database(users, days, seed, prefix=prefix, passwords=passwords or ('password',),
+                                   batch_size=batch_size, rollup=not no_rollup)
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint='--prefix')
+        app.logger.info({
+            'event': 'seed',
+            'message': 'Synthetic data generated',
+            'seed': seed,
+            **counts
+        })
+        rows = counts['food'] + counts['fitness']
+        click.echo(f"Created {counts['users']} users, {counts['food']} food and {counts['fitness']} fitness rows "
+                   f"in {counts['seconds']}s ({rows / max(counts['seconds'], 0.001) * 60:,.0f} rows/minute)")
+
+    @app.cli.command('pin-user-shards')
+    def pin_user_shards_command():
+        """Pin every user to their current shard; run before changing the number of shards."""
+        pinned = pin_user_shards()
+        click.echo(f"Pinned {pinned} users")
+
+    @app.cli.command('move-user-shard')
+    @click.option('--user-id', type=int, required=True, help='User whose logs are moved.')
+    @click.option('--shard', required=True, help='Target shard bind, e.g. shard_1.')
+    def move_user_shard_command(user_id, shard):
+        """Move a user's food/fitness logs and rollup rows to another shard."""
+        try:
+            moved = move_user(user_id, shard)
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint='--shard')
+        app.logger.info({
+            'event': 'move_user_shard',
+            'message': 'User moved between shards',
+            'user_id': user_id,
+            'shard': shard,
+            'rows': moved
+        })
+        click.echo(f"Moved rows: {moved or 'none, user already on that shard'}")
+
+    @app.cli.command('cleanup-sessions')
+    def cleanup_sessions_command():
+        """Delete expired server-side sessions."""
+        removed = cleanup_expired_sessions()
+        app.logger.info({
+            'event': 'cleanup_sessions',
+            'message': 'Expired sessions removed',
+            'rows': removed
+        })
+        click.echo(f"Removed {removed} expired sessions")
+
+    @app.cli.command('serve')
+    @click.option('--host', default=None, help='Interface to bind (default: $HOST or 0.0.0.0).')
+    @click.option('--port', type=int, default=None, help='Port to bind (default: $PORT or 8000).')
+    @click.option('--workers', type=int, default=None, help='Worker processes (default: $WEB_WORKERS or 2 * CPUs + 1).')
+    @click.option('--threads', type=int, default=None, help='Threads per worker (default: $WEB_THREADS or 2).')
+    def serve_command(host, port, workers, threads):
+        """Serve the preloaded app with pre-forked gunicorn workers."""
+        from .server import serve
+        bind = None
+        if host or port:
+            bind = f"{host or os.environ.get('HOST', '0.0.0.0')}:{port or os.environ.get('PORT', 8000)}"
+        serve(app, bind=bind, workers=workers, threads=threads)
@@ -0,0 +1,90 @@
+# app/export.py
+from sqlalchemy import select
+from .models.models import DATE_FORMAT
+from .archive import ARCHIVED_MODELS, archived_entries
+from . import db
+import csv
+import io
+import json
+import zlib
+
+# Rows fetched per round trip while streaming
+EXPORT_YIELD_PER = 1000
+
+# Bytes collected before a chunk is handed to the response
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+# Columns of a CSV export, covering both log kinds
+CSV_COLUMNS = ('kind', 'id', 'date', 'food', 'exercise', 'calories', 'protein', 'fat', 'carbs', 'kcal_burned')
+
+EXPORT_FORMATS = ('ndjson', 'csv')
+
+def export_entries(user_id, kinds):
+    """Yield every log entry of a user as a dict, archived entries first, one kind after another.
+
+    The hot rows are streamed with a server-side cursor in batches of
+    EXPORT_YIELD_PER, so only one batch is in memory at a time.
+    """
+    for kind in kinds:
+        model, columns = ARCHIVED_MODELS[kind]
+
+        for _, entries in archived_entries(user_id):
+            for entry in entries:
+                if entry['kind'] == kind:
+                    yield {**entry, 'date': entry['date'].strftime(DATE_FORMAT)}
+
+        statement = (
+            select(*(getattr(model, column) for column in columns))
+            .where(model.user_id == user_id)
+            .order_by(model.date, model.id)
+            .execution_options(yield_per=EXPORT_YIELD_PER)
+        )
+        for row in db.session.execute(statement):
+            entry = {'kind': kind, **row._asdict()}
+            entry['date'] = entry['date'].strftime(DATE_FORMAT)
+            yield entry
+
+def ndjson_lines(entries):
+    for entry in entries:
+        yield json.dumps(entry, separators=(',', ':')) + '\n'
+
+def csv_lines(entries):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_COLUMNS, extrasaction='ignore', lineterminator='\n')
+    writer.writeheader()
+    for entry in entries:
+        writer.writerow(entry)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+def chunked(lines, size=EXPORT_CHUNK_SIZE):
+    """Join text lines into encoded chunks of roughly size bytes."""
+    parts = []
+    length = 0
+    for line in lines:
+        data = line.encode('utf-8')
+        parts.append(data)
+        length += len(data)
+        if length >= size:
+            yield b''.join(parts)
+            parts = []
+            length = 0
+    if parts:
+        yield b''.join(parts)
+
+def gzipped(chunks):
+    """Compress a stream of chunks into one gzip member without buffering the whole body."""
+    compressor = zlib.compressobj(wbits=31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+def export_stream(user_id, kinds, export_format='ndjson', compress=False):
+    """Build the byte stream of an export in the given format, optionally gzip-compressed."""
+    lines = csv_lines if export_format == 'csv' else ndjson_lines
+    chunks = chunked(lines(export_entries(user_id, kinds)))
+    return gzipped(chunks) if compress else chunks
@@ -0,0 +1,76 @@
+# app/history.py
+from sqlalchemy import select, or_
+from .models.models import parse_date, DATE_FORMAT
+from .archive import ARCHIVED_MODELS, archived_history, newest_archived
+from . import db
+import base64
+
+# Page sizes of the history endpoints
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+def encode_cursor(day, item_id):
+    """Opaque cursor pointing just past the (date, id) of the last row of a page."""
+    return base64.urlsafe_b64encode(f'{day.strftime(DATE_FORMAT)}:{item_id}'.encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor):
+    """Return the (date, id) of a cursor, raising ValueError if it is malformed."""
+    try:
+        day, _, item_id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').partition(':')
+        return parse_date(day), int(item_id)
+    except (UnicodeError, TypeError, ValueError) as e:
+        raise ValueError('Invalid cursor.') from e
+
+def parse_history_args(args):
+    """Parse the limit, cursor, start and end query parameters, raising ValueError with a client message."""
+    try:
+        limit = int(args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise ValueError('limit must be an integer.')
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f'limit must be between 1 and {MAX_PAGE_SIZE}.')
+
+    cursor = decode_cursor(args['cursor']) if args.get('cursor') else None
+    try:
+        start = parse_date(args['start']) if args.get('start') else None
+        end = parse_date(args['end']) if args.get('end') else None
+    except ValueError:
+        raise ValueError('Invalid date format. Use YYYY-MM-DD.')
+    return limit, cursor, start, end
+
+def fetch_history(kind, user_id, limit=DEFAULT_PAGE_SIZE, cursor=None, start=None, end=None):
+    """Return one page of a user's food or fitness log, newest first, as (columns, rows, next_cursor).
+
+    Pages are found by seeking past the (date, id) cursor on the (user_id, date)
+    index instead of skipping rows with OFFSET, so every page costs the same.
+    Rows moved to cold storage are merged in from the archives, which are only
+    opened when they can contribute to the page.
+    """
+    model, columns = ARCHIVED_MODELS[kind]
+    conditions = [model.user_id == user_id]
+    if start is not None:
+        conditions.append(model.date >= start)
+    if end is not None:
+        conditions.append(model.date <= end)
+    if cursor is not None:
+        day, item_id = cursor
+        conditions.extend([model.date <= day, or_(model.date < day, model.id < item_id)])
+
+    statement = (
+        select(*(getattr(model, column) for column in columns))
+        .where(*conditions)
+        .order_by(model.date.desc(), model.id.desc())
+        .limit(limit + 1)
+    )
+    rows = [tuple(row) for row in db.session.execute(statement)]
+
+    # Cold rows past the cursor compete for the same page as the hot ones, unless a full
+    # page of hot rows is already newer than anything in the archive
+    newest = newest_archived(kind, user_id)
+    if newest is not None and (len(rows) <= limit or newest > (rows[limit][1], rows[limit][0])):
+        archived = archived_history(kind, user_id, limit + 1, cursor, start, end)
+        rows = sorted(rows + archived, key=lambda row: (row[1], row[0]), reverse=True)
+
+    page = rows[:limit]
+    next_cursor = encode_cursor(page[-1][1], page[-1][0]) if len(rows) > limit else None
+    return list(columns), [[row[0], row[1].strftime(DATE_FORMAT), *row[2:]] for row in page], next_cursor
@@ -0,0 +1,115 @@
+# app/importer.py
+from sqlalchemy import insert
+from .models.models import FoodLog, FitnessLog, food_log_schema, fitness_log_schema
+from .batch import load_batch
+from .rollup import apply_deltas, sum_deltas
+from .cache import summary_cache
+from . import db
+import csv
+import json
+
+# Rows validated and inserted per transaction
+IMPORT_CHUNK_SIZE = 1000
+
+# Rejected rows reported back in detail; the rest are only counted
+MAX_REPORTED_ERRORS = 100
+
+IMPORT_FORMATS = ('ndjson', 'csv')
+
+# Model and schema of each importable log kind
+IMPORT_KINDS = {
+    'food': (FoodLog, food_log_schema),
+    'fitness': (FitnessLog, fitness_log_schema)
+}
+
+# Columns written by the export that are not part of a new entry
+IGNORED_COLUMNS = ('id', 'kind')
+
+def guess_format(filename):
+    """Pick the import format from a file name, defaulting to NDJSON."""
+    name = (filename or '').lower().removesuffix('.gz')
+    return 'csv' if name.endswith('.csv') else 'ndjson'
+
+def ndjson_records(lines):
+    """Yield (line number, record) for each non-empty NDJSON line; unparsable lines yield None."""
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield number, json.loads(line)
+        except ValueError:
+            yield number, None
+
+def csv_records(lines):
+    """Yield (line number, record) for each CSV row, dropping empty cells."""
+    reader = csv.DictReader(lines)
+    for row in reader:
+        yield reader.line_num, {key: value for key, value in row.items() if key and value not in (None, '')}
+
+class ImportResult:
+    """Counts of accepted and rejected rows, with the errors of the first rejected rows by line number."""
+
+    def __init__(self):
+        self.accepted = 0
+        self.rejected = 0
+        self.errors = []
+
+    def reject(self, line, messages):
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'errors': messages})
+
+    def as_dict(self):
+        return {'accepted': self.accepted, 'rejected': self.rejected, 'errors': self.errors}
+
+def import_chunk(kind, user_id, pending, result):
+    # Validate the chunk, insert its valid rows with one executemany and commit them with their rollup deltas
+    model, schema = IMPORT_KINDS[kind]
+    lines = [line for line, _ in pending]
+    rows, errors = load_batch(schema, [record for _, record in pending], user_id)
+    for index, messages in errors.items():
+        result.reject(lines[index], messages)
+    if not rows:
+        return
+
+    db.session.execute(insert(model), rows)
+    deltas_by_day = sum_deltas(rows)
+    apply_deltas(user_id, deltas_by_day)
+    summary_cache.invalidate_days(user_id, deltas_by_day)
+    db.session.commit()
+    result.accepted += len(rows)
+
+def import_logs(lines, user_id, import_format='ndjson', kind=None, chunk_size=IMPORT_CHUNK_SIZE):
+    """Stream log entries from an iterable of text lines into the user's food and fitness logs.
+
+    Each record's kind comes from the kind argument or, when that is None,
+    from its own 'kind' field, as written by the export. Records are validated
+    and inserted chunk by chunk, committing after each chunk, so memory stays
+    bounded and accepted chunks survive a later failure. Returns the
+    ImportResult as a dict.
+    """
+    records = csv_records(lines) if import_format == 'csv' else ndjson_records(lines)
+    pending = {name: [] for name in IMPORT_KINDS}
+    result = ImportResult()
+
+    for line, record in records:
+        if not isinstance(record, dict):
+            result.reject(line, {'_schema': ['Invalid JSON object.']})
+            continue
+        record_kind = kind or record.get('kind')
+        if record_kind not in IMPORT_KINDS:
+            result.reject(line, {'kind': ['Must be one of: food, fitness.']})
+            continue
+
+        pending[record_kind].append((line, {key: value for key, value in record.items() if key not in IGNORED_COLUMNS}))
+        if len(pending[record_kind]) >= chunk_size:
+            import_chunk(record_kind, user_id, pending[record_kind], result)
+            pending[record_kind] = []
+
+    for record_kind, remaining in pending.items():
+        if remaining:
+            import_chunk(record_kind, user_id, remaining, result)
+
+    # Chunks of the two kinds interleave, so report errors in file order
+    result.errors.sort(key=lambda error: error['line'])
+    return result.as_dict()
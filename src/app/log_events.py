@@ -0,0 +1,34 @@
+# app/log_events.py
+from flask import current_app
+import random
+
+def parse_sample_rates(value):
+    """Parse 'event=rate,event=rate' into a dict of per-event sampling rates between 0 and 1."""
+    rates = {}
+    for item in (value or '').split(','):
+        if not item.strip():
+            continue
+        event, _, rate = item.partition('=')
+        rates[event.strip()] = min(max(float(rate), 0.0), 1.0)
+    return rates
+
+def log_event(level, event, payload=None):
+    """Log a structured event only if its level is enabled and it survives sampling.
+
+    payload may be a dict or a zero-argument callable returning one; a callable
+    is only invoked once the event is actually going to be emitted, so header
+    copies and formatted messages cost nothing for dropped events. Sampling
+    rates per event name come from the LOG_SAMPLE_RATES config.
+    """
+    logger = current_app.logger
+    if not logger.isEnabledFor(level):
+        return False
+
+    rate = current_app.config.get('LOG_SAMPLE_RATES', {}).get(event, 1.0)
+    if rate < 1.0 and random.random() >= rate:
+        return False
+
+    data = payload() if callable(payload) else (payload or {})
+    # Attribute the record to the caller rather than to this helper
+    logger.log(level, {'event': event, **data}, stacklevel=2)
+    return True
@@ -0,0 +1,164 @@
+# app/logging_pipeline.py
+from logging.handlers import QueueHandler
+from fluent import handler as fluent_handler
+import atexit
+import copy
+import logging
+import msgpack
+import os
+import queue
+import threading
+import weakref
+
+class BoundedQueueHandler(QueueHandler):
+    """Queue handler that never formats on the request thread and applies a drop or block policy when full."""
+
+    def __init__(self, pipeline):
+        super().__init__(pipeline.queue)
+        self.pipeline = pipeline
+
+    def prepare(self, record):
+        # Keep structured (dict) messages intact; formatting happens on the listener thread
+        record = copy.copy(record)
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        # Always go through the pipeline, whose queue is replaced after fork
+        self.pipeline.put(record)
+
+class FluentBatchHandler(fluent_handler.FluentHandler):
+    """Fluentd handler that can ship a whole batch of records as a single forward-mode packet."""
+
+    def emit_batch(self, records):
+        sender = self.sender
+        entries = [
+            [int(record.created), self.format(record)]
+            for record in records
+            if self.filter(record)
+        ]
+        if entries:
+            sender._send(msgpack.packb((sender.tag, entries), **sender.msgpack_kwargs))
+
+class LogPipeline:
+    """Bounded queue between the request threads and the real log handlers.
+
+    Records are drained by one background thread in batches of up to
+    batch_size. Handlers with an emit_batch method receive the whole batch;
+    all others receive the records one by one. When the queue is full the
+    'drop' policy discards the record and the 'block' policy waits up to
+    block_timeout seconds before discarding it. Records a handler raised on
+    are counted as failed instead of emitted.
+    """
+
+    def __init__(self, handlers, maxsize=10000, policy='drop', block_timeout=0.05, batch_size=100):
+        if policy not in ('drop', 'block'):
+            raise ValueError(f"Unknown log queue policy: {policy}")
+        self.handlers = handlers
+        self.maxsize = maxsize
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.batch_size = batch_size
+        self.queue = queue.Queue(maxsize)
+        self.emitted = 0
+        self.failed = 0
+        self.dropped = 0
+        self._counter_lock = threading.Lock()
+        self._thread = None
+        self._stopping = False
+
+    def put(self, record):
+        try:
+            if self.policy == 'block':
+                self.queue.put(record, timeout=self.block_timeout)
+            else:
+                self.queue.put_nowait(record)
+        except queue.Full:
+            with self._counter_lock:
+                self.dropped += 1
+
+    def stats(self):
+        """Return the emitted/failed/dropped counters and the current queue depth."""
+        return {'emitted': self.emitted, 'failed': self.failed, 'dropped': self.dropped, 'queued': self.queue.qsize()}
+
+    def start(self):
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name='log-pipeline', daemon=True)
+        self._thread.start()
+        _live_pipelines.add(self)
+
+    def stop(self):
+        """Flush everything still queued and stop the listener thread."""
+        if self._thread is None:
+            return
+        self._stopping = True
+        self.queue.put(None)
+        self._thread.join()
+        self._thread = None
+        _live_pipelines.discard(self)
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            records = [record for record in batch if record is not None]
+            if records:
+                self._emit(records)
+            if self._stopping and None in batch:
+                return
+
+    def _emit(self, records):
+        failed = set()
+        for handler in self.handlers:
+            if hasattr(handler, 'emit_batch'):
+                try:
+                    handler.emit_batch(records)
+                except Exception:
+                    # A broken sink must never take the listener down with it
+                    failed.update(range(len(records)))
+            else:
+                for index, record in enumerate(records):
+                    try:
+                        handler.handle(record)
+                    except Exception:
+                        failed.add(index)
+        with self._counter_lock:
+            self.emitted += len(records) - len(failed)
+            self.failed += len(failed)
+
+    def _after_fork(self):
+        # The listener thread does not survive fork; give the child a fresh queue and thread
+        if self._thread is None:
+            return
+        self.queue = queue.Queue(self.maxsize)
+        self._counter_lock = threading.Lock()
+        self.emitted = 0
+        self.failed = 0
+        self.dropped = 0
+        for handler in self.handlers:
+            if isinstance(handler, fluent_handler.FluentHandler):
+                # Reconnect lazily instead of sharing the parent's socket
+                handler._sender = None
+        self.start()
+
+# Running pipelines; held weakly so a discarded app's pipeline is not kept alive by the hooks below
+_live_pipelines = weakref.WeakSet()
+
+def _restart_after_fork():
+    for pipeline in list(_live_pipelines):
+        pipeline._after_fork()
+
+def _stop_all():
+    for pipeline in list(_live_pipelines):
+        pipeline.stop()
+
+# Registered once per process instead of once per pipeline, so creating apps does not pile up hooks
+os.register_at_fork(after_in_child=_restart_after_fork)
+atexit.register(_stop_all)
@@ -0,0 +1,267 @@
+# app/metrics.py
+from flask import g, request, request_finished
+from .querylog import current_query_stats
+from threading import Lock, Thread, Event
+import glob
+import json
+import math
+import os
+import time
+
+# Upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, math.inf)
+
+# Help text and type of every metric family, in exposition order
+METRIC_FAMILIES = {
+    'nutrinube_http_requests_total': ('counter', 'HTTP requests by endpoint, method and status code.'),
+    'nutrinube_http_request_duration_seconds': ('histogram', 'HTTP request latency by endpoint and method.'),
+    'nutrinube_http_requests_in_flight': ('gauge', 'HTTP requests currently being handled.'),
+    'nutrinube_db_time_seconds': ('histogram', 'Time spent in database statements per request, by endpoint.'),
+    'nutrinube_db_queries_total': ('counter', 'Database statements executed while handling requests, by endpoint.'),
+    'nutrinube_db_pool_connections_in_use': ('gauge', 'Database connections checked out of the pool, by bind.'),
+    'nutrinube_db_pool_checkout_timeouts_total': ('counter', 'Pool checkouts that timed out, by bind.'),
+    'nutrinube_log_records_dropped_total': ('counter', 'Log records dropped because the log queue was full.'),
+    'nutrinube_log_records_failed_total': ('counter', 'Log records a log handler failed to write.')
+}
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+class MetricsRegistry:
+    """Counters, gauges and histograms of one process, shared with the other workers through files.
+
+    Every process periodically writes a snapshot to METRICS_DIR/metrics_<pid>.json
+    and /metrics sums the snapshots of all processes. Counters and histograms of
+    workers that have exited are kept; their gauges are ignored.
+    """
+
+    def __init__(self):
+        self.directory = None
+        self.flush_interval = 1.0
+        self.collectors = []
+        self._lock = Lock()
+        self._stopping = Event()
+        self._thread = None
+        self.reset()
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def init_app(self, app):
+        self.directory = app.config.get('METRICS_DIR')
+        self.flush_interval = app.config.get('METRICS_FLUSH_INTERVAL', self.flush_interval)
+        self.collectors = []
+        self.reset()
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            self.start()
+        app.extensions['metrics'] = self
+
+    def reset(self):
+        with self._lock:
+            self.counters = {}
+            self.gauges = {}
+            self.histograms = {}
+
+    def inc(self, name, amount=1, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def add_gauge(self, name, amount, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            self.gauges[key] = self.gauges.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            buckets, total, count = self.histograms.get(key) or ([0] * len(LATENCY_BUCKETS), 0.0, 0)
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if value <= bound:
+                    buckets[index] += 1
+                    break
+            self.histograms[key] = (buckets, total + value, count + 1)
+
+    def snapshot(self):
+        """Return this process' samples, including the ones produced by the collectors, as JSON-ready lists."""
+        gauges = {}
+        counters = {}
+        for collect in self.collectors:
+            for kind, name, labels, value in collect():
+                target = gauges if kind == 'gauge' else counters
+                key = _key(name, labels)
+                target[key] = target.get(key, 0) + value
+        with self._lock:
+            counters.update(self.counters)
+            gauges.update(self.gauges)
+            histograms = {key: (list(buckets), total, count) for key, (buckets, total, count) in self.histograms.items()}
+        return {
+            'pid': os.getpid(),
+            'counters': [[name, dict(labels), value] for (name, labels), value in counters.items()],
+            'gauges': [[name, dict(labels), value] for (name, labels), value in gauges.items()],
+            'histograms': [[name, dict(labels), *value] for (name, labels), value in histograms.items()]
+        }
+
+    def flush(self):
+        """Atomically write this process' snapshot to the metrics directory."""
+        if not self.directory:
+            return
+        path = os.path.join(self.directory, f'metrics_{os.getpid()}.json')
+        temporary = f'{path}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as output:
+            json.dump(self.snapshot(), output)
+        os.replace(temporary, path)
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = Thread(target=self._run, name='metrics-flush', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stopping.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                # Metrics must never take a worker down
+                pass
+
+    def _after_fork(self):
+        # A child starts from zero and needs its own flush thread; the parent's lock may have been held
+        self._lock = Lock()
+        self.reset()
+        self._thread = None
+        if self.directory:
+            self.start()
+
+    def collect_all(self):
+        """Sum the snapshots of every process into (counters, gauges, histograms) dicts."""
+        snapshots = [self.snapshot()]
+        if self.directory:
+            for path in glob.glob(os.path.join(self.directory, 'metrics_*.json')):
+                try:
+                    with open(path, encoding='utf-8') as snapshot:
+                        data = json.load(snapshot)
+                except (OSError, ValueError):
+                    continue
+                if data['pid'] != os.getpid():
+                    data['alive'] = _process_alive(data['pid'])
+                    snapshots.append(data)
+
+        counters, gauges, histograms = {}, {}, {}
+        for data in snapshots:
+            for name, labels, value in data['counters']:
+                key = _key(name, labels)
+                counters[key] = counters.get(key, 0) + value
+            if data.get('alive', True):
+                for name, labels, value in data['gauges']:
+                    key = _key(name, labels)
+                    gauges[key] = gauges.get(key, 0) + value
+            for name, labels, buckets, total, count in data['histograms']:
+                key = _key(name, labels)
+                merged_buckets, merged_total, merged_count = histograms.get(key) or ([0] * len(LATENCY_BUCKETS), 0.0, 0)
+                histograms[key] = ([a + b for a, b in zip(merged_buckets, buckets)], merged_total + total, merged_count + count)
+        return counters, gauges, histograms
+
+    def render(self):
+        """Render the metrics of all processes in the Prometheus text exposition format."""
+        counters, gauges, histograms = self.collect_all()
+        lines = []
+        for family, (kind, help_text) in METRIC_FAMILIES.items():
+            source = {'counter': counters, 'gauge': gauges, 'histogram': histograms}[kind]
+            samples = sorted((labels, value) for (name, labels), value in source.items() if name == family)
+            if not samples:
+                continue
+            lines.append(f'# HELP {family} {help_text}')
+            lines.append(f'# TYPE {family} {kind}')
+            for labels, value in samples:
+                if kind != 'histogram':
+                    lines.append(f'{family}{_format_labels(labels)} {_format_value(value)}')
+                    continue
+                buckets, total, count = value
+                cumulative = 0
+                for bound, bucket in zip(LATENCY_BUCKETS, buckets):
+                    cumulative += bucket
+                    le = '+Inf' if bound == math.inf else repr(bound)
+                    lines.append(f'{family}_bucket{_format_labels(labels + (("le", le),))} {cumulative}')
+                lines.append(f'{family}_sum{_format_labels(labels)} {_format_value(total)}')
+                lines.append(f'{family}_count{_format_labels(labels)} {count}')
+        return '\n'.join(lines) + '\n'
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def clear_metrics_dir(directory):
+    """Remove the snapshots of a previous server run."""
+    for path in glob.glob(os.path.join(directory, 'metrics_*.json*')):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+metrics = MetricsRegistry()
+
+def init_metrics(app, db):
+    """Feed the registry from request hooks, the statement counts of the query log and the pool metrics."""
+    metrics.init_app(app)
+
+    def collect_pools():
+        from .pool import pool_stats
+        for name, stats in pool_stats(app, db).items():
+            yield 'gauge', 'nutrinube_db_pool_connections_in_use', {'bind': name}, stats['in_use']
+            yield 'counter', 'nutrinube_db_pool_checkout_timeouts_total', {'bind': name}, stats['timeouts']
+
+    def collect_log_pipeline():
+        pipeline = app.extensions.get('log_pipeline')
+        if pipeline is not None:
+            yield 'counter', 'nutrinube_log_records_dropped_total', {}, pipeline.dropped
+            yield 'counter', 'nutrinube_log_records_failed_total', {}, pipeline.failed
+
+    metrics.collectors.extend([collect_pools, collect_log_pipeline])
+
+    @app.before_request
+    def start_request_metrics():
+        g.request_started = time.perf_counter()
+        g.metrics_endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.add_gauge('nutrinube_http_requests_in_flight', 1)
+
+    @app.after_request
+    def record_request_metrics(response):
+        if 'request_started' in g:
+            endpoint = g.metrics_endpoint
+            metrics.inc('nutrinube_http_requests_total', endpoint=endpoint, method=request.method, status=str(response.status_code))
+            metrics.observe('nutrinube_http_request_duration_seconds', time.perf_counter() - g.request_started, endpoint=endpoint, method=request.method)
+        return response
+
+    def record_query_metrics(sender, response, **extra):
+        # After the session is saved, so its statements are counted as well
+        stats = current_query_stats()
+        if stats is not None and 'metrics_endpoint' in g:
+            metrics.observe('nutrinube_db_time_seconds', stats.time, endpoint=g.metrics_endpoint)
+            metrics.inc('nutrinube_db_queries_total', stats.count, endpoint=g.metrics_endpoint)
+
+    request_finished.connect(record_query_metrics, app, weak=False)
+
+    @app.teardown_request
+    def finish_request_metrics(exc):
+        # Runs even when the request failed, so the in-flight gauge always comes back down
+        if g.pop('request_started', None) is not None:
+            metrics.add_gauge('nutrinube_http_requests_in_flight', -1)
+        g.pop('metrics_endpoint', None)
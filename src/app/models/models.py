@@ -1,9 +1,17 @@
 # app/models/models.py
 from .. import db, ma
-from marshmallow import fields, validates, ValidationError
+from marshmallow import fields, validate, validates, ValidationError
 from marshmallow_sqlalchemy import SQLAlchemyAutoSchema
 from datetime import datetime
 
+# Log dates are exchanged as ISO strings and stored as native DATE columns
+DATE_FORMAT = '%Y-%m-%d'
+INVALID_DATE_MESSAGE = 'Invalid date format. Use YYYY-MM-DD.'
+
+def parse_date(value):
+    """Parse a YYYY-MM-DD string into a date, raising ValueError if malformed."""
+    return datetime.strptime(value, DATE_FORMAT).date()
+
 # User model
 class User(db.Model):
     __tablename__ = 'user'
@@ -21,22 +29,70 @@ class FoodLog(db.Model):
     __tablename__ = 'food_log'
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    date = db.Column(db.String(50), nullable=False)
+    date = db.Column(db.Date, nullable=False)
     food = db.Column(db.String(100))
     calories = db.Column(db.Integer)
     protein = db.Column(db.Integer)
     fat = db.Column(db.Integer)
     carbs = db.Column(db.Integer)
 
+    # Per-day lookups and date ranges are always scoped to a single user, whose shard holds the rows
+    __table_args__ = (
+        db.Index('ix_food_log_user_id_date', 'user_id', 'date'),
+        {'info': {'sharded': True}}
+    )
+
 # FitnessLog model
 class FitnessLog(db.Model):
     __tablename__ = 'fitness_log'
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    date = db.Column(db.String(50), nullable=False)
+    date = db.Column(db.Date, nullable=False)
     exercise = db.Column(db.String(100))
     kcal_burned = db.Column(db.Integer)
 
+    __table_args__ = (
+        db.Index('ix_fitness_log_user_id_date', 'user_id', 'date'),
+        {'info': {'sharded': True}}
+    )
+
+# DailyTotals model, a per-user per-day rollup of the food and fitness logs
+class DailyTotals(db.Model):
+    __tablename__ = 'daily_totals'
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    date = db.Column(db.Date, primary_key=True)
+    calories = db.Column(db.Integer, nullable=False, default=0)
+    protein = db.Column(db.Integer, nullable=False, default=0)
+    fat = db.Column(db.Integer, nullable=False, default=0)
+    carbs = db.Column(db.Integer, nullable=False, default=0)
+    kcal_burned = db.Column(db.Integer, nullable=False, default=0)
+
+    # Kept next to the logs it sums, so both are updated in one shard transaction
+    __table_args__ = {'info': {'sharded': True}}
+
+# UserShard model, the directory entry pinning a user to the shard holding their logs
+class UserShard(db.Model):
+    __tablename__ = 'user_shard'
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    shard = db.Column(db.String(64), nullable=False)
+    # Shard still holding the rows of an unfinished move, cleared once they are deleted
+    moving_from = db.Column(db.String(64))
+
+# SummaryVersion model, a per-user counter bumped on every write that changes a daily summary.
+# Every worker compares it with the version its cached summaries were built from.
+class SummaryVersion(db.Model):
+    __tablename__ = 'summary_version'
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+# ServerSession model, used when sessions are stored server-side instead of in the cookie
+class ServerSession(db.Model):
+    __tablename__ = 'server_session'
+    __bind_key__ = 'sessions'
+    id = db.Column(db.String(64), primary_key=True)
+    data = db.Column(db.Text, nullable=False)
+    expires_at = db.Column(db.DateTime(timezone=True), nullable=False, index=True)
+
 # User Schema
 class UserSchema(SQLAlchemyAutoSchema):
     username = fields.Str(required=True)
@@ -60,100 +116,46 @@ class UserSchema(SQLAlchemyAutoSchema):
 
 # Goal Schema
 class GoalsSchema(SQLAlchemyAutoSchema):
-    calorie_goal = fields.Integer(required=True, validate=lambda n: n > 0)
-    protein_goal = fields.Integer(required=True, validate=lambda n: n > 0)
-    fat_goal = fields.Integer(required=True, validate=lambda n: n > 0)
-    carbs_goal = fields.Integer(required=True, validate=lambda n: n > 0)
+    calorie_goal = fields.Integer(required=True, validate=validate.Range(min=1, error='Calorie goal must be greater than zero.'))
+    protein_goal = fields.Integer(required=True, validate=validate.Range(min=1, error='Protein goal must be greater than zero.'))
+    fat_goal = fields.Integer(required=True, validate=validate.Range(min=1, error='Fat goal must be greater than zero.'))
+    carbs_goal = fields.Integer(required=True, validate=validate.Range(min=1, error='Carbs goal must be greater than zero.'))
     
     class Meta:
         load_instance = False
 
-    @validates('calorie_goal')
-    def validate_calorie_goal(self, value):
-        if value <= 0:
-            raise ValidationError('Calorie goal must be greater than zero.')
-
-    @validates('protein_goal')
-    def validate_protein_goal(self, value):
-        if value <= 0:
-            raise ValidationError('Protein goal must be greater than zero.')
-
-    @validates('fat_goal')
-    def validate_fat_goal(self, value):
-        if value <= 0:
-            raise ValidationError('Fat goal must be greater than zero.')
-
-    @validates('carbs_goal')
-    def validate_carbs_goal(self, value):
-        if value <= 0:
-            raise ValidationError('Carbs goal must be greater than zero.')
-
 # FoodLog Schema
 class FoodLogSchema(SQLAlchemyAutoSchema):
-    date = fields.Str(required=True)
+    date = fields.Date(required=True, format=DATE_FORMAT, error_messages={'invalid': INVALID_DATE_MESSAGE})
     food = fields.Str(required=True)
-    calories = fields.Integer(required=True, validate=lambda n: n >= 0)
-    protein = fields.Integer(required=True, validate=lambda n: n >= 0)
-    fat = fields.Integer(required=True, validate=lambda n: n >= 0)
-    carbs = fields.Integer(required=True, validate=lambda n: n >= 0)
+    calories = fields.Integer(required=True, validate=validate.Range(min=0, error='Calories must not be negative.'))
+    protein = fields.Integer(required=True, validate=validate.Range(min=0, error='Protein must not be negative.'))
+    fat = fields.Integer(required=True, validate=validate.Range(min=0, error='Fat must not be negative.'))
+    carbs = fields.Integer(required=True, validate=validate.Range(min=0, error='Carbs must not be negative.'))
 
     class Meta:
         model = FoodLog
         include_fk = True
         load_instance = True
 
-    @validates('date')
-    def validate_date(self, value):
-        try:
-            datetime.strptime(value, '%Y-%m-%d')
-        except ValueError:
-            raise ValidationError('Invalid date format. Use YYYY-MM-DD.')
-
-    @validates('calories')
-    def validate_calories(self, value):
-        if value is None or value < 0:
-            raise ValidationError('Calories must not be negative.')
-
-    @validates('protein')
-    def validate_protein(self, value):
-        if value is None or value < 0:
-            raise ValidationError('Protein must not be negative.')
-
-    @validates('fat')
-    def validate_fat(self, value):
-        if value is None or value < 0:
-            raise ValidationError('Fat must not be negative.')
-
-    @validates('carbs')
-    def validate_carbs(self, value):
-        if value is None or value < 0:
-            raise ValidationError('Carbs must not be negative.')
-
 # FitnessLog Schema
 class FitnessLogSchema(SQLAlchemyAutoSchema):
-    date = fields.Str(required=True)
+    date = fields.Date(required=True, format=DATE_FORMAT, error_messages={'invalid': INVALID_DATE_MESSAGE})
     exercise = fields.Str(required=True)
-    kcal_burned = fields.Integer(required=True, validate=lambda n: n >= 0)
+    kcal_burned = fields.Integer(required=True, validate=validate.Range(min=0, error='Calories burned must be a non-negative integer.'))
 
     class Meta:
         model = FitnessLog
         include_fk = True
         load_instance = True
 
-    @validates('date')
-    def validate_date(self, value):
-        try:
-            # Ensure the date is in the correct format
-            datetime.strptime(value, '%Y-%m-%d')
-        except ValueError:
-            raise ValidationError('Invalid date format. Use YYYY-MM-DD.')
-
     @validates('exercise')
     def validate_exercise(self, value):
         if not value:
             raise ValidationError('Exercise name is required.')
 
-    @validates('kcal_burned')
-    def validate_kcal_burned(self, value):
-        if value is None or value < 0:
-            raise ValidationError('Calories burned must be a non-negative integer.')
\ No newline at end of file
+# Schemas are stateless when loading plain dicts, so one instance of each is shared by all requests.
+# The log schemas load column dicts; the routes build the model objects themselves.
+goals_schema = GoalsSchema()
+food_log_schema = FoodLogSchema(load_instance=False, exclude=('id',))
+fitness_log_schema = FitnessLogSchema(load_instance=False, exclude=('id',))
@@ -0,0 +1,185 @@
+# app/pool.py
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+from threading import Lock
+import os
+import time
+
+def engine_options(uri):
+    """Build the engine options for a database URI from the DB_POOL_* environment variables.
+
+    Sizing options only apply to queue pools; in-memory SQLite keeps the single
+    shared connection Flask-SQLAlchemy gives it.
+    """
+    options = {
+        'pool_pre_ping': os.environ.get('DB_POOL_PRE_PING', 'true').lower() == 'true',
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    }
+    url = make_url(uri)
+    if url.drivername.startswith('sqlite') and url.database in (None, '', ':memory:'):
+        return options
+
+    options.update({
+        'poolclass': TimedQueuePool,
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 5)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': float(os.environ.get('DB_POOL_TIMEOUT', 30))
+    })
+    return options
+
+class TimedQueuePool(QueuePool):
+    """Queue pool that reports how long each checkout waited, and checkout timeouts, to its metrics."""
+
+    metrics = None
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            if self.metrics is not None:
+                self.metrics.record_timeout(time.perf_counter() - start)
+            raise
+        if self.metrics is not None:
+            self.metrics.record_wait(time.perf_counter() - start)
+        return connection
+
+    def recreate(self):
+        # dispose() swaps in a new pool; keep reporting to the same metrics
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+class PoolMetrics:
+    """Checkout, wait and in-use counters of one engine's pool, fed by pool events."""
+
+    def __init__(self, name, logger=None, slow_checkout=0.1):
+        self.name = name
+        self.logger = logger
+        self.slow_checkout = slow_checkout
+        self._lock = Lock()
+        self.reset()
+
+    def reset(self):
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidated = 0
+        self.timeouts = 0
+        self.in_use = 0
+        self.max_in_use = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_wait(self, seconds):
+        with self._lock:
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+        if self.logger is not None and seconds >= self.slow_checkout:
+            self.logger.warning({
+                'event': 'pool_slow_checkout',
+                'message': 'Waited for a database connection',
+                'engine': self.name,
+                'wait_ms': round(seconds * 1000, 2),
+                'in_use': self.in_use
+            })
+
+    def record_timeout(self, seconds):
+        with self._lock:
+            self.timeouts += 1
+        if self.logger is not None:
+            self.logger.error({
+                'event': 'pool_timeout',
+                'message': 'Timed out waiting for a database connection',
+                'engine': self.name,
+                'wait_ms': round(seconds * 1000, 2),
+                'in_use': self.in_use
+            })
+
+    def on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connects += 1
+
+    def on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.max_in_use = max(self.max_in_use, self.in_use)
+
+    def on_checkin(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.checkins += 1
+            self.in_use = max(self.in_use - 1, 0)
+
+    def on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.invalidated += 1
+
+    def snapshot(self, pool=None):
+        """Return the counters, plus the live pool size and overflow for queue pools."""
+        with self._lock:
+            stats = {
+                'connects': self.connects,
+                'checkouts': self.checkouts,
+                'checkins': self.checkins,
+                'invalidated': self.invalidated,
+                'timeouts': self.timeouts,
+                'in_use': self.in_use,
+                'max_in_use': self.max_in_use,
+                'wait_total_ms': round(self.wait_total * 1000, 3),
+                'wait_max_ms': round(self.wait_max * 1000, 3),
+                'wait_avg_ms': round(self.wait_total * 1000 / self.checkouts, 3) if self.checkouts else 0.0
+            }
+        if isinstance(pool, QueuePool):
+            stats.update({'pool_size': pool.size(), 'overflow': pool.overflow(), 'checked_out': pool.checkedout()})
+        return stats
+
+def instrument_engine(name, engine, logger=None, slow_checkout=0.1):
+    """Attach PoolMetrics to an engine through its pool events and return them."""
+    metrics = PoolMetrics(name, logger, slow_checkout)
+    event.listen(engine, 'connect', metrics.on_connect)
+    event.listen(engine, 'checkout', metrics.on_checkout)
+    event.listen(engine, 'checkin', metrics.on_checkin)
+    event.listen(engine, 'invalidate', metrics.on_invalidate)
+    if isinstance(engine.pool, TimedQueuePool):
+        engine.pool.metrics = metrics
+    return metrics
+
+def init_pool_metrics(app, db):
+    """Instrument every engine of the app; metrics are exposed as app.extensions['pool_metrics']."""
+    slow_checkout = app.config.get('DB_POOL_SLOW_CHECKOUT_MS', 100) / 1000
+    with app.app_context():
+        app.extensions['pool_metrics'] = {
+            name or 'default': instrument_engine(name or 'default', engine, app.logger, slow_checkout)
+            for name, engine in db.engines.items()
+        }
+
+def pool_stats(app, db):
+    """Return a snapshot of every instrumented pool, keyed by bind name."""
+    with app.app_context():
+        pools = {name or 'default': engine.pool for name, engine in db.engines.items()}
+    return {
+        name: metrics.snapshot(pools.get(name))
+        for name, metrics in app.extensions.get('pool_metrics', {}).items()
+    }
+
+def warm_up(app, db, count=None):
+    """Open up to count connections per engine up front so first requests do not pay for connecting."""
+    count = app.config.get('DB_POOL_WARMUP', 1) if count is None else count
+    if count <= 0:
+        return
+    with app.app_context():
+        for engine in db.engines.values():
+            connections = []
+            try:
+                for _ in range(count):
+                    connections.append(engine.connect())
+            except exc.SQLAlchemyError as e:
+                app.logger.warning({
+                    'event': 'pool_warmup',
+                    'message': f"Could not warm up the connection pool: {e}"
+                })
+            finally:
+                for connection in connections:
+                    connection.close()
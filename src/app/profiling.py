@@ -0,0 +1,209 @@
+# app/profiling.py
+from flask import g, request
+from collections import deque
+from datetime import datetime, timezone
+from threading import Lock
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import time
+import tracemalloc
+import uuid
+
+# Profilers a request can ask for in the X-Profile header or the _profile query parameter
+PROFILE_KINDS = ('cpu', 'memory')
+
+# File name suffix of each kind of profile artifact
+PROFILE_SUFFIXES = {'cpu': '.prof', 'memory': '.txt'}
+
+# Allocation sites listed in a memory profile
+MEMORY_TOP_LINES = 50
+
+def profile_token_valid(token):
+    """Whether the request carries the profiling token in X-Profile-Token; always False when no token is configured."""
+    return bool(token) and hmac.compare_digest(request.headers.get('X-Profile-Token', ''), token)
+
+def requested_profiles():
+    """Return the profiler kinds asked for by the current request, e.g. ('cpu', 'memory')."""
+    value = request.headers.get('X-Profile') or request.args.get('_profile') or ''
+    return tuple(kind for kind in PROFILE_KINDS if kind in value.lower().replace(' ', '').split(','))
+
+class RateLimiter:
+    """Allow at most limit events per sliding window of seconds."""
+
+    def __init__(self, limit, window):
+        self.limit = limit
+        self.window = window
+        self._events = deque()
+        self._lock = Lock()
+
+    def allow(self):
+        now = time.monotonic()
+        with self._lock:
+            while self._events and self._events[0] <= now - self.window:
+                self._events.popleft()
+            if len(self._events) >= self.limit:
+                return False
+            self._events.append(now)
+            return True
+
+class RequestProfiler:
+    """CPU (cProfile) and memory (tracemalloc) profile of a single request."""
+
+    # Both profilers are process-wide, so only one request is profiled at a time
+    _active = Lock()
+
+    def __init__(self, kinds):
+        self.kinds = kinds
+        self.profile = None
+        self.started = None
+
+    def start(self):
+        if not RequestProfiler._active.acquire(blocking=False):
+            return False
+        if 'memory' in self.kinds:
+            tracemalloc.start()
+        if 'cpu' in self.kinds:
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+        self.started = time.perf_counter()
+        return True
+
+    def stop(self, directory, profile_id, description):
+        """Stop the profilers and write their artifacts; return the names of the written files."""
+        elapsed = time.perf_counter() - self.started
+        written = []
+        try:
+            if self.profile is not None:
+                self.profile.disable()
+                name = f'{profile_id}{PROFILE_SUFFIXES["cpu"]}'
+                self.profile.dump_stats(os.path.join(directory, name))
+                written.append(name)
+            if 'memory' in self.kinds:
+                snapshot = tracemalloc.take_snapshot()
+                current, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                name = f'{profile_id}{PROFILE_SUFFIXES["memory"]}'
+                with open(os.path.join(directory, name), 'w', encoding='utf-8') as output:
+                    output.write(f'{description}\nelapsed_ms={elapsed * 1000:.2f} current_bytes={current} peak_bytes={peak}\n\n')
+                    for stat in snapshot.statistics('lineno')[:MEMORY_TOP_LINES]:
+                        output.write(f'{stat}\n')
+                written.append(name)
+        finally:
+            RequestProfiler._active.release()
+        return written
+
+    def abort(self):
+        # The request failed before after_request ran; drop the partial profile
+        if self.profile is not None:
+            self.profile.disable()
+        if 'memory' in self.kinds:
+            tracemalloc.stop()
+        RequestProfiler._active.release()
+
+def prune_profiles(directory, keep):
+    """Delete all but the newest keep profile artifacts."""
+    names = sorted(
+        (name for name in os.listdir(directory) if name.endswith(tuple(PROFILE_SUFFIXES.values()))),
+        key=lambda name: os.path.getmtime(os.path.join(directory, name)),
+        reverse=True
+    )
+    for name in names[keep:]:
+        try:
+            os.remove(os.path.join(directory, name))
+        except OSError:
+            pass
+
+def list_profiles(directory):
+    """Return the stored profile artifacts, newest first, as dicts with their id, kind, size and creation time."""
+    if not os.path.isdir(directory):
+        return []
+    suffixes = {suffix: kind for kind, suffix in PROFILE_SUFFIXES.items()}
+    profiles = []
+    for name in os.listdir(directory):
+        stem, suffix = os.path.splitext(name)
+        if suffix not in suffixes:
+            continue
+        path = os.path.join(directory, name)
+        profiles.append({
+            'id': stem,
+            'kind': suffixes[suffix],
+            'file': name,
+            'bytes': os.path.getsize(path),
+            'created': datetime.fromtimestamp(os.path.getmtime(path), timezone.utc).isoformat()
+        })
+    profiles.sort(key=lambda profile: profile['created'], reverse=True)
+    return profiles
+
+def cpu_summary(path, limit=30):
+    """Render the functions with the highest cumulative time of a stored CPU profile as text."""
+    output = io.StringIO()
+    pstats.Stats(path, stream=output).sort_stats('cumulative').print_stats(limit)
+    return output.getvalue()
+
+def init_profiling(app):
+    """Profile single requests on demand for callers holding PROFILE_TOKEN, at most PROFILE_RATE_LIMIT per window.
+
+    A request opts in with 'X-Profile: cpu,memory' (or '?_profile=cpu') and
+    'X-Profile-Token'. Its artifacts are written to PROFILE_DIR and their id is
+    returned in the X-Profile-Id header.
+    """
+    limiter = RateLimiter(app.config.get('PROFILE_RATE_LIMIT', 10), app.config.get('PROFILE_RATE_WINDOW', 60))
+
+    @app.before_request
+    def start_profiling():
+        g.pop('profiler', None)
+        g.pop('profile_status', None)
+        kinds = requested_profiles()
+        if not kinds or not profile_token_valid(app.config.get('PROFILE_TOKEN')):
+            return
+        if not limiter.allow():
+            app.logger.warning({
+                'event': 'profile_rate_limited',
+                'message': 'Profiling request rejected by the rate limit',
+                'route': request.path,
+                'ip': request.remote_addr
+            })
+            g.profile_status = 'rate-limited'
+            return
+        profiler = RequestProfiler(kinds)
+        if not profiler.start():
+            g.profile_status = 'busy'
+            return
+        g.profiler = profiler
+
+    @app.after_request
+    def finish_profiling(response):
+        status = g.pop('profile_status', None)
+        profiler = g.pop('profiler', None)
+        if profiler is None:
+            if status:
+                response.headers['X-Profile'] = status
+            return response
+
+        directory = app.config['PROFILE_DIR']
+        os.makedirs(directory, exist_ok=True)
+        profile_id = f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        files = profiler.stop(directory, profile_id, f'{request.method} {request.full_path} -> {response.status_code}')
+        prune_profiles(directory, app.config.get('PROFILE_KEEP', 100))
+
+        app.logger.info({
+            'event': 'request_profiled',
+            'message': 'Request profiled on demand',
+            'profile_id': profile_id,
+            'kinds': list(profiler.kinds),
+            'route': request.path,
+            'files': files,
+            'ip': request.remote_addr
+        })
+        response.headers['X-Profile-Id'] = profile_id
+        return response
+
+    @app.teardown_request
+    def abort_profiling(exc):
+        # after_request is skipped when the view raised, but the profilers must still be stopped
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profiler.abort()
@@ -0,0 +1,136 @@
+# app/querylog.py
+from flask import request, has_request_context, request_finished
+from sqlalchemy import event
+from collections import Counter
+from contextvars import ContextVar
+from functools import lru_cache
+from .log_events import log_event
+import logging
+import re
+import time
+
+# Longest statement text written to a log record
+MAX_LOGGED_STATEMENT = 1000
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PLACEHOLDERS = re.compile(r'%\(\w+\)s|%s|:\w+|\$\d+|\?')
+_PLACEHOLDER_LISTS = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+# Statistics of the request being handled; set around the whole WSGI call so the session load and save are included
+_query_stats = ContextVar('query_stats', default=None)
+
+@lru_cache(maxsize=1024)
+def statement_shape(statement):
+    """Reduce a SQL statement to its shape: literals, placeholders and IN lists become '?', whitespace is collapsed.
+
+    Two statements with the same shape differ only in their parameters, so a
+    shape that repeats many times in one request points at a query in a loop.
+    """
+    shape = _PLACEHOLDERS.sub('?', _LITERALS.sub('?', statement))
+    shape = _PLACEHOLDER_LISTS.sub('(?)', shape)
+    return _WHITESPACE.sub(' ', shape).strip()
+
+class QueryStats:
+    """Statements executed while handling one request: how many, how long and how often each shape ran."""
+
+    def __init__(self):
+        self.count = 0
+        self.time = 0.0
+        self.shapes = Counter()
+
+    def record(self, statement, seconds):
+        self.count += 1
+        self.time += seconds
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated(self, threshold):
+        """Return (shape, count) of the shapes that ran more than threshold times, most frequent first."""
+        return [(shape, count) for shape, count in self.shapes.most_common() if count > threshold]
+
+def current_query_stats():
+    """Return the QueryStats of the current request, or None outside of one."""
+    return _query_stats.get()
+
+def init_query_log(app, db):
+    """Count and time the statements of every request, log slow statements and warn about repeated ones.
+
+    The counts go into the 'request_queries' log event and, in debug mode or
+    with SQL_DEBUG_HEADERS, into the X-DB-Queries and Server-Timing response
+    headers. Counting starts before the request context is pushed and the
+    report is made on request_finished, so the statements of the session
+    backend (loading the session on push, saving it after the after_request
+    hooks) are part of the request.
+    """
+    slow_query = app.config.get('SQL_SLOW_QUERY_MS', 200) / 1000
+    repeat_threshold = app.config.get('SQL_REPEAT_THRESHOLD', 10)
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('statement_started', []).append(time.perf_counter())
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['statement_started'].pop()
+        stats = current_query_stats()
+        if stats is not None:
+            stats.record(statement, elapsed)
+        if elapsed >= slow_query:
+            app.logger.warning({
+                'event': 'slow_query',
+                'message': 'Database statement exceeded SQL_SLOW_QUERY_MS',
+                'duration_ms': round(elapsed * 1000, 2),
+                'statement': statement[:MAX_LOGGED_STATEMENT],
+                'executemany': executemany,
+                'endpoint': request.path if has_request_context() else None
+            })
+
+    def handle_error(context):
+        # A failed statement never reaches after_cursor_execute
+        if context.connection is not None and context.connection.info.get('statement_started'):
+            context.connection.info['statement_started'].pop()
+
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', after_cursor_execute)
+            event.listen(engine, 'handle_error', handle_error)
+
+    wsgi_app = app.wsgi_app
+
+    def counted_wsgi_app(environ, start_response):
+        token = _query_stats.set(QueryStats())
+        try:
+            return wsgi_app(environ, start_response)
+        finally:
+            _query_stats.reset(token)
+
+    app.wsgi_app = counted_wsgi_app
+
+    def report_query_stats(sender, response, **extra):
+        stats = current_query_stats()
+        if stats is None:
+            return
+
+        if app.debug or app.config.get('SQL_DEBUG_HEADERS'):
+            response.headers['X-DB-Queries'] = str(stats.count)
+            response.headers['Server-Timing'] = f'db;dur={stats.time * 1000:.2f}'
+
+        log_event(logging.INFO, 'request_queries', lambda: {
+            'method': request.method,
+            'endpoint': request.url_rule.rule if request.url_rule else None,
+            'status': response.status_code,
+            'queries': stats.count,
+            'db_time_ms': round(stats.time * 1000, 2)
+        })
+
+        for shape, count in stats.repeated(repeat_threshold):
+            app.logger.warning({
+                'event': 'repeated_query',
+                'message': f'Statement ran {count} times in one request; possibly an N+1 query',
+                'count': count,
+                'statement': shape[:MAX_LOGGED_STATEMENT],
+                'endpoint': request.url_rule.rule if request.url_rule else None,
+                'ip': request.remote_addr
+            })
+
+    # Blinker holds receivers weakly by default, and this one only lives in the closure
+    request_finished.connect(report_query_stats, app, weak=False)
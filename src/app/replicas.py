@@ -0,0 +1,39 @@
+# app/replicas.py
+from flask import current_app, g, request, session
+from functools import wraps
+import random
+import time
+
+# Request methods that never write
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+def replica_bind_keys(urls):
+    """Name one bind per comma-separated replica URL: replica_0, replica_1, ..."""
+    return {f'replica_{index}': url.strip() for index, url in enumerate(urls.split(',')) if url.strip()}
+
+def read_replica(f):
+    """Serve a read-only handler from a replica, unless the user wrote within REPLICA_STICKY_SECONDS."""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        replicas = current_app.config.get('REPLICA_BINDS')
+        last_write = session.get('last_write_at', 0)
+        if not replicas or time.time() - last_write < current_app.config.get('REPLICA_STICKY_SECONDS', 5):
+            return f(*args, **kwargs)
+
+        g.read_replica = random.choice(replicas)
+        try:
+            return f(*args, **kwargs)
+        finally:
+            g.pop('read_replica', None)
+    return decorated_function
+
+def init_replicas(app):
+    """Remember in the session when a logged-in user last wrote, so their next reads stay on the primary."""
+    if not app.config.get('REPLICA_BINDS'):
+        return
+
+    @app.after_request
+    def mark_write(response):
+        if request.method not in SAFE_METHODS and response.status_code < 400 and 'username' in session:
+            session['last_write_at'] = time.time()
+        return response
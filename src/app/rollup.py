@@ -0,0 +1,132 @@
+# app/rollup.py
+from sqlalchemy import select, delete, insert, union_all, literal, func, inspect, exc
+from sqlalchemy.dialects import postgresql, sqlite
+from .models.models import DailyTotals, FoodLog, FitnessLog
+from .shards import log_shards, using_shard, shard_for
+from .archive import archived_entries
+from . import db
+
+# Columns of the rollup that are maintained as running sums
+TOTAL_COLUMNS = ('calories', 'protein', 'fat', 'carbs', 'kcal_burned')
+
+def _upsert_statement():
+    # Both supported backends share the same ON CONFLICT API
+    if db.session.get_bind(DailyTotals).dialect.name == 'postgresql':
+        return postgresql.insert(DailyTotals)
+    return sqlite.insert(DailyTotals)
+
+def apply_deltas(user_id, deltas_by_day):
+    """Add per-day deltas to the user's rollup rows with one multi-row upsert in the current transaction."""
+    if not deltas_by_day:
+        return
+    rows = [
+        {'user_id': user_id, 'date': day, **{column: deltas.get(column) or 0 for column in TOTAL_COLUMNS}}
+        for day, deltas in deltas_by_day.items()
+    ]
+    statement = _upsert_statement().values(rows)
+    statement = statement.on_conflict_do_update(
+        index_elements=[DailyTotals.user_id, DailyTotals.date],
+        set_={column: getattr(DailyTotals, column) + statement.excluded[column] for column in TOTAL_COLUMNS}
+    )
+    db.session.execute(statement)
+
+def apply_delta(user_id, day, **deltas):
+    """Add the given deltas to the (user_id, day) rollup row within the current transaction."""
+    apply_deltas(user_id, {day: deltas})
+
+def sum_deltas(entries, sign=1):
+    """Fold log entry dicts into per-day deltas of the rollup columns."""
+    deltas_by_day = {}
+    for entry in entries:
+        deltas = deltas_by_day.setdefault(entry['date'], dict.fromkeys(TOTAL_COLUMNS, 0))
+        for column in TOTAL_COLUMNS:
+            deltas[column] += sign * (entry.get(column) or 0)
+    return deltas_by_day
+
+def apply_food_delta(food_log, sign=1):
+    """Add (sign=1) or subtract (sign=-1) a food log entry from the rollup."""
+    apply_delta(
+        food_log.user_id, food_log.date,
+        calories=sign * (food_log.calories or 0),
+        protein=sign * (food_log.protein or 0),
+        fat=sign * (food_log.fat or 0),
+        carbs=sign * (food_log.carbs or 0)
+    )
+
+def apply_fitness_delta(fitness_log, sign=1):
+    """Add (sign=1) or subtract (sign=-1) a fitness log entry from the rollup."""
+    apply_delta(fitness_log.user_id, fitness_log.date, kcal_burned=sign * (fitness_log.kcal_burned or 0))
+
+def rebuild_daily_totals(user_id=None):
+    """Recompute the rollup from the raw logs in bulk, for one user or for everyone, shard by shard."""
+    rows = 0
+    for shard in log_shards(user_id):
+        with using_shard(shard):
+            rows += _rebuild_shard_totals(user_id)
+
+    # Entries moved to cold storage are no longer in the log tables but still count
+    for owner, entries in archived_entries(user_id):
+        with using_shard(shard_for(owner)):
+            apply_deltas(owner, sum_deltas(entries))
+            db.session.commit()
+    return rows
+
+def _rebuild_shard_totals(user_id):
+    food = select(
+        FoodLog.user_id, FoodLog.date,
+        func.coalesce(FoodLog.calories, 0).label('calories'),
+        func.coalesce(FoodLog.protein, 0).label('protein'),
+        func.coalesce(FoodLog.fat, 0).label('fat'),
+        func.coalesce(FoodLog.carbs, 0).label('carbs'),
+        literal(0).label('kcal_burned')
+    )
+    fitness = select(
+        FitnessLog.user_id, FitnessLog.date,
+        literal(0), literal(0), literal(0), literal(0),
+        func.coalesce(FitnessLog.kcal_burned, 0)
+    )
+    clear = delete(DailyTotals)
+    if user_id is not None:
+        food = food.where(FoodLog.user_id == user_id)
+        fitness = fitness.where(FitnessLog.user_id == user_id)
+        clear = clear.where(DailyTotals.user_id == user_id)
+
+    entries = union_all(food, fitness).subquery('entries')
+    grouped = select(
+        entries.c.user_id,
+        entries.c.date,
+        *(func.sum(entries.c[column]) for column in TOTAL_COLUMNS)
+    ).group_by(entries.c.user_id, entries.c.date)
+
+    db.session.execute(clear)
+    result = db.session.execute(
+        insert(DailyTotals).from_select(['user_id', 'date', *TOTAL_COLUMNS], grouped)
+    )
+    db.session.commit()
+    return result.rowcount
+
+def rollup_missing():
+    """Whether a log database holds food or fitness logs but no daily_totals table yet, i.e. predates the rollup."""
+    for shard in log_shards():
+        inspector = inspect(db.engines[shard])
+        has_logs = inspector.has_table(FoodLog.__tablename__) or inspector.has_table(FitnessLog.__tablename__)
+        if has_logs and not inspector.has_table(DailyTotals.__tablename__):
+            return True
+    return False
+
+def backfill_daily_totals(app):
+    """Fill a newly created rollup from the existing logs; on failure, say which commands finish the upgrade."""
+    try:
+        rows = rebuild_daily_totals()
+    except exc.SQLAlchemyError as e:
+        db.session.rollback()
+        app.logger.warning({
+            'event': 'daily_totals_backfill',
+            'message': f"Could not fill daily_totals from the logs: {e}; run 'flask migrate-log-dates' and then 'flask rebuild-daily-totals'"
+        })
+        return
+    app.logger.info({
+        'event': 'daily_totals_backfill',
+        'message': 'Filled the new daily_totals rollup from the existing logs',
+        'rows': rows
+    })
@@ -1,23 +1,47 @@
 # app/routes/routes_auth.py
-from flask import render_template, redirect, url_for, request, jsonify, session, current_app
+from flask import render_template, redirect, url_for, request, jsonify, session, current_app, g
+from ..log_events import log_event
+import logging
 from werkzeug.security import generate_password_hash, check_password_hash
 from ..models.models import User
+from ..shards import shard_for
 from .. import db
+from collections import namedtuple
 from functools import wraps
 from marshmallow import ValidationError
 
+# Identity of the logged-in user, resolved once per request and exposed as g.user
+Identity = namedtuple('Identity', ['id', 'username'])
+
+def load_identity():
+    """Resolve the session user into an Identity, or None if the user no longer exists."""
+    if 'user_id' in session:
+        return Identity(session['user_id'], session['username'])
+
+    # Sessions created before user_id was stored need a one-time lookup
+    user_id = db.session.execute(
+        db.select(User.id).filter_by(username=session['username'])
+    ).scalar()
+    if user_id is None:
+        return None
+    session['user_id'] = user_id
+    return Identity(user_id, session['username'])
+
 # Utility decorator to enforce login on certain routes
 def login_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
         # Check if the user is in the session, redirect to login if not
         if 'username' not in session:
-            current_app.logger.info({
-                'event': 'access_denied',
+            log_event(logging.INFO, 'access_denied', lambda: {
                 'message': 'User attempted to access a protected route without logging in',
                 'route': request.path
             })
             return redirect(url_for('login'))
+        g.user = load_identity()
+        # Route the user's logs to their shard for the rest of the request. Looked up on every
+        # request rather than kept in the session, so a move takes effect for sessions already open.
+        g.shard = shard_for(g.user.id) if g.user else None
         return f(*args, **kwargs)
     return decorated_function
 
@@ -49,8 +73,8 @@ def init_auth_routes(app):
                 # Authenticate user by checking password hash
                 if user and check_password_hash(user.password_hash, password):
                     session['username'] = username
-                    current_app.logger.info({
-                        'event': 'login_success',
+                    session['user_id'] = user.id
+                    log_event(logging.INFO, 'login_success', lambda: {
                         'message': f'User {username} logged in successfully',
                         'ip': request.remote_addr
                     })
@@ -65,7 +89,7 @@ def init_auth_routes(app):
                     return jsonify({'error': 'Invalid username or password'}), 401
 
             # Render the login page
-            current_app.logger.info({'event': 'render_login_page', 'message': 'Login page rendered'})
+            log_event(logging.INFO, 'render_login_page', {'message': 'Login page rendered'})
             return render_template('login.html')
         except Exception as e:
             current_app.logger.error({
@@ -106,8 +130,7 @@ def init_auth_routes(app):
             db.session.add(new_user)
             db.session.commit()
 
-            current_app.logger.info({
-                'event': 'registration_success',
+            log_event(logging.INFO, 'registration_success', lambda: {
                 'message': f'User {username} registered successfully',
                 'ip': request.remote_addr
             })
@@ -134,8 +157,8 @@ def init_auth_routes(app):
     def logout():
         try:
             username = session.pop('username', None)
-            current_app.logger.info({
-                'event': 'logout',
+            session.pop('user_id', None)
+            log_event(logging.INFO, 'logout', lambda: {
                 'message': f'User {username} logged out',
                 'ip': request.remote_addr
             })
@@ -0,0 +1,67 @@
+# app/routes/routes_export.py
+from flask import request, jsonify, session, current_app, g, stream_with_context
+from ..log_events import log_event
+import logging
+from ..export import export_stream, EXPORT_FORMATS
+from ..archive import ARCHIVED_MODELS
+from .routes_auth import login_required
+from datetime import datetime
+
+# Content types of the export formats
+EXPORT_CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8'
+}
+
+# Initialize routes related to exporting user data
+def init_export_routes(app):
+
+    # Route to stream every food and/or fitness log entry of the user
+    @app.route('/api/export', methods=['GET'])
+    @login_required
+    def export_logs():
+        username = session.get('username')
+        user = g.user
+        if not user:
+            current_app.logger.error({
+                'event': 'export_failed',
+                'message': 'User not found',
+                'username': username,
+                'ip': request.remote_addr
+            })
+            return jsonify({'error': 'User not found'}), 404
+
+        export_format = request.args.get('format', 'ndjson')
+        kind = request.args.get('kind', 'all')
+        compress = request.args.get('gzip', 'false').lower() in ('1', 'true')
+        if export_format not in EXPORT_FORMATS or kind not in ('all', *ARCHIVED_MODELS):
+            current_app.logger.warning({
+                'event': 'export_failed',
+                'message': 'Invalid export parameters',
+                'format': export_format,
+                'kind': kind,
+                'ip': request.remote_addr
+            })
+            return jsonify({'error': f"format must be one of {', '.join(EXPORT_FORMATS)} and kind one of all, food, fitness"}), 400
+
+        kinds = list(ARCHIVED_MODELS) if kind == 'all' else [kind]
+        log_event(logging.INFO, 'export_started', lambda: {
+            'message': 'Log export started',
+            'username': username,
+            'format': export_format,
+            'kind': kind,
+            'gzip': compress,
+            'ip': request.remote_addr
+        })
+
+        # Rows are read and written chunk by chunk while the response is sent
+        filename = f"nutrinube-{kind}-{datetime.today().strftime('%Y%m%d')}.{export_format}"
+        if compress:
+            filename += '.gz'
+        response = current_app.response_class(
+            stream_with_context(export_stream(user.id, kinds, export_format, compress)),
+            mimetype='application/gzip' if compress else EXPORT_CONTENT_TYPES[export_format]
+        )
+        response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+        response.headers['Cache-Control'] = 'no-store'
+        return response
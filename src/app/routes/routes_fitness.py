@@ -1,9 +1,17 @@
 # app/routes/routes_fitness.py
-from flask import jsonify, request, session, current_app
-from ..models.models import User, FitnessLog, FitnessLogSchema
+from flask import jsonify, request, session, current_app, g
+from ..log_events import log_event
+import logging
+from ..models.models import FitnessLog, fitness_log_schema
+from ..validation import load_log_entry
 from .. import db
+from ..cache import summary_cache
+from ..rollup import apply_fitness_delta, apply_deltas, sum_deltas
+from ..batch import load_batch, bulk_insert, delete_logs, parse_delete_selector, MAX_BATCH_SIZE
 from marshmallow import ValidationError
 from .routes_auth import login_required
+from ..replicas import read_replica
+from ..history import parse_history_args, fetch_history
 
 # Initialize routes related to fitness logs
 def init_fitness_routes(app):
@@ -14,7 +22,7 @@ def init_fitness_routes(app):
     def add_fitness():
         try:
             # Fetch the currently logged-in user
-            user = User.query.filter_by(username=session['username']).first()
+            user = g.user
             if not user:
                 # Log error if the user is not found in the session
                 current_app.logger.error({
@@ -28,34 +36,28 @@ def init_fitness_routes(app):
             # Load incoming JSON data from request
             incoming_data = request.get_json()
 
-            # Prepare data for the schema load
+            # Prepare data for validation, ignoring any other keys
             data = {
-                'user_id': user.id,
                 'date': incoming_data.get('date'),
                 'exercise': incoming_data.get('exercise'),
                 'kcal_burned': incoming_data.get('kcal_burned')
             }
 
-            # Validate and deserialize the data using the schema
-            schema = FitnessLogSchema()
-            validated_data = schema.load(data, session=db.session)
+            # Validate and deserialize the data for the logged-in user
+            validated_data = load_log_entry(fitness_log_schema, data, user.id)
 
             # Create a new FitnessLog instance and store in the database
-            new_fitness_log = FitnessLog(
-                user_id=validated_data.user_id,
-                date=validated_data.date,
-                exercise=validated_data.exercise,
-                kcal_burned=validated_data.kcal_burned
-            )
+            new_fitness_log = FitnessLog(**validated_data)
             db.session.add(new_fitness_log)
+            apply_fitness_delta(new_fitness_log)
+            summary_cache.invalidate(user.id, validated_data['date'])
             db.session.commit()
 
             # Log success and return response
-            current_app.logger.info({
-                'event': 'add_fitness_success',
+            log_event(logging.INFO, 'add_fitness_success', lambda: {
                 'message': 'Exercise added successfully',
                 'username': session['username'],
-                'exercise': validated_data.exercise,
+                'exercise': validated_data['exercise'],
                 'ip': request.remote_addr
             })
             return jsonify({'message': 'Exercise added successfully!', 'id': new_fitness_log.id}), 201
@@ -78,12 +80,57 @@ def init_fitness_routes(app):
             })
             return jsonify({'error': 'An unexpected error occurred'}), 500
 
+    # Route to page through the user's fitness log history, newest first
+    @app.route('/api/fitness', methods=['GET'])
+    @read_replica
+    @login_required
+    def list_fitness():
+        username = session.get('username')
+        user = g.user
+        if not user:
+            current_app.logger.error({
+                'event': 'list_fitness_failed',
+                'message': 'User not found',
+                'username': username,
+                'ip': request.remote_addr
+            })
+            return jsonify({'error': 'User not found'}), 404
+
+        try:
+            limit, cursor, start, end = parse_history_args(request.args)
+        except ValueError as e:
+            current_app.logger.warning({
+                'event': 'list_fitness_failed',
+                'message': str(e),
+                'ip': request.remote_addr
+            })
+            return jsonify({'error': str(e)}), 400
+
+        try:
+            # Seek past the cursor instead of counting skipped rows
+            columns, rows, next_cursor = fetch_history('fitness', user.id, limit, cursor, start, end)
+            log_event(logging.INFO, 'list_fitness_success', lambda: {
+                'message': 'Fitness history page retrieved',
+                'username': username,
+                'rows': len(rows),
+                'ip': request.remote_addr
+            })
+            return jsonify({'columns': columns, 'rows': rows, 'next_cursor': next_cursor}), 200
+
+        except Exception as e:
+            current_app.logger.error({
+                'event': 'list_fitness_error',
+                'message': f"An error occurred: {str(e)}",
+                'ip': request.remote_addr
+            })
+            return jsonify({'error': 'An unexpected error occurred'}), 500
+
     # Route to handle deleting an existing fitness log
     @app.route('/api/fitness', methods=['DELETE'])
     @login_required
     def delete_fitness():
         username = session.get('username')
-        user = User.query.filter_by(username=username).first()
+        user = g.user
         if not user:
             # Log error if user is not found
             current_app.logger.error({
@@ -115,15 +162,9 @@ def init_fitness_routes(app):
                 })
                 return jsonify({'error': 'Fitness ID is required'}), 400
 
-            # Fetch the fitness log using the session
-            fitness_log = db.session.get(FitnessLog, fitness_id)
-
-            # Check log ownership and perform deletion if authorized
-            if fitness_log and fitness_log.user_id == user.id:
-                db.session.delete(fitness_log)
-                db.session.commit()
-                current_app.logger.info({
-                    'event': 'delete_fitness_success',
+            # Delete the log in one ownership-checked statement
+            if delete_logs(FitnessLog, user.id, ids=[fitness_id]):
+                log_event(logging.INFO, 'delete_fitness_success', lambda: {
                     'message': 'Exercise deleted successfully',
                     'username': session['username'],
                     'fitness_id': fitness_id,
@@ -148,4 +189,122 @@ def init_fitness_routes(app):
                 'message': f"An error occurred: {str(e)}",
                 'ip': request.remote_addr
             })
-            return jsonify({'error': 'An unexpected error occurred'}), 500
\ No newline at end of file
+            return jsonify({'error': 'An unexpected error occurred'}), 500
+
+    # Route to handle adding many fitness logs in one request and one transaction
+    @app.route('/api/fitness/batch', methods=['POST'])
+    @login_required
+    def add_fitness_batch():
+        username = session.get('username')
+        user = g.user
+        if not user:
+            current_app.logger.error({
+                'event': 'add_fitness_batch_failed',
+                'message': 'User not found',
+                'username': username,
+                'ip': request.remote_addr
+            })
+            return jsonify({'error': 'User not found'}), 404
+
+        entries = request.get_json(silent=True)
+        if not isinstance(entries, list) or not entries:
+            current_app.logger.warning({
+                'event': 'add_fitness_batch_failed',
+                'message': 'Expected a non-empty JSON array',
+                'ip': request.remote_addr
+            })
+            return jsonify({'error': 'Expected a non-empty JSON array of entries'}), 400
+
+        if len(entries) > MAX_BATCH_SIZE:
+            current_app.logger.warning({
+                'event': 'add_fitness_batch_failed',
+                'message': 'Batch too large',
+                'size': len(entries),
+                'ip': request.remote_addr
+            })
+            return jsonify({'error': f'A batch may contain at most {MAX_BATCH_SIZE} entries'}), 400
+
+        try:
+            # Validate every entry, collecting errors by position
+            rows, errors = load_batch(fitness_log_schema, entries, user.id)
+            if not rows:
+                current_app.logger.warning({
+                    'event': 'add_fitness_batch_validation_failed',
+                    'errors': errors,
+                    'ip': request.remote_addr
+                })
+                return jsonify({'errors': errors}), 400
+
+            # Insert the valid rows and their rollup deltas with a single commit
+            ids = bulk_insert(FitnessLog, rows)
+            deltas_by_day = sum_deltas(rows)
+            apply_deltas(user.id, deltas_by_day)
+            summary_cache.invalidate_days(user.id, deltas_by_day)
+            db.session.commit()
+
+            log_event(logging.INFO, 'add_fitness_batch_success', lambda: {
+                'message': 'Fitness batch added successfully',
+                'username': username,
+                'inserted': len(ids),
+                'rejected': len(errors),
+                'ip': request.remote_addr
+            })
+            return jsonify({'message': f'{len(ids)} fitness entries added successfully!', 'ids': ids, 'errors': errors}), 201
+
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error({
+                'event': 'add_fitness_batch_error',
+                'message': f"An error occurred: {str(e)}",
+                'ip': request.remote_addr
+            })
+            return jsonify({'error': 'An unexpected error occurred'}), 500
+
+    # Route to handle deleting many fitness logs, selected by ids or by date, in one statement
+    @app.route('/api/fitness/batch', methods=['DELETE'])
+    @login_required
+    def delete_fitness_batch():
+        username = session.get('username')
+        user = g.user
+        if not user:
+            current_app.logger.error({
+                'event': 'delete_fitness_batch_failed',
+                'message': 'User not found',
+                'username': username,
+                'ip': request.remote_addr
+            })
+            return jsonify({'error': 'User not found'}), 404
+
+        data = request.get_json(silent=True)
+        try:
+            ids, day = parse_delete_selector(data)
+        except ValueError as err:
+            current_app.logger.warning({
+                'event': 'delete_fitness_batch_failed',
+                'message': str(err),
+                'ip': request.remote_addr
+            })
+            return jsonify({'error': str(err)}), 400
+
+        try:
+            deleted_ids = delete_logs(FitnessLog, user.id, ids=ids, day=day)
+
+            log_event(logging.INFO, 'delete_fitness_batch_success', lambda: {
+                'message': 'Fitness batch deleted successfully',
+                'username': username,
+                'deleted': len(deleted_ids),
+                'ip': request.remote_addr
+            })
+            response = {'message': f'{len(deleted_ids)} fitness entries deleted successfully!', 'deleted_ids': deleted_ids}
+            if ids is not None:
+                response['not_found'] = sorted(set(ids) - set(deleted_ids))
+            return jsonify(response), 200
+
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error({
+                'event': 'delete_fitness_batch_error',
+                'message': f"An error occurred: {str(e)}",
+                'ip': request.remote_addr
+            })
+            return jsonify({'error': 'An unexpected error occurred'}), 500
@@ -1,8 +1,16 @@
 # app/routes/routes_food.py
-from flask import jsonify, request, session, current_app
-from ..models.models import User, FoodLog, FoodLogSchema
+from flask import jsonify, request, session, current_app, g
+from ..log_events import log_event
+import logging
+from ..models.models import FoodLog, food_log_schema
+from ..validation import load_log_entry
 from .. import db
+from ..cache import summary_cache
+from ..rollup import apply_food_delta, apply_deltas, sum_deltas
+from ..batch import load_batch, bulk_insert, delete_logs, parse_delete_selector, MAX_BATCH_SIZE
 from .routes_auth import login_required
+from ..replicas import read_replica
+from ..history import parse_history_args, fetch_history
 from marshmallow import ValidationError
 
 # Initialize routes related to food logs
@@ -13,7 +21,7 @@ def init_food_routes(app):
     @login_required
     def add_food():
         username = session.get('username')
-        user = User.query.filter_by(username=username).first()
+        user = g.user
         if not user:
             # Log error if the user is not found
             current_app.logger.error({
@@ -34,22 +42,19 @@ def init_food_routes(app):
             })
             return jsonify({'error': 'Invalid or missing JSON'}), 400
 
-        # Add user_id to data to associate it with the correct user
-        data = {'user_id': user.id, **incoming_data}
-
-        # Validate and deserialize the data
-        schema = FoodLogSchema()
         try:
-            # Load and validate the data using the schema
-            validated_food_log = schema.load(data, session=db.session)
+            # Validate the data and associate it with the logged-in user
+            validated_food_log = FoodLog(**load_log_entry(food_log_schema, incoming_data, user.id))
 
-            # Add the validated food log to the database and commit
+            # Add the validated food log and its rollup delta in one transaction
+            day = validated_food_log.date
             db.session.add(validated_food_log)
+            apply_food_delta(validated_food_log)
+            summary_cache.invalidate(user.id, day)
             db.session.commit()
 
             # Log success and return response
-            current_app.logger.info({
-                'event': 'add_food_success',
+            log_event(logging.INFO, 'add_food_success', lambda: {
                 'message': 'Food added successfully',
                 'username': username,
                 'food': validated_food_log.food,
@@ -75,12 +80,57 @@ def init_food_routes(app):
             })
             return jsonify({'error': 'An unexpected error occurred'}), 500
 
+    # Route to page through the user's food log history, newest first
+    @app.route('/api/food', methods=['GET'])
+    @read_replica
+    @login_required
+    def list_food():
+        username = session.get('username')
+        user = g.user
+        if not user:
+            current_app.logger.error({
+                'event': 'list_food_failed',
+                'message': 'User not found',
+                'username': username,
+                'ip': request.remote_addr
+            })
+            return jsonify({'error': 'User not found'}), 404
+
+        try:
+            limit, cursor, start, end = parse_history_args(request.args)
+        except ValueError as e:
+            current_app.logger.warning({
+                'event': 'list_food_failed',
+                'message': str(e),
+                'ip': request.remote_addr
+            })
+            return jsonify({'error': str(e)}), 400
+
+        try:
+            # Seek past the cursor instead of counting skipped rows
+            columns, rows, next_cursor = fetch_history('food', user.id, limit, cursor, start, end)
+            log_event(logging.INFO, 'list_food_success', lambda: {
+                'message': 'Food history page retrieved',
+                'username': username,
+                'rows': len(rows),
+                'ip': request.remote_addr
+            })
+            return jsonify({'columns': columns, 'rows': rows, 'next_cursor': next_cursor}), 200
+
+        except Exception as e:
+            current_app.logger.error({
+                'event': 'list_food_error',
+                'message': f"An error occurred: {str(e)}",
+                'ip': request.remote_addr
+            })
+            return jsonify({'error': 'An unexpected error occurred'}), 500
+
     # Route to handle deleting an existing food log
     @app.route('/api/food', methods=['DELETE'])
     @login_required
     def delete_food():
         username = session.get('username')
-        user = User.query.filter_by(username=username).first()
+        user = g.user
         if not user:
             # Log error if user is not found
             current_app.logger.error({
@@ -112,15 +162,9 @@ def init_food_routes(app):
                 })
                 return jsonify({'error': 'Food ID is required'}), 400
 
-            # Fetch the food log using db.session.get()
-            food_log = db.session.get(FoodLog, food_id)
-
-            # Check log ownership and perform deletion if authorized
-            if food_log and food_log.user_id == user.id:
-                db.session.delete(food_log)
-                db.session.commit()
-                current_app.logger.info({
-                    'event': 'delete_food_success',
+            # Delete the log in one ownership-checked statement
+            if delete_logs(FoodLog, user.id, ids=[food_id]):
+                log_event(logging.INFO, 'delete_food_success', lambda: {
                     'message': 'Food deleted successfully',
                     'username': username,
                     'food_id': food_id,
@@ -145,4 +189,122 @@ def init_food_routes(app):
                 'message': f"An error occurred: {str(e)}",
                 'ip': request.remote_addr
             })
-            return jsonify({'error': 'An unexpected error occurred'}), 500
\ No newline at end of file
+            return jsonify({'error': 'An unexpected error occurred'}), 500
+
+    # Route to handle adding many food logs in one request and one transaction
+    @app.route('/api/food/batch', methods=['POST'])
+    @login_required
+    def add_food_batch():
+        username = session.get('username')
+        user = g.user
+        if not user:
+            current_app.logger.error({
+                'event': 'add_food_batch_failed',
+                'message': 'User not found',
+                'username': username,
+                'ip': request.remote_addr
+            })
+            return jsonify({'error': 'User not found'}), 404
+
+        entries = request.get_json(silent=True)
+        if not isinstance(entries, list) or not entries:
+            current_app.logger.warning({
+                'event': 'add_food_batch_failed',
+                'message': 'Expected a non-empty JSON array',
+                'ip': request.remote_addr
+            })
+            return jsonify({'error': 'Expected a non-empty JSON array of entries'}), 400
+
+        if len(entries) > MAX_BATCH_SIZE:
+            current_app.logger.warning({
+                'event': 'add_food_batch_failed',
+                'message': 'Batch too large',
+                'size': len(entries),
+                'ip': request.remote_addr
+            })
+            return jsonify({'error': f'A batch may contain at most {MAX_BATCH_SIZE} entries'}), 400
+
+        try:
+            # Validate every entry, collecting errors by position
+            rows, errors = load_batch(food_log_schema, entries, user.id)
+            if not rows:
+                current_app.logger.warning({
+                    'event': 'add_food_batch_validation_failed',
+                    'errors': errors,
+                    'ip': request.remote_addr
+                })
+                return jsonify({'errors': errors}), 400
+
+            # Insert the valid rows and their rollup deltas with a single commit
+            ids = bulk_insert(FoodLog, rows)
+            deltas_by_day = sum_deltas(rows)
+            apply_deltas(user.id, deltas_by_day)
+            summary_cache.invalidate_days(user.id, deltas_by_day)
+            db.session.commit()
+
+            log_event(logging.INFO, 'add_food_batch_success', lambda: {
+                'message': 'Food batch added successfully',
+                'username': username,
+                'inserted': len(ids),
+                'rejected': len(errors),
+                'ip': request.remote_addr
+            })
+            return jsonify({'message': f'{len(ids)} food entries added successfully!', 'ids': ids, 'errors': errors}), 201
+
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error({
+                'event': 'add_food_batch_error',
+                'message': f"An error occurred: {str(e)}",
+                'ip': request.remote_addr
+            })
+            return jsonify({'error': 'An unexpected error occurred'}), 500
+
+    # Route to handle deleting many food logs, selected by ids or by date, in one statement
+    @app.route('/api/food/batch', methods=['DELETE'])
+    @login_required
+    def delete_food_batch():
+        username = session.get('username')
+        user = g.user
+        if not user:
+            current_app.logger.error({
+                'event': 'delete_food_batch_failed',
+                'message': 'User not found',
+                'username': username,
+                'ip': request.remote_addr
+            })
+            return jsonify({'error': 'User not found'}), 404
+
+        data = request.get_json(silent=True)
+        try:
+            ids, day = parse_delete_selector(data)
+        except ValueError as err:
+            current_app.logger.warning({
+                'event': 'delete_food_batch_failed',
+                'message': str(err),
+                'ip': request.remote_addr
+            })
+            return jsonify({'error': str(err)}), 400
+
+        try:
+            deleted_ids = delete_logs(FoodLog, user.id, ids=ids, day=day)
+
+            log_event(logging.INFO, 'delete_food_batch_success', lambda: {
+                'message': 'Food batch deleted successfully',
+                'username': username,
+                'deleted': len(deleted_ids),
+                'ip': request.remote_addr
+            })
+            response = {'message': f'{len(deleted_ids)} food entries deleted successfully!', 'deleted_ids': deleted_ids}
+            if ids is not None:
+                response['not_found'] = sorted(set(ids) - set(deleted_ids))
+            return jsonify(response), 200
+
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error({
+                'event': 'delete_food_batch_error',
+                'message': f"An error occurred: {str(e)}",
+                'ip': request.remote_addr
+            })
+            return jsonify({'error': 'An unexpected error occurred'}), 500
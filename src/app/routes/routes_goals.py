@@ -1,7 +1,10 @@
 # app/routes/routes_goals.py
-from flask import request, jsonify, session, current_app
-from ..models.models import User, GoalsSchema
+from flask import request, jsonify, session, current_app, g
+from ..log_events import log_event
+import logging
+from ..models.models import User, goals_schema
 from .. import db
+from ..cache import summary_cache
 from marshmallow import ValidationError
 from .routes_auth import login_required
 
@@ -15,7 +18,6 @@ def init_goals_routes(app):
         try:
             # Attempt to get JSON data from the request
             data = request.get_json()
-            goals_schema = GoalsSchema()
             validated_data = goals_schema.load(data)
 
         except ValidationError as err:
@@ -29,8 +31,8 @@ def init_goals_routes(app):
             })
             return jsonify({'errors': err.messages}), 400
 
-        # Query the User model to find the currently logged-in user
-        user = User.query.filter_by(username=session['username']).first()
+        # Use the identity resolved by login_required
+        user = g.user
 
         # If no user is found, log an error and return a 404 response
         if not user:
@@ -42,18 +44,24 @@ def init_goals_routes(app):
             })
             return jsonify({'error': 'User not found'}), 404
 
-        # Update the user's goal data from the validated input
-        user.calorie_goal = validated_data['calorie_goal']
-        user.protein_goal = validated_data['protein_goal']
-        user.fat_goal = validated_data['fat_goal']
-        user.carbs_goal = validated_data['carbs_goal']
+        # Update the user's goal data from the validated input in a single statement
+        db.session.execute(
+            db.update(User).where(User.id == user.id).values(
+                calorie_goal=validated_data['calorie_goal'],
+                protein_goal=validated_data['protein_goal'],
+                fat_goal=validated_data['fat_goal'],
+                carbs_goal=validated_data['carbs_goal']
+            )
+        )
+
+        # Goals are part of every cached summary of this user; the version bump commits with the update
+        summary_cache.invalidate_user(user.id)
 
         # Commit the changes to the database
         db.session.commit()
 
         # Log a successful goal update
-        current_app.logger.info({
-            'event': 'update_goal',
+        log_event(logging.INFO, 'update_goal', lambda: {
             'message': 'User goals updated successfully',
             'username': session['username'],
             'ip': request.remote_addr
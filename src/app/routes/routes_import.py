@@ -0,0 +1,85 @@
+# app/routes/routes_import.py
+from flask import request, jsonify, session, current_app, g
+from ..log_events import log_event
+import logging
+from ..importer import import_logs, guess_format, IMPORT_FORMATS, IMPORT_KINDS
+from .routes_auth import login_required
+from .. import db
+import gzip
+import io
+
+def open_upload(binary, compressed):
+    """Wrap an uploaded byte stream into decoded text lines without reading it all."""
+    if compressed:
+        binary = gzip.GzipFile(fileobj=binary)
+    elif not isinstance(binary, io.BufferedIOBase):
+        binary = io.BufferedReader(binary)
+    return io.TextIOWrapper(binary, encoding='utf-8', newline='')
+
+# Initialize routes related to importing user data
+def init_import_routes(app):
+
+    # Route to stream a CSV or NDJSON file of food and/or fitness entries into the user's logs
+    @app.route('/api/import', methods=['POST'])
+    @login_required
+    def import_entries():
+        username = session.get('username')
+        user = g.user
+        if not user:
+            current_app.logger.error({
+                'event': 'import_failed',
+                'message': 'User not found',
+                'username': username,
+                'ip': request.remote_addr
+            })
+            return jsonify({'error': 'User not found'}), 404
+
+        # Accept a multipart upload in 'file' or the raw request body
+        upload = request.files.get('file')
+        filename = upload.filename if upload else None
+        binary = upload.stream if upload else request.stream
+        compressed = (
+            request.args.get('gzip', 'false').lower() in ('1', 'true')
+            or (filename or '').lower().endswith('.gz')
+            or request.content_encoding == 'gzip'
+        )
+        import_format = request.args.get('format') or guess_format(filename)
+        kind = request.args.get('kind')
+        if import_format not in IMPORT_FORMATS or (kind is not None and kind not in IMPORT_KINDS):
+            current_app.logger.warning({
+                'event': 'import_failed',
+                'message': 'Invalid import parameters',
+                'format': import_format,
+                'kind': kind,
+                'ip': request.remote_addr
+            })
+            return jsonify({'error': f"format must be one of {', '.join(IMPORT_FORMATS)} and kind one of food, fitness"}), 400
+
+        try:
+            result = import_logs(open_upload(binary, compressed), user.id, import_format, kind)
+        except (UnicodeDecodeError, OSError, EOFError) as e:
+            # Chunks committed before the bad input was reached are kept; the pending one is not
+            db.session.rollback()
+            current_app.logger.warning({
+                'event': 'import_failed',
+                'message': f"Unreadable upload: {str(e)}",
+                'ip': request.remote_addr
+            })
+            return jsonify({'error': 'The uploaded file could not be read as UTF-8 text'}), 400
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error({
+                'event': 'import_error',
+                'message': f"An error occurred: {str(e)}",
+                'ip': request.remote_addr
+            })
+            return jsonify({'error': 'An unexpected error occurred'}), 500
+
+        log_event(logging.INFO, 'import_success', lambda: {
+            'message': 'Log import finished',
+            'username': username,
+            'accepted': result['accepted'],
+            'rejected': result['rejected'],
+            'ip': request.remote_addr
+        })
+        return jsonify(result), 200
@@ -0,0 +1,22 @@
+# app/routes/routes_metrics.py
+from flask import request, current_app
+from ..metrics import metrics
+import hmac
+
+# Initialize the metrics scraping route
+def init_metrics_routes(app):
+
+    # Route to expose the metrics of every worker process in the Prometheus text format
+    @app.route('/metrics', methods=['GET'])
+    def metrics_endpoint():
+        # When METRICS_TOKEN is set, scrapers must send it as a bearer token
+        token = current_app.config.get('METRICS_TOKEN')
+        if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            current_app.logger.warning({
+                'event': 'metrics_access_denied',
+                'message': 'Metrics requested without a valid token',
+                'ip': request.remote_addr
+            })
+            return current_app.response_class('Unauthorized\n', status=401, mimetype='text/plain')
+
+        return current_app.response_class(metrics.render(), mimetype='text/plain; version=0.0.4')
@@ -1,7 +1,9 @@
 # app/routes/routes_navigation.py
-from flask import render_template, redirect, url_for, request, jsonify, session, current_app
-from ..models.models import User
+from flask import render_template, redirect, url_for, request, jsonify, session, current_app, g
+from ..log_events import log_event
+import logging
 from .routes_auth import login_required
+from ..replicas import read_replica
 
 # Initialize routes for navigation within the application
 def init_navigation_routes(app):
@@ -13,8 +15,7 @@ def init_navigation_routes(app):
              # Check if the user is logged in
             if 'username' in session:
                 # Log access to the route for logged-in users
-                current_app.logger.info({
-                    'event': 'route_access',
+                log_event(logging.INFO, 'route_access', lambda: {
                     'route': '/',
                     'username': session['username'],
                     'ip': request.remote_addr
@@ -40,8 +41,7 @@ def init_navigation_routes(app):
     def dashboard():
         try:
             # Log access to the route
-            current_app.logger.info({
-                'event': 'route_access',
+            log_event(logging.INFO, 'route_access', lambda: {
                 'route': '/dashboard',
                 'username': session.get('username', 'anonymous'),
                 'ip': request.remote_addr
@@ -58,12 +58,13 @@ def init_navigation_routes(app):
 
     # Route to manage and view user goals
     @app.route('/goals')
+    @read_replica
     @login_required
     def goals():
         try:
-            # Fetch the user from the database using the session's username
+            # Use the identity resolved by login_required
             username = session.get('username', 'unknown')
-            user = User.query.filter_by(username=username).first()
+            user = g.user
 
             if not user:
                 # Log and redirect if user is not found
@@ -76,8 +77,7 @@ def init_navigation_routes(app):
                 return redirect(url_for('login'))
 
             # Log access to the route
-            current_app.logger.info({
-                'event': 'route_access',
+            log_event(logging.INFO, 'route_access', lambda: {
                 'route': '/goals',
                 'username': username,
                 'ip': request.remote_addr
@@ -98,8 +98,7 @@ def init_navigation_routes(app):
     def food():
         try:
             # Log access to the route
-            current_app.logger.info({
-                'event': 'route_access',
+            log_event(logging.INFO, 'route_access', lambda: {
                 'route': '/foods',
                 'username': session.get('username', 'anonymous'),
                 'ip': request.remote_addr
@@ -120,8 +119,7 @@ def init_navigation_routes(app):
     def activities():
         try:
             # Log access to the route
-            current_app.logger.info({
-                'event': 'route_access',
+            log_event(logging.INFO, 'route_access', lambda: {
                 'route': '/activities',
                 'username': session.get('username', 'anonymous'),
                 'ip': request.remote_addr
@@ -142,8 +140,7 @@ def init_navigation_routes(app):
     def summary():
         try:
             # Log access to the route
-            current_app.logger.info({
-                'event': 'route_access',
+            log_event(logging.INFO, 'route_access', lambda: {
                 'route': '/summary',
                 'username': session.get('username', 'anonymous'),
                 'ip': request.remote_addr
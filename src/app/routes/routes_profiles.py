@@ -0,0 +1,36 @@
+# app/routes/routes_profiles.py
+from flask import request, jsonify, current_app, send_from_directory
+from ..profiling import profile_token_valid, list_profiles, cpu_summary, PROFILE_SUFFIXES
+import os
+
+# Initialize the routes serving on-demand request profiles
+def init_profile_routes(app):
+
+    def denied():
+        current_app.logger.warning({
+            'event': 'profile_access_denied',
+            'message': 'Profiles requested without a valid token',
+            'ip': request.remote_addr
+        })
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    # Route to list the stored profile artifacts
+    @app.route('/api/profiles', methods=['GET'])
+    def list_request_profiles():
+        if not profile_token_valid(current_app.config.get('PROFILE_TOKEN')):
+            return denied()
+        return jsonify({'profiles': list_profiles(current_app.config['PROFILE_DIR'])}), 200
+
+    # Route to download one profile artifact, or read a CPU profile as text with ?format=text
+    @app.route('/api/profiles/<name>', methods=['GET'])
+    def download_request_profile(name):
+        if not profile_token_valid(current_app.config.get('PROFILE_TOKEN')):
+            return denied()
+
+        directory = current_app.config['PROFILE_DIR']
+        if not name.endswith(tuple(PROFILE_SUFFIXES.values())) or not os.path.isfile(os.path.join(directory, os.path.basename(name))):
+            return jsonify({'error': 'Profile not found'}), 404
+
+        if request.args.get('format') == 'text' and name.endswith(PROFILE_SUFFIXES['cpu']):
+            return current_app.response_class(cpu_summary(os.path.join(directory, os.path.basename(name))), mimetype='text/plain')
+        return send_from_directory(directory, name, as_attachment=True)
@@ -1,29 +1,202 @@
 # app/routes/routes_summary.py
-from flask import jsonify, redirect, url_for, request, jsonify, session, current_app
+from flask import jsonify, request, jsonify, session, current_app, g
+from ..log_events import log_event
+import logging
 
-from ..models.models import User, FoodLog, FitnessLog
+from ..models.models import User, FoodLog, FitnessLog, DailyTotals, parse_date, DATE_FORMAT
 from .. import db
+from ..cache import summary_cache
 from .routes_auth import login_required
-from datetime import datetime
+from ..replicas import read_replica
+from ..archive import archived_items
+from datetime import datetime, timedelta
+from sqlalchemy import select, union_all, literal, null
+
+# Select the user's goals shaped like a summary row, so they can ride along in the same UNION ALL
+def goals_row(user_id, *leading):
+    return select(
+        *leading,
+        User.calorie_goal,
+        User.protein_goal,
+        User.fat_goal,
+        User.carbs_goal,
+        literal(0)
+    ).where(User.id == user_id)
+
+# Build a single UNION ALL statement returning the user's goals, the day's rollup row and every item row.
+# With sharding the goals live in the directory database and have to be fetched separately.
+def daily_summary_statement(user_id, day, include_goals=True):
+    # Totals come straight from the rollup maintained by the write paths
+    totals = select(
+        literal('total').label('kind'),
+        null().label('id'),
+        null().label('name'),
+        DailyTotals.calories.label('calories'),
+        DailyTotals.protein.label('protein'),
+        DailyTotals.fat.label('fat'),
+        DailyTotals.carbs.label('carbs'),
+        DailyTotals.kcal_burned.label('kcal_burned')
+    ).where(DailyTotals.user_id == user_id, DailyTotals.date == day)
+
+    food_items = select(
+        literal('food'),
+        FoodLog.id,
+        FoodLog.food,
+        FoodLog.calories,
+        FoodLog.protein,
+        FoodLog.fat,
+        FoodLog.carbs,
+        literal(0)
+    ).where(FoodLog.user_id == user_id, FoodLog.date == day)
+
+    fitness_items = select(
+        literal('fitness'),
+        FitnessLog.id,
+        FitnessLog.exercise,
+        literal(0),
+        literal(0),
+        literal(0),
+        literal(0),
+        FitnessLog.kcal_burned
+    ).where(FitnessLog.user_id == user_id, FitnessLog.date == day)
+
+    parts = [totals, food_items, fitness_items]
+    if include_goals:
+        parts.insert(1, goals_row(user_id, literal('goals'), null(), null()))
+
+    statement = union_all(*parts)
+    return statement.order_by(statement.selected_columns.kind, statement.selected_columns.id)
+
+# Shape a set of day totals into the summary payload fields
+def summary_totals(calories=0, protein=0, fat=0, carbs=0, kcal_burned=0):
+    return {
+        'total_calories_consumed': calories,
+        'total_calories_burned': kcal_burned,
+        'net_calories': calories - kcal_burned,
+        'total_protein': protein,
+        'total_fat': fat,
+        'total_carbs': carbs
+    }
+
+# Shape the goal columns of a goals row into the summary payload fields
+def summary_goals(calories, protein, fat, carbs):
+    return {
+        'calories_goal': calories,
+        'protein_goal': protein,
+        'fat_goal': fat,
+        'carbs_goal': carbs
+    }
+
+# Run the summary statement and split the plain result rows into goals, totals and item lists
+def fetch_daily_summary(user_id, day):
+    goals = None
+    totals = summary_totals()
+    food_log = []
+    fitness_log = []
+
+    include_goals = not current_app.config.get('SHARD_BINDS')
+    rows = db.session.execute(daily_summary_statement(user_id, day, include_goals)).all()
+    if not include_goals:
+        rows += db.session.execute(goals_row(user_id, literal('goals'), null(), null())).all()
+
+    for kind, item_id, name, calories, protein, fat, carbs, kcal_burned in rows:
+        if kind == 'goals':
+            goals = summary_goals(calories, protein, fat, carbs)
+        elif kind == 'total':
+            totals = summary_totals(calories, protein, fat, carbs, kcal_burned)
+        elif kind == 'food':
+            food_log.append({'id': item_id, 'food': name, 'calories': calories, 'protein': protein, 'fat': fat, 'carbs': carbs})
+        else:
+            fitness_log.append({'id': item_id, 'exercise': name, 'kcal_burned': kcal_burned})
+
+    # Items of old days may have been moved to cold storage; the rollup row still covers them
+    archived_food, archived_fitness = archived_items(user_id, day)
+    return goals, totals, archived_food + food_log, archived_fitness + fitness_log
+
+# Answer with the summary, or with 304 when the request's If-None-Match already names its ETag
+def summary_response(payload, etag):
+    if etag in request.if_none_match:
+        response = current_app.response_class(status=304)
+    else:
+        response = jsonify(payload)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+# Longest range a single /range-summary request may cover
+MAX_RANGE_DAYS = 366
+
+# Fetch the goals and the rollup rows for a date range with one index range scan, filling empty days with zeros
+def fetch_range_summary(user_id, start, end):
+    rollup = select(
+        literal('total').label('kind'),
+        DailyTotals.date.label('date'),
+        DailyTotals.calories.label('calories'),
+        DailyTotals.protein.label('protein'),
+        DailyTotals.fat.label('fat'),
+        DailyTotals.carbs.label('carbs'),
+        DailyTotals.kcal_burned.label('kcal_burned')
+    ).where(
+        DailyTotals.user_id == user_id,
+        DailyTotals.date >= start,
+        DailyTotals.date <= end
+    )
+    goals = goals_row(user_id, literal('goals'), null())
+    if current_app.config.get('SHARD_BINDS'):
+        rows = db.session.execute(rollup).all() + db.session.execute(goals).all()
+    else:
+        rows = db.session.execute(union_all(rollup, goals)).all()
+
+    goals = None
+    totals_by_day = {}
+    for kind, day, calories, protein, fat, carbs, kcal_burned in rows:
+        if kind == 'goals':
+            goals = summary_goals(calories, protein, fat, carbs)
+        else:
+            totals_by_day[day] = summary_totals(calories, protein, fat, carbs, kcal_burned)
+
+    if goals is None:
+        return None, []
+
+    days = []
+    for offset in range((end - start).days + 1):
+        day = start + timedelta(days=offset)
+        totals = totals_by_day.get(day) or summary_totals()
+        days.append({
+            'date': day.strftime(DATE_FORMAT),
+            **totals,
+            'calories_delta': totals['net_calories'] - goals['calories_goal'],
+            'protein_delta': totals['total_protein'] - goals['protein_goal'],
+            'fat_delta': totals['total_fat'] - goals['fat_goal'],
+            'carbs_delta': totals['total_carbs'] - goals['carbs_goal']
+        })
+    return goals, days
 
 # Initialize routes related to the daily summary feature
 def init_summary_routes(app):
 
     # Route to retrieve a daily summary of user activities and consumption
     @app.route('/daily-summary', methods=['GET'])
+    @read_replica
+    @login_required
     def daily_summary():
         try:
-            # Check if the user is logged in
+            # Use the identity resolved by login_required
             username = session.get('username')
-            if not username:
-                # Redirect to login if the user is not authenticated
-                return redirect(url_for('login'))
-            
-            # Retrieve the user from the database
-            user = User.query.filter_by(username=username).first()
+            user = g.user
             
             # Get the date from request parameters or default to today's date
-            date = request.args.get('date', datetime.today().strftime('%Y-%m-%d'))
+            date = request.args.get('date', datetime.today().strftime(DATE_FORMAT))
+            try:
+                day = parse_date(date)
+            except ValueError:
+                current_app.logger.warning({
+                    'event': 'daily_summary_failed',
+                    'message': 'Invalid date format',
+                    'date': date,
+                    'ip': request.remote_addr
+                })
+                return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD.'}), 400
 
             if not user:
                 # Log an error if the user object is not found (unexpected state)
@@ -35,43 +208,43 @@ def init_summary_routes(app):
                 })
                 return jsonify({'error': 'User not found'}), 404
 
-            # Query for food and fitness logs for the given date
-            food_log = FoodLog.query.filter_by(user_id=user.id, date=date).all()
-            fitness_log = FitnessLog.query.filter_by(user_id=user.id, date=date).all()
+            # Serve unchanged days from the cache, answering revalidations with 304
+            version = summary_cache.version(user.id)
+            cached = summary_cache.get(user.id, day, version)
+            if cached is not None:
+                return summary_response(*cached)
 
-            # Calculate summary statistics
-            total_calories_consumed = sum(item.calories for item in food_log)
-            total_calories_burned = sum(item.kcal_burned for item in fitness_log)
-            total_protein = sum(item.protein for item in food_log)
-            total_fat = sum(item.fat for item in food_log)
-            total_carbs = sum(item.carbs for item in food_log)
+            # Fetch goals, totals and log items for the given date in one round trip
+            goals, totals, food_log, fitness_log = fetch_daily_summary(user.id, day)
+            if goals is None:
+                current_app.logger.error({
+                    'event': 'daily_summary_failed',
+                    'message': 'User not found',
+                    'username': username,
+                    'ip': request.remote_addr
+                })
+                return jsonify({'error': 'User not found'}), 404
 
             # Log the successful retrieval of the summary
-            current_app.logger.info({
-                'event': 'daily_summary_success',
+            log_event(logging.INFO, 'daily_summary_success', lambda: {
                 'message': 'Daily summary retrieved successfully',
                 'username': username,
                 'date': date,
-                'total_calories_consumed': total_calories_consumed,
-                'total_calories_burned': total_calories_burned,
+                'total_calories_consumed': totals['total_calories_consumed'],
+                'total_calories_burned': totals['total_calories_burned'],
                 'ip': request.remote_addr
             })
 
-            # Return the summary data as JSON
-            return jsonify({
-                'calories_goal': user.calorie_goal,
-                'protein_goal': user.protein_goal,
-                'fat_goal': user.fat_goal,
-                'carbs_goal': user.carbs_goal,
-                'total_calories_consumed': total_calories_consumed,
-                'total_calories_burned': total_calories_burned,
-                'net_calories': total_calories_consumed - total_calories_burned,
-                'total_protein': total_protein,
-                'total_fat': total_fat,
-                'total_carbs': total_carbs,
-                'food_log': [{'id': item.id, 'food': item.food, 'calories': item.calories, 'protein': item.protein, 'fat': item.fat, 'carbs': item.carbs} for item in food_log],
-                'fitness_log': [{'id': item.id, 'exercise': item.exercise, 'kcal_burned': item.kcal_burned} for item in fitness_log]
-            })
+            payload = {
+                **goals,
+                **totals,
+                'food_log': food_log,
+                'fitness_log': fitness_log
+            }
+            etag = summary_cache.set(user.id, day, payload, version)
+
+            # Return the summary data as JSON, or 304 if the client already holds this version of it
+            return summary_response(payload, etag)
 
         except Exception as e:
             # Log any exceptions and return a generic error message
@@ -81,4 +254,79 @@ def init_summary_routes(app):
                 'username': session.get('username', 'unknown'),
                 'ip': request.remote_addr
             })
-            return jsonify({'error': 'An unexpected error occurred'}), 500
\ No newline at end of file
+            return jsonify({'error': 'An unexpected error occurred'}), 500
+
+    # Route to retrieve per-day totals for a whole date range in one request
+    @app.route('/range-summary', methods=['GET'])
+    @read_replica
+    @login_required
+    def range_summary():
+        try:
+            username = session.get('username')
+            user = g.user
+            if not user:
+                current_app.logger.error({
+                    'event': 'range_summary_failed',
+                    'message': 'User not found',
+                    'username': username,
+                    'ip': request.remote_addr
+                })
+                return jsonify({'error': 'User not found'}), 404
+
+            # Both ends of the range are required and inclusive
+            try:
+                start = parse_date(request.args.get('start', ''))
+                end = parse_date(request.args.get('end', ''))
+            except ValueError:
+                current_app.logger.warning({
+                    'event': 'range_summary_failed',
+                    'message': 'Invalid or missing date range',
+                    'start': request.args.get('start'),
+                    'end': request.args.get('end'),
+                    'ip': request.remote_addr
+                })
+                return jsonify({'error': 'start and end are required. Use YYYY-MM-DD.'}), 400
+
+            if end < start or (end - start).days >= MAX_RANGE_DAYS:
+                current_app.logger.warning({
+                    'event': 'range_summary_failed',
+                    'message': 'Date range out of bounds',
+                    'start': start.strftime(DATE_FORMAT),
+                    'end': end.strftime(DATE_FORMAT),
+                    'ip': request.remote_addr
+                })
+                return jsonify({'error': f'end must not be before start and the range may cover at most {MAX_RANGE_DAYS} days.'}), 400
+
+            goals, days = fetch_range_summary(user.id, start, end)
+            if goals is None:
+                current_app.logger.error({
+                    'event': 'range_summary_failed',
+                    'message': 'User not found',
+                    'username': username,
+                    'ip': request.remote_addr
+                })
+                return jsonify({'error': 'User not found'}), 404
+
+            log_event(logging.INFO, 'range_summary_success', lambda: {
+                'message': 'Range summary retrieved successfully',
+                'username': username,
+                'start': start.strftime(DATE_FORMAT),
+                'end': end.strftime(DATE_FORMAT),
+                'ip': request.remote_addr
+            })
+
+            return jsonify({
+                'start': start.strftime(DATE_FORMAT),
+                'end': end.strftime(DATE_FORMAT),
+                **goals,
+                'days': days
+            })
+
+        except Exception as e:
+            current_app.logger.error({
+                'event': 'range_summary_error',
+                'message': f"An error occurred: {str(e)}",
+                'username': session.get('username', 'unknown'),
+                'ip': request.remote_addr
+            })
+            return jsonify({'error': 'An unexpected error occurred'}), 500
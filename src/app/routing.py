@@ -0,0 +1,53 @@
+# app/routing.py
+from flask import current_app, g, has_app_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import Table, event, inspect
+from sqlalchemy.exc import UnboundExecutionError
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.sql.util import find_tables
+
+def is_sharded(table):
+    """Tables marked with info={'sharded': True} live on the owning user's shard."""
+    return isinstance(table, Table) and table.info.get('sharded', False)
+
+def touches_shards(mapper, clause):
+    """Whether an ORM operation or statement reads or writes a sharded table."""
+    if mapper is not None and is_sharded(inspect(mapper).local_table):
+        return True
+    if clause is None:
+        return False
+    return any(is_sharded(table) for table in find_tables(clause, check_columns=True, include_crud=True))
+
+class RoutingSession(Session):
+    """Session that picks the engine for every statement.
+
+    - Statements on sharded tables go to the shard selected for the request
+      (g.shard, see app.shards).
+    - Reads of the default bind inside a @read_replica handler go to the
+      replica picked for the request (g.read_replica). Flushes and
+      INSERT/UPDATE/DELETE statements always go to the primary.
+    - Everything else uses the bind of the model's metadata, as usual.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        if bind is not None or not has_app_context():
+            return engine
+
+        if current_app.config.get('SHARD_BINDS') and touches_shards(mapper, clause):
+            shard = g.get('shard')
+            if shard is None:
+                raise UnboundExecutionError('Sharded tables need a shard; wrap the work in using_shard().')
+            return self._db.engines[shard]
+
+        replica = g.get('read_replica')
+        if replica is None or self._flushing or isinstance(clause, UpdateBase):
+            return engine
+        if engine is not self._db.engines.get(None):
+            return engine
+        return self._db.engines[replica]
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def expose_statement(orm_execute_state):
+    # ORM statements only hand their leading entity to get_bind; let it see every table involved
+    orm_execute_state.bind_arguments.setdefault('clause', orm_execute_state.statement)
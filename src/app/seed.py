@@ -0,0 +1,174 @@
+# app/seed.py
+from datetime import date, timedelta
+from itertools import accumulate, repeat
+from sqlalchemy import insert, select
+from werkzeug.security import generate_password_hash
+from .models.models import User, FoodLog, FitnessLog
+from .rollup import rebuild_daily_totals
+from .shards import shard_for, using_shard
+from . import db
+import csv
+import io
+import random
+import time
+
+# Rows written per INSERT or COPY
+SEED_BATCH_SIZE = 50000
+
+# Foods with the calories, protein, fat and carbs of one serving
+FOODS = (
+    ('Oatmeal', 150, 5, 3, 27), ('Banana', 105, 1, 0, 27), ('Apple', 95, 0, 0, 25),
+    ('Greek yogurt', 130, 12, 4, 9), ('Scrambled eggs', 200, 13, 15, 2), ('Whole wheat toast', 80, 4, 1, 14),
+    ('Chicken breast', 165, 31, 4, 0), ('Brown rice', 215, 5, 2, 45), ('Salmon', 230, 25, 14, 0),
+    ('Pasta', 220, 8, 1, 43), ('Mixed salad', 50, 2, 0, 10), ('Beef burger', 350, 20, 25, 10),
+    ('Pizza slice', 285, 12, 10, 36), ('Almonds', 165, 6, 14, 6), ('Protein shake', 120, 24, 1, 3),
+    ('Lentil soup', 180, 12, 3, 28), ('Avocado', 240, 3, 22, 13), ('Dark chocolate', 170, 2, 12, 13)
+)
+
+# How often each food is eaten, relative to the others
+FOOD_WEIGHTS = (9, 8, 8, 6, 6, 7, 7, 5, 3, 4, 5, 2, 2, 4, 3, 2, 2, 3)
+FOOD_CUM_WEIGHTS = list(accumulate(FOOD_WEIGHTS))
+
+# Exercises with the calories burned per session, before the duration factor
+EXERCISES = (('Walking', 200), ('Running', 450), ('Cycling', 400), ('Swimming', 420), ('Weights', 250), ('Yoga', 180))
+EXERCISE_WEIGHTS = (6, 4, 3, 1, 4, 2)
+EXERCISE_CUM_WEIGHTS = list(accumulate(EXERCISE_WEIGHTS))
+
+# Serving and session multipliers
+PORTIONS = (0.5, 1, 1, 1, 1.5, 2)
+DURATIONS = (0.5, 0.75, 1, 1, 1.25, 1.5, 2)
+
+FOOD_COLUMNS = ('user_id', 'date', 'food', 'calories', 'protein', 'fat', 'carbs')
+FITNESS_COLUMNS = ('user_id', 'date', 'exercise', 'kcal_burned')
+
+def user_rows(rng, user_id, first_day, days, food_per_day, workouts_per_day):
+    """Generate the food and fitness rows of one user as tuples in FOOD_COLUMNS / FITNESS_COLUMNS order.
+
+    The number of entries per day and every food, portion, exercise and
+    duration are drawn in one call per attribute for the whole history,
+    instead of one call per row.
+    """
+    dates = [first_day + timedelta(days=offset) for offset in range(days)]
+
+    food_counts = rng.choices(range(food_per_day[0], food_per_day[1] + 1), k=days)
+    food_dates = [day for day, count in zip(dates, food_counts) for _ in repeat(None, count)]
+    foods = rng.choices(FOODS, cum_weights=FOOD_CUM_WEIGHTS, k=len(food_dates))
+    portions = rng.choices(PORTIONS, k=len(food_dates))
+    food = [
+        (user_id, day, name, round(calories * portion), round(protein * portion), round(fat * portion), round(carbs * portion))
+        for day, (name, calories, protein, fat, carbs), portion in zip(food_dates, foods, portions)
+    ]
+
+    workout_counts = rng.choices(range(workouts_per_day[0], workouts_per_day[1] + 1), k=days)
+    workout_dates = [day for day, count in zip(dates, workout_counts) for _ in repeat(None, count)]
+    exercises = rng.choices(EXERCISES, cum_weights=EXERCISE_CUM_WEIGHTS, k=len(workout_dates))
+    durations = rng.choices(DURATIONS, k=len(workout_dates))
+    fitness = [
+        (user_id, day, name, round(kcal * duration))
+        for day, (name, kcal), duration in zip(workout_dates, exercises, durations)
+    ]
+    return food, fitness
+
+def copy_rows(engine, table, columns, rows):
+    # COPY ... FROM STDIN is the fastest way into Postgres; it needs psycopg2's copy_expert
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    connection = engine.raw_connection()
+    try:
+        with connection.cursor() as cursor:
+            cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+        connection.commit()
+    finally:
+        connection.close()
+
+def insert_rows(connection, table, columns, rows):
+    # A raw executemany of tuples skips the per-row dict handling of ORM bulk inserts
+    dialect = connection.dialect
+    placeholder = {'qmark': '?', 'numeric': None, 'named': None}.get(dialect.paramstyle, '%s')
+    if placeholder is None:
+        connection.execute(insert(table), [dict(zip(columns, row)) for row in rows])
+        return
+    if dialect.name == 'sqlite':
+        # SQLite stores DATE columns as ISO strings
+        rows = [(row[0], row[1].isoformat(), *row[2:]) for row in rows]
+    connection.exec_driver_sql(
+        f"INSERT INTO {table.name} ({', '.join(columns)}) VALUES ({', '.join([placeholder] * len(columns))})",
+        rows
+    )
+
+def write_rows(model, columns, rows):
+    """Bulk-write tuples into a log table of the current shard, with COPY on psycopg2 and executemany elsewhere."""
+    if not rows:
+        return 0
+    connection = db.session.connection(bind_arguments={'mapper': model})
+    if connection.dialect.name == 'postgresql' and connection.dialect.driver == 'psycopg2':
+        copy_rows(connection.engine, model.__tablename__, columns, rows)
+    else:
+        insert_rows(connection, model.__table__, columns, rows)
+        db.session.commit()
+    return len(rows)
+
+def seed_database(users, days, seed=0, end=None, prefix='user', passwords=('password',),
+                  food_per_day=(3, 10), workouts_per_day=(0, 3), batch_size=SEED_BATCH_SIZE, rollup=True):
+    """Create users <prefix>_0..<prefix>_<users-1>, each with days of food and fitness logs ending at end.
+
+    User n logs in with passwords[n % len(passwords)]; each distinct password
+    is hashed once. A user's rows depend only on the seed and the user's
+    number, so the same arguments always produce the same data. Rows go to
+    the user's shard in batches of batch_size and the daily_totals rollup is
+    rebuilt at the end. Returns the row counts and the elapsed seconds.
+    """
+    started = time.perf_counter()
+    end = end or date.today()
+    first_day = end - timedelta(days=days - 1)
+
+    pattern = f'{prefix}\\_%'
+    taken = db.session.execute(select(User.username).where(User.username.like(pattern, escape='\\')).limit(1)).scalar()
+    if taken:
+        raise ValueError(f"User {taken} already exists; pick another prefix.")
+    usernames = [f'{prefix}_{number}' for number in range(users)]
+
+    hashes = {password: generate_password_hash(password) for password in passwords}
+    goals_rng = random.Random(f'{seed}:goals')
+    for offset in range(0, users, batch_size):
+        db.session.execute(insert(User), [
+            {
+                'username': usernames[number],
+                'password_hash': hashes[passwords[number % len(passwords)]],
+                'calorie_goal': goals_rng.randrange(1600, 3200, 50),
+                'protein_goal': goals_rng.randrange(80, 220, 5),
+                'fat_goal': goals_rng.randrange(50, 110, 5),
+                'carbs_goal': goals_rng.randrange(150, 350, 5)
+            }
+            for number in range(offset, min(offset + batch_size, users))
+        ])
+    db.session.commit()
+
+    ids = dict(db.session.execute(select(User.username, User.id).where(User.username.like(pattern, escape='\\'))).all())
+    by_shard = {}
+    for number, username in enumerate(usernames):
+        user_id = ids[username]
+        by_shard.setdefault(shard_for(user_id), []).append((number, user_id))
+
+    counts = {'users': users, 'food': 0, 'fitness': 0}
+    for shard, owners in by_shard.items():
+        with using_shard(shard):
+            food, fitness = [], []
+            for number, user_id in owners:
+                rng = random.Random(f'{seed}:{number}')
+                user_food, user_fitness = user_rows(rng, user_id, first_day, days, food_per_day, workouts_per_day)
+                food.extend(user_food)
+                fitness.extend(user_fitness)
+                if len(food) >= batch_size:
+                    counts['food'] += write_rows(FoodLog, FOOD_COLUMNS, food)
+                    food = []
+                if len(fitness) >= batch_size:
+                    counts['fitness'] += write_rows(FitnessLog, FITNESS_COLUMNS, fitness)
+                    fitness = []
+            counts['food'] += write_rows(FoodLog, FOOD_COLUMNS, food)
+            counts['fitness'] += write_rows(FitnessLog, FITNESS_COLUMNS, fitness)
+
+    counts['daily_totals'] = rebuild_daily_totals() if rollup else 0
+    counts['seconds'] = round(time.perf_counter() - started, 3)
+    return counts
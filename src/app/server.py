@@ -0,0 +1,80 @@
+# app/server.py
+from gunicorn.app.base import BaseApplication
+import multiprocessing
+import os
+
+def server_options(**overrides):
+    """Build the gunicorn settings from the environment, with explicit overrides taking precedence."""
+    workers = int(os.environ.get('WEB_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+    threads = int(os.environ.get('WEB_THREADS', 2))
+    options = {
+        'bind': f"{os.environ.get('HOST', '0.0.0.0')}:{os.environ.get('PORT', 8000)}",
+        'workers': workers,
+        'threads': threads,
+        'worker_class': 'gthread' if threads > 1 else 'sync',
+        # Build the app once in the master so workers share its memory and start instantly
+        'preload_app': True,
+        'timeout': int(os.environ.get('WEB_TIMEOUT', 30)),
+        'graceful_timeout': int(os.environ.get('WEB_GRACEFUL_TIMEOUT', 30)),
+        'keepalive': int(os.environ.get('WEB_KEEPALIVE', 5)),
+        'max_requests': int(os.environ.get('WEB_MAX_REQUESTS', 0)),
+        'max_requests_jitter': int(os.environ.get('WEB_MAX_REQUESTS_JITTER', 0)),
+        'accesslog': None,
+        'post_fork': post_fork
+    }
+    options.update({key: value for key, value in overrides.items() if value is not None})
+    if overrides.get('threads') is not None and overrides.get('worker_class') is None:
+        options['worker_class'] = 'gthread' if options['threads'] > 1 else 'sync'
+    return options
+
+def post_fork(server, worker):
+    """Drop the database connections inherited from the master without closing them under its feet, then warm up fresh ones."""
+    from . import db
+    from .pool import warm_up
+    application = server.app.application
+    with application.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+    warm_up(application, db)
+
+class NutriNubeServer(BaseApplication):
+    """Pre-forking gunicorn server around an already created Flask app.
+
+    gunicorn handles graceful reload (SIGHUP), graceful shutdown (SIGTERM)
+    and worker scaling (SIGTTIN/SIGTTOU) on the master process.
+    """
+
+    def __init__(self, application, options=None):
+        self.application = application
+        self.options = options or {}
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            if key in self.cfg.settings and value is not None:
+                self.cfg.set(key, value)
+
+    def load(self):
+        return self.application
+
+def serve(application, **overrides):
+    """Run the app under pre-forked workers until the master is stopped."""
+    options = server_options(**overrides)
+    application.logger.info({
+        'event': 'server_start',
+        'message': 'Starting pre-forked server',
+        'bind': options['bind'],
+        'workers': options['workers'],
+        'threads': options['threads']
+    })
+    # Counters of a previous run must not be added to the new workers' ones
+    from .metrics import clear_metrics_dir
+    if application.config.get('METRICS_DIR'):
+        clear_metrics_dir(application.config['METRICS_DIR'])
+
+    # Workers open their own connections after fork; the master does not need the warmed-up ones
+    from . import db
+    with application.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+    NutriNubeServer(application, options).run()
@@ -0,0 +1,131 @@
+# app/sessions.py
+from datetime import datetime, timezone
+from flask.sessions import SessionInterface, SessionMixin
+from flask.json.tag import TaggedJSONSerializer
+from itsdangerous import Signer, BadSignature
+from werkzeug.datastructures import CallbackDict
+from sqlalchemy import delete, select
+from sqlalchemy.dialects import postgresql, sqlite
+from .models.models import ServerSession
+from . import db
+import random
+import secrets
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    """Session whose data lives in the server_session table; the cookie only carries its signed id."""
+
+    def __init__(self, initial=None, sid=None, new=False, expires_at=None):
+        def on_update(session):
+            session.modified = True
+            session.accessed = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.expires_at = expires_at
+        self.modified = False
+        self.accessed = False
+
+class DatabaseSessionInterface(SessionInterface):
+    """Store sessions in a database table so every worker and host shares them.
+
+    Rows are written when the session changes, or when less than half of
+    their lifetime is left, and expired rows are purged opportunistically on
+    writes (SESSION_CLEANUP_PROBABILITY) and by 'flask cleanup-sessions'.
+    """
+
+    serializer = TaggedJSONSerializer()
+    salt = 'nutrinube-session-id'
+
+    def _signer(self, app):
+        return Signer(app.secret_key, salt=self.salt)
+
+    def _new_session(self):
+        return ServerSideSession(sid=secrets.token_urlsafe(32), new=True)
+
+    def open_session(self, app, request):
+        cookie = request.cookies.get(self.get_cookie_name(app))
+        if not cookie:
+            return self._new_session()
+        try:
+            sid = self._signer(app).unsign(cookie).decode('utf-8')
+        except BadSignature:
+            return self._new_session()
+
+        # Read on a connection of its own, so the request's db.session holds no transaction on the session store
+        with session_engine().connect() as conn:
+            row = conn.execute(select(ServerSession.data, ServerSession.expires_at).where(ServerSession.id == sid)).first()
+        if row is None or as_utc(row.expires_at) <= datetime.now(timezone.utc):
+            return self._new_session()
+        return ServerSideSession(self.serializer.loads(row.data), sid=sid, expires_at=as_utc(row.expires_at))
+
+    def _upsert(self, conn, sid, data, expires_at):
+        values = {'id': sid, 'data': data, 'expires_at': expires_at}
+        insert = postgresql.insert if conn.dialect.name == 'postgresql' else sqlite.insert
+        statement = insert(ServerSession).values(**values)
+        conn.execute(statement.on_conflict_do_update(
+            index_elements=[ServerSession.id],
+            set_={'data': statement.excluded.data, 'expires_at': statement.excluded.expires_at}
+        ))
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if session.accessed:
+            response.vary.add('Cookie')
+
+        # An emptied session is removed from the store together with its cookie
+        if not session:
+            if session.modified and not session.new:
+                with session_engine().begin() as conn:
+                    conn.execute(delete(ServerSession).where(ServerSession.id == session.sid))
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        lifetime = app.permanent_session_lifetime
+        now = datetime.now(timezone.utc)
+        stale = session.expires_at is None or session.expires_at - now < lifetime / 2
+        if session.modified or stale:
+            # Its own transaction: committing db.session here would also commit whatever the view left pending
+            with session_engine().begin() as conn:
+                self._upsert(conn, session.sid, self.serializer.dumps(dict(session)), now + lifetime)
+                if random.random() < app.config.get('SESSION_CLEANUP_PROBABILITY', 0.01):
+                    delete_expired(conn)
+
+        if session.new or session.modified or self.should_set_cookie(app, session):
+            response.set_cookie(
+                name,
+                self._signer(app).sign(session.sid).decode('utf-8'),
+                expires=self.get_expiration_time(app, session),
+                httponly=self.get_cookie_httponly(app),
+                domain=domain,
+                path=path,
+                secure=self.get_cookie_secure(app),
+                samesite=self.get_cookie_samesite(app)
+            )
+
+def session_engine():
+    """Engine of the session store bind."""
+    return db.engines['sessions']
+
+def as_utc(value):
+    # SQLite hands back naive datetimes; every stored expiry is UTC
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+def delete_expired(conn):
+    return conn.execute(delete(ServerSession).where(ServerSession.expires_at <= datetime.now(timezone.utc))).rowcount
+
+def cleanup_expired_sessions():
+    """Delete expired server-side sessions and return how many were removed."""
+    with session_engine().begin() as conn:
+        return delete_expired(conn)
+
+def init_sessions(app):
+    """Select the session backend configured by SESSION_BACKEND ('cookie' or 'database')."""
+    backend = app.config.get('SESSION_BACKEND', 'cookie')
+    if backend == 'database':
+        app.session_interface = DatabaseSessionInterface()
+    elif backend != 'cookie':
+        raise ValueError(f"Unknown session backend: {backend}")
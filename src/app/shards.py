@@ -0,0 +1,127 @@
+# app/shards.py
+from flask import current_app, g
+from contextlib import contextmanager
+from sqlalchemy import MetaData, Table, Column, Index, select, insert, delete
+from .models.models import User, UserShard
+from .cache import summary_cache
+from .routing import is_sharded
+from . import db
+
+def shard_bind_keys(urls):
+    """Name one bind per comma-separated shard URL: shard_0, shard_1, ..."""
+    return {f'shard_{index}': url.strip() for index, url in enumerate(urls.split(',')) if url.strip()}
+
+def sharded_tables():
+    """The tables of the default metadata that are partitioned by user_id."""
+    return [table for table in db.metadatas[None].sorted_tables if is_sharded(table)]
+
+def shard_metadata():
+    """Copy the sharded tables without their foreign keys, which point into the directory database."""
+    metadata = MetaData()
+    for table in sharded_tables():
+        copy = Table(table.name, metadata, *(
+            Column(column.name, column.type, primary_key=column.primary_key, nullable=column.nullable)
+            for column in table.columns
+        ))
+        for index in table.indexes:
+            Index(index.name, *(copy.c[column.name] for column in index.columns))
+    return metadata
+
+def create_shard_tables():
+    """Create the sharded tables on every shard."""
+    metadata = shard_metadata()
+    for key in current_app.config.get('SHARD_BINDS', []):
+        metadata.create_all(db.engines[key])
+
+def default_shard(user_id):
+    """Shard a user lands on until pinned elsewhere; depends on the number of shards."""
+    shards = current_app.config['SHARD_BINDS']
+    return shards[user_id % len(shards)]
+
+def shard_for(user_id):
+    """Return the bind key of the shard holding the user's logs, or None when sharding is off."""
+    if not current_app.config.get('SHARD_BINDS'):
+        return None
+    shard = db.session.execute(select(UserShard.shard).where(UserShard.user_id == user_id)).scalar()
+    return shard or default_shard(user_id)
+
+@contextmanager
+def using_shard(shard):
+    """Route the sharded tables to the given shard within the block."""
+    previous = g.get('shard')
+    g.shard = shard
+    try:
+        yield shard
+    finally:
+        g.shard = previous
+
+def log_shards(user_id=None):
+    """Shards to visit for maintenance work: the user's shard, every shard, or [None] when sharding is off."""
+    if user_id is not None:
+        return [shard_for(user_id)]
+    return current_app.config.get('SHARD_BINDS') or [None]
+
+def pin_user_shards():
+    """Record the current shard of every unpinned user, so adding shards later does not move anyone."""
+    pinned = set(db.session.execute(select(UserShard.user_id)).scalars())
+    rows = [
+        {'user_id': user_id, 'shard': default_shard(user_id)}
+        for user_id in db.session.execute(select(User.id)).scalars()
+        if user_id not in pinned
+    ]
+    if rows:
+        db.session.execute(insert(UserShard), rows)
+    db.session.commit()
+    return len(rows)
+
+def move_user(user_id, target):
+    """Move all of a user's sharded rows to the target shard and repoint the directory.
+
+    Rows are copied first, the directory is switched next (remembering the
+    source in moving_from) and the source rows are deleted last, so an
+    interrupted move can simply be run again: a rerun either copies again or
+    finishes deleting from the recorded source. Log ids are reassigned by the
+    target shard. The user should not write while moving; requests resolve
+    the shard from the directory, so open sessions follow the move. Returns
+    the number of rows moved per table.
+    """
+    if target not in current_app.config.get('SHARD_BINDS', []):
+        raise ValueError(f"Unknown shard: {target}")
+    entry = db.session.get(UserShard, user_id)
+    if entry is not None and entry.moving_from is not None:
+        # An earlier move stopped before deleting its source rows; finish it first
+        finish_move(entry)
+    source = shard_for(user_id)
+    if source == target:
+        return {}
+
+    tables = sharded_tables()
+    moved = {}
+    with db.engines[source].connect() as conn:
+        rows = {
+            table: [dict(row._mapping) for row in conn.execute(select(table).where(table.c.user_id == user_id))]
+            for table in tables
+        }
+
+    with db.engines[target].begin() as conn:
+        for table in tables:
+            # Leftovers of an interrupted move are not visible yet and can be replaced
+            conn.execute(delete(table).where(table.c.user_id == user_id))
+            values = [{key: value for key, value in row.items() if key != 'id'} for row in rows[table]]
+            if values:
+                conn.execute(insert(table), values)
+            moved[table.name] = len(values)
+
+    entry = db.session.merge(UserShard(user_id=user_id, shard=target, moving_from=source))
+    summary_cache.invalidate_user(user_id)
+    db.session.commit()
+    finish_move(entry)
+    return moved
+
+def finish_move(entry):
+    """Delete the moved rows left on the source shard of a directory entry and clear its moving_from."""
+    with db.engines[entry.moving_from].begin() as conn:
+        for table in sharded_tables():
+            conn.execute(delete(table).where(table.c.user_id == entry.user_id))
+    entry.moving_from = None
+    db.session.commit()
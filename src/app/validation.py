@@ -0,0 +1,123 @@
+# app/validation.py
+from flask import current_app
+from marshmallow import ValidationError
+from .models.models import parse_date, INVALID_DATE_MESSAGE, food_log_schema, fitness_log_schema
+
+# Messages shared with the marshmallow fields the fast path mirrors
+MISSING_MESSAGE = 'Missing data for required field.'
+NULL_MESSAGE = 'Field may not be null.'
+INVALID_STRING_MESSAGE = 'Not a valid string.'
+INVALID_INTEGER_MESSAGE = 'Not a valid integer.'
+UNKNOWN_MESSAGE = 'Unknown field.'
+
+class LogPayloadValidator:
+    """Plain-Python validator for flat log payloads.
+
+    Mirrors the rules of the log schemas (required fields, YYYY-MM-DD dates,
+    non-negative integers, unknown fields) and produces the same error
+    messages, without going through marshmallow field dispatch.
+    """
+
+    def __init__(self, string_fields, integer_fields, non_empty=None):
+        self.string_fields = string_fields
+        self.integer_fields = integer_fields
+        self.non_empty = non_empty or {}
+        self.allowed = {'date', 'user_id', *string_fields, *integer_fields}
+
+    def _integer(self, value, negative_message):
+        # Same coercion as fields.Integer: numbers and numeric strings, but never booleans
+        if value is True or value is False:
+            raise ValueError(INVALID_INTEGER_MESSAGE)
+        try:
+            number = int(value)
+        except (TypeError, ValueError, OverflowError):
+            raise ValueError(INVALID_INTEGER_MESSAGE)
+        if number < 0:
+            raise ValueError(negative_message)
+        return number
+
+    def load(self, payload, user_id):
+        """Return the column dict for a payload, or raise ValidationError with per-field messages."""
+        if not isinstance(payload, dict):
+            raise ValidationError({'_schema': ['Invalid input type.']})
+
+        data = {'user_id': user_id}
+        errors = {}
+
+        value = payload.get('date')
+        if 'date' not in payload:
+            errors['date'] = [MISSING_MESSAGE]
+        elif value is None:
+            errors['date'] = [NULL_MESSAGE]
+        else:
+            try:
+                data['date'] = parse_date(value)
+            except (TypeError, ValueError):
+                errors['date'] = [INVALID_DATE_MESSAGE]
+
+        for name in self.string_fields:
+            value = payload.get(name)
+            if name not in payload:
+                errors[name] = [MISSING_MESSAGE]
+            elif value is None:
+                errors[name] = [NULL_MESSAGE]
+            elif not isinstance(value, str):
+                errors[name] = [INVALID_STRING_MESSAGE]
+            elif not value and name in self.non_empty:
+                errors[name] = [self.non_empty[name]]
+            else:
+                data[name] = value
+
+        for name, negative_message in self.integer_fields.items():
+            value = payload.get(name)
+            if name not in payload:
+                errors[name] = [MISSING_MESSAGE]
+            elif value is None:
+                errors[name] = [NULL_MESSAGE]
+            else:
+                try:
+                    data[name] = self._integer(value, negative_message)
+                except ValueError as err:
+                    errors[name] = [str(err)]
+
+        for name in payload:
+            if name not in self.allowed:
+                errors[name] = [UNKNOWN_MESSAGE]
+
+        if errors:
+            raise ValidationError(errors)
+        return data
+
+food_log_validator = LogPayloadValidator(
+    string_fields=('food',),
+    integer_fields={
+        'calories': 'Calories must not be negative.',
+        'protein': 'Protein must not be negative.',
+        'fat': 'Fat must not be negative.',
+        'carbs': 'Carbs must not be negative.'
+    }
+)
+
+fitness_log_validator = LogPayloadValidator(
+    string_fields=('exercise',),
+    integer_fields={'kcal_burned': 'Calories burned must be a non-negative integer.'},
+    non_empty={'exercise': 'Exercise name is required.'}
+)
+
+# Pair each log schema with its fast-path validator
+VALIDATORS = {
+    food_log_schema: food_log_validator,
+    fitness_log_schema: fitness_log_validator
+}
+
+def load_log_entry(schema, payload, user_id):
+    """Validate one log payload into a column dict owned by user_id.
+
+    Uses the plain-Python validator when FAST_LOG_VALIDATION is enabled and the
+    shared marshmallow schema otherwise. Raises ValidationError either way.
+    """
+    if current_app.config.get('FAST_LOG_VALIDATION'):
+        return VALIDATORS[schema].load(payload, user_id)
+    if not isinstance(payload, dict):
+        raise ValidationError({'_schema': ['Invalid input type.']})
+    return schema.load({**payload, 'user_id': user_id})
@@ -0,0 +1,136 @@
+# tests/test_archive.py
+import os
+from datetime import date
+import pytest
+from app import db
+from app import archive as app_archive
+from app.archive import archive_logs, archive_path, read_archive
+from app.models.models import FoodLog, FitnessLog, DailyTotals
+from app.rollup import rebuild_daily_totals
+
+@pytest.fixture
+def archive_dir(app, tmp_path):
+    """Keep archives of a test in its own directory."""
+    app.config['ARCHIVE_DIR'] = str(tmp_path)
+    return tmp_path
+
+def add_logs(client):
+    client.post('/api/food', json={'food': 'Old apple', 'calories': 95, 'protein': 1, 'fat': 0, 'carbs': 25, 'date': '2020-01-15'})
+    client.post('/api/fitness', json={'exercise': 'Old run', 'kcal_burned': 300, 'date': '2020-01-15'})
+    client.post('/api/food', json={'food': 'New apple', 'calories': 80, 'protein': 0, 'fat': 0, 'carbs': 20, 'date': date.today().isoformat()})
+
+def test_archive_moves_old_rows(client, login, archive_dir):
+    """Test that old rows move to a per-user monthly archive while recent rows stay."""
+    add_logs(client)
+
+    assert archive_logs(older_than=30) == {'food': 1, 'fitness': 1}
+    assert db.session.query(FoodLog).count() == 1
+    assert db.session.query(FitnessLog).count() == 0
+
+    path = archive_path(1, 2020, 1)
+    assert os.path.exists(path)
+    assert {entry['kind'] for entry in read_archive(path)} == {'food', 'fitness'}
+
+def test_archive_is_idempotent(client, login, archive_dir):
+    """Test that archiving again does not duplicate archived entries."""
+    add_logs(client)
+    archive_logs(older_than=30)
+    client.post('/api/food', json={'food': 'Late apple', 'calories': 10, 'protein': 0, 'fat': 0, 'carbs': 2, 'date': '2020-01-20'})
+    archive_logs(older_than=30)
+
+    assert len(read_archive(archive_path(1, 2020, 1))) == 3
+
+def test_archive_keeps_rows_inserted_during_run(client, login, archive_dir, monkeypatch):
+    """Test that a back-dated row inserted while archiving is left for the next run instead of being deleted."""
+    add_logs(client)
+    write = app_archive.write_archive
+    imported = []
+
+    def write_then_import(path, entries):
+        write(path, entries)
+        if not imported:
+            imported.append(True)
+            client.post('/api/food', json={'food': 'Late pear', 'calories': 50, 'protein': 0, 'fat': 0, 'carbs': 12, 'date': '2020-01-20'})
+    monkeypatch.setattr(app_archive, 'write_archive', write_then_import)
+
+    assert archive_logs(older_than=30) == {'food': 1, 'fitness': 1}
+    assert [row.food for row in db.session.query(FoodLog).order_by(FoodLog.id)] == ['New apple', 'Late pear']
+
+    monkeypatch.undo()
+    assert archive_logs(older_than=30) == {'food': 1, 'fitness': 0}
+    assert {entry.get('food') for entry in read_archive(archive_path(1, 2020, 1))} == {'Old apple', 'Late pear', None}
+
+def test_summary_reads_archived_items(client, login, archive_dir):
+    """Test that the daily summary transparently includes archived items and totals."""
+    add_logs(client)
+    archive_logs(older_than=30)
+
+    response = client.get('/daily-summary?date=2020-01-15')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert [item['food'] for item in data['food_log']] == ['Old apple']
+    assert [item['exercise'] for item in data['fitness_log']] == ['Old run']
+    assert data['total_calories_consumed'] == 95
+    assert data['total_calories_burned'] == 300
+
+def test_rebuild_keeps_archived_totals(client, login, archive_dir):
+    """Test that rebuilding the rollup counts archived entries."""
+    add_logs(client)
+    archive_logs(older_than=30)
+    rebuild_daily_totals()
+
+    totals = db.session.get(DailyTotals, (1, date(2020, 1, 15)))
+    assert totals.calories == 95
+    assert totals.kcal_burned == 300
+
+def test_history_includes_archived_rows(client, login, archive_dir):
+    """Test that the paginated history continues into archived rows."""
+    add_logs(client)
+    archive_logs(older_than=30)
+
+    first = client.get('/api/food?limit=1').get_json()
+    assert first['rows'][0][2] == 'New apple'
+    rest = client.get(f"/api/food?cursor={first['next_cursor']}").get_json()
+    assert [row[2] for row in rest['rows']] == ['Old apple']
+    assert rest['next_cursor'] is None
+
+def test_history_skips_archive_when_it_cannot_contribute(client, login, archive_dir, monkeypatch):
+    """Test that history pages only open archive files that can hold rows of the page."""
+    client.post('/api/food', json={'food': 'Old apple', 'calories': 95, 'protein': 1, 'fat': 0, 'carbs': 25, 'date': '2020-01-15'})
+    archive_logs(older_than=30)
+    for day in ('2024-01-01', '2024-01-02'):
+        client.post('/api/food', json={'food': 'Pear', 'calories': 50, 'protein': 0, 'fat': 0, 'carbs': 12, 'date': day})
+    client.post('/api/fitness', json={'exercise': 'Run', 'kcal_burned': 300, 'date': '2024-01-01'})
+
+    opened = []
+    monkeypatch.setattr('app.archive.read_archive', lambda path: opened.append(path) or [])
+
+    # The archive holds no fitness rows, and a full page of food rows is newer than anything archived
+    assert len(client.get('/api/fitness').get_json()['rows']) == 1
+    assert client.get('/api/food?limit=1').get_json()['next_cursor'] is not None
+    assert opened == []
+
+    client.get('/api/food?limit=5')
+    assert opened == [archive_path(1, 2020, 1)]
+
+def test_delete_archived_entries(client, login, archive_dir):
+    """Test that archived entries can be deleted by id or by date and leave the rollup."""
+    add_logs(client)
+    client.post('/api/food', json={'food': 'Old pear', 'calories': 50, 'protein': 0, 'fat': 0, 'carbs': 12, 'date': '2020-01-15'})
+    archive_logs(older_than=30)
+    old_apple = next(item['id'] for item in client.get('/daily-summary?date=2020-01-15').get_json()['food_log'] if item['food'] == 'Old apple')
+
+    assert client.delete('/api/food', json={'food_id': old_apple}).status_code == 200
+    data = client.get('/daily-summary?date=2020-01-15').get_json()
+    assert [item['food'] for item in data['food_log']] == ['Old pear']
+    assert data['total_calories_consumed'] == 50
+
+    response = client.delete('/api/fitness/batch', json={'date': '2020-01-15'})
+    assert response.get_json()['deleted_ids'] != []
+    assert client.get('/daily-summary?date=2020-01-15').get_json()['total_calories_burned'] == 0
+    assert {entry['food'] for entry in read_archive(archive_path(1, 2020, 1))} == {'Old pear'}
+
+    # Rebuilding from the logs and the archives agrees with the rollup kept by the deletes
+    rebuild_daily_totals()
+    totals = db.session.get(DailyTotals, (1, date(2020, 1, 15)))
+    assert (totals.calories, totals.kcal_burned) == (50, 0)
@@ -0,0 +1,66 @@
+# tests/test_bench_api.py
+import json
+import random
+from datetime import date
+import pytest
+from benchmarks.bench_api import percentile, compare_to_baseline, parse_args, scenario_request
+
+def scenario(**values):
+    result = {'requests': 100, 'errors': 0, 'rps': 100.0, 'p50_ms': 10.0, 'p95_ms': 20.0, 'p99_ms': 30.0, 'db_queries_per_request': 3.0}
+    result.update(values)
+    return result
+
+def test_percentile_nearest_rank():
+    """Test the nearest-rank percentile at the edges and in between."""
+    values = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
+    assert percentile(values, 0.5) == 5
+    assert percentile(values, 0.95) == 10
+    assert percentile(values, 0) == 1
+    assert percentile(values, 1) == 10
+    assert percentile([7], 0.99) == 7
+    assert percentile([], 0.5) is None
+
+def test_compare_to_baseline_within_tolerance():
+    """Test that changes inside the tolerance and scenarios missing from the baseline are not regressions."""
+    baseline = {'scenarios': {'food': scenario()}}
+    results = {'scenarios': {'food': scenario(rps=95.0, p95_ms=21.0), 'login': scenario(rps=1.0)}}
+    assert compare_to_baseline(results, baseline, 0.10) == []
+
+def test_compare_to_baseline_reports_regressions():
+    """Test that slower throughput and latency beyond the tolerance, and any extra statements or errors, are reported."""
+    baseline = {'scenarios': {'food': scenario()}}
+    results = {'scenarios': {'food': scenario(rps=80.0, p99_ms=40.0, db_queries_per_request=3.5, errors=1)}}
+    assert compare_to_baseline(results, baseline, 0.10) == [
+        'food: rps 80.0 < baseline 100.0',
+        'food: p99_ms 40.0 > baseline 30.0',
+        'food: db_queries_per_request 3.5 > baseline 3.0',
+        'food: errors 1 > baseline 0'
+    ]
+
+class RecordingClient:
+    """Stand-in for the HTTP client that records the requests of a scenario."""
+
+    def __init__(self):
+        self.requests = []
+
+    def request(self, method, path, body=None, headers=None):
+        self.requests.append((method, path, body))
+        return 201, None
+
+def test_food_and_fitness_scenarios_write():
+    """Test that the food and fitness scenarios post entries and the history scenarios read pages."""
+    client = RecordingClient()
+    for name in ('food', 'fitness', 'food_history', 'fitness_history'):
+        scenario_request(name, client, random.Random(0), 'bench_user_0', 'secret', 30, date(2024, 1, 31))
+
+    methods = [(method, path.split('?')[0]) for method, path, body in client.requests]
+    assert methods == [('POST', '/api/food'), ('POST', '/api/fitness'), ('GET', '/api/food'), ('GET', '/api/fitness')]
+    assert {'food', 'calories', 'date'} <= json.loads(client.requests[0][2]).keys()
+    assert {'exercise', 'kcal_burned', 'date'} <= json.loads(client.requests[1][2]).keys()
+
+def test_no_seed_requires_database_url(capsys):
+    """Test that --no-seed is rejected when the run would use a new temporary database."""
+    with pytest.raises(SystemExit):
+        parse_args(['--no-seed'])
+    assert '--no-seed requires --database-url' in capsys.readouterr().err
+    assert parse_args(['--no-seed', '--database-url', 'postgresql://localhost/bench']).no_seed
@@ -0,0 +1,78 @@
+# tests/test_cache.py
+from datetime import date
+from sqlalchemy import select
+from app import db
+from app.cache import SummaryCache, summary_cache
+from app.models.models import User
+from app.rollup import apply_delta
+
+def test_summary_cache_evicts_least_recently_used():
+    """Test that the cache stays within its bound and evicts the oldest entry."""
+    cache = SummaryCache(max_entries=2, ttl=60)
+    cache.set(1, date(2023, 10, 1), {'a': 1})
+    cache.set(1, date(2023, 10, 2), {'a': 2})
+    cache.get(1, date(2023, 10, 1))
+    cache.set(1, date(2023, 10, 3), {'a': 3})
+
+    assert cache.get(1, date(2023, 10, 2)) is None
+    assert cache.get(1, date(2023, 10, 1))[0] == {'a': 1}
+
+def test_summary_cache_expires_entries():
+    """Test that entries older than the TTL are not served."""
+    cache = SummaryCache(max_entries=2, ttl=-1)
+    cache.set(1, date(2023, 10, 1), {'a': 1})
+    assert cache.get(1, date(2023, 10, 1)) is None
+
+def test_summary_cache_invalidate_user():
+    """Test that invalidating a user only drops that user's entries."""
+    cache = SummaryCache()
+    cache.set(1, date(2023, 10, 1), {'a': 1})
+    cache.set(2, date(2023, 10, 1), {'a': 2})
+    cache.invalidate_user(1)
+    assert cache.get(1, date(2023, 10, 1)) is None
+    assert cache.get(2, date(2023, 10, 1)) is not None
+
+def test_summary_cache_checks_version():
+    """Test that an entry built from an older summary version is not served."""
+    cache = SummaryCache()
+    cache.set(1, date(2023, 10, 1), {'a': 1}, version=3)
+    assert cache.get(1, date(2023, 10, 1), version=3) is not None
+    assert cache.get(1, date(2023, 10, 1), version=4) is None
+
+def test_summary_cache_invalidated_by_other_worker(client, login):
+    """Test that a write recorded by another worker retires this worker's cached summary."""
+    response = client.get('/daily-summary?date=2023-10-04')
+    etag = response.headers['ETag']
+    assert response.get_json()['total_calories_burned'] == 0
+
+    # Another worker logs a workout: the rollup and the version change in the database, not this process' cache
+    user_id = db.session.execute(select(User.id).filter_by(username='testuser')).scalar()
+    apply_delta(user_id, date(2023, 10, 4), kcal_burned=120)
+    summary_cache.bump(user_id)
+    db.session.commit()
+
+    response = client.get('/daily-summary?date=2023-10-04', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_json()['total_calories_burned'] == 120
+
+def test_etag_revalidated_on_cache_miss(client, login):
+    """Test that an unchanged summary is answered with 304 even when it had to be rebuilt."""
+    etag = client.get('/daily-summary?date=2023-10-04').headers['ETag']
+
+    # Another worker, or an evicted entry: nothing cached here
+    summary_cache.invalidate_user(1)
+    db.session.commit()
+    response = client.get('/daily-summary?date=2023-10-04', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+
+def test_version_bump_rolls_back_with_the_write(client, login):
+    """Test that the version bump is part of the write's transaction instead of a commit of its own."""
+    before = summary_cache.version(1)
+    summary_cache.bump(1)
+    db.session.rollback()
+    assert summary_cache.version(1) == before
+
+    summary_cache.bump(1)
+    db.session.commit()
+    assert summary_cache.version(1) == before + 1
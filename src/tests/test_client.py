@@ -90,4 +90,21 @@ def test_logout_protected_access(client, login):
     client.post('/logout')
     response = client.get('/dashboard')
     assert response.status_code == 302
-    assert '/login' in response.headers['Location']
\ No newline at end of file
+    assert '/login' in response.headers['Location']
+
+def test_login_stores_user_id(client, login):
+    """Test that login stores the user id so protected routes need no user lookup."""
+    with client.session_transaction() as session:
+        assert session['username'] == 'testuser'
+        assert isinstance(session['user_id'], int)
+
+
+def test_legacy_session_resolves_user_id(client, login):
+    """Test that a session without user_id is upgraded on the next protected request."""
+    with client.session_transaction() as session:
+        user_id = session.pop('user_id')
+
+    response = client.get('/daily-summary?date=2023-10-01')
+    assert response.status_code == 200
+    with client.session_transaction() as session:
+        assert session['user_id'] == user_id
@@ -0,0 +1,72 @@
+# tests/test_commands.py
+from sqlalchemy import inspect, text
+from app import db
+from app.commands import migrate_log_dates
+
+def test_migrate_log_dates_normalizes_legacy_strings(app):
+    """Test that legacy string dates are rewritten and indexed."""
+    db.drop_all()
+    with db.engine.begin() as conn:
+        conn.execute(text('CREATE TABLE food_log (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, '
+                          'date VARCHAR(50) NOT NULL, food VARCHAR(100), calories INTEGER, '
+                          'protein INTEGER, fat INTEGER, carbs INTEGER)'))
+        conn.execute(text("INSERT INTO food_log (user_id, date, food) VALUES (1, '2023-1-5', 'Apple')"))
+    db.create_all()
+
+    converted = migrate_log_dates()
+
+    assert 'food_log' in converted
+    with db.engine.connect() as conn:
+        assert conn.execute(text('SELECT date FROM food_log')).scalar() == '2023-01-05'
+    index_names = {index['name'] for index in inspect(db.engine).get_indexes('food_log')}
+    assert 'ix_food_log_user_id_date' in index_names
+
+def test_rebuild_daily_totals_repairs_rollup(client, login):
+    """Test that the rebuild recomputes the rollup from the raw logs."""
+    from app.models.models import DailyTotals
+    from app.rollup import rebuild_daily_totals
+
+    client.post('/api/food', json={
+        'date': '2023-10-01', 'food': 'Rice', 'calories': 400, 'protein': 8, 'fat': 1, 'carbs': 90
+    })
+    client.post('/api/fitness', json={'date': '2023-10-01', 'exercise': 'Rowing', 'kcal_burned': 150})
+
+    # Corrupt the rollup and repair it
+    db.session.execute(text('UPDATE daily_totals SET calories = 0, kcal_burned = 0'))
+    db.session.commit()
+    assert rebuild_daily_totals() == 1
+
+    totals = db.session.query(DailyTotals).one()
+    assert (totals.calories, totals.carbs, totals.kcal_burned) == (400, 90, 150)
+
+def test_rebuild_daily_totals_cli(app):
+    """Test the rebuild command line entry point."""
+    result = app.test_cli_runner().invoke(args=['rebuild-daily-totals'])
+    assert result.exit_code == 0
+    assert 'Rebuilt 0 daily total rows' in result.output
+
+def test_rollup_backfilled_on_upgrade(monkeypatch, tmp_path):
+    """Test that a database with logs but no daily_totals table gets the rollup filled when the app starts."""
+    from app import create_app
+    from app.models.models import DailyTotals
+
+    monkeypatch.setenv('DATABASE_URL', f'sqlite:///{tmp_path}/upgrade.db')
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.app_context():
+        client = app.test_client()
+        client.post('/register', data={'username': 'olduser', 'password': 'password'})
+        client.post('/login', data={'username': 'olduser', 'password': 'password'})
+        client.post('/api/food', json={'date': '2023-10-01', 'food': 'Rice', 'calories': 400, 'protein': 8, 'fat': 1, 'carbs': 90})
+        client.post('/api/fitness', json={'date': '2023-10-01', 'exercise': 'Rowing', 'kcal_burned': 150})
+        # The database as it was before the rollup existed
+        DailyTotals.__table__.drop(db.engine)
+
+    upgraded = create_app()
+    with upgraded.app_context():
+        client = upgraded.test_client()
+        client.post('/login', data={'username': 'olduser', 'password': 'password'})
+        summary = client.get('/daily-summary?date=2023-10-01').get_json()
+        assert (summary['total_calories_consumed'], summary['total_calories_burned']) == (400, 150)
+        assert client.get('/range-summary?start=2023-10-01&end=2023-10-01').get_json()['days'][0]['total_calories_consumed'] == 400
+        db.drop_all()
@@ -0,0 +1,63 @@
+# tests/test_export.py
+import csv
+import gzip
+import io
+import json
+from app.archive import archive_logs
+from app.export import chunked
+
+def add_logs(client):
+    client.post('/api/food/batch', json=[
+        {'date': '2023-10-15', 'food': 'Oats', 'calories': 300, 'protein': 10, 'fat': 5, 'carbs': 50},
+        {'date': '2023-10-16', 'food': 'Milk', 'calories': 120, 'protein': 8, 'fat': 5, 'carbs': 12}
+    ])
+    client.post('/api/fitness', json={'date': '2023-10-15', 'exercise': 'Running', 'kcal_burned': 300})
+
+def test_export_ndjson(client, login):
+    """Test streaming every log entry as NDJSON."""
+    add_logs(client)
+    response = client.get('/api/export')
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    assert response.is_streamed
+
+    entries = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [(entry['kind'], entry.get('food') or entry.get('exercise')) for entry in entries] == [
+        ('food', 'Oats'), ('food', 'Milk'), ('fitness', 'Running')
+    ]
+    assert entries[0]['date'] == '2023-10-15'
+
+def test_export_csv_single_kind(client, login):
+    """Test exporting one kind of log as CSV."""
+    add_logs(client)
+    response = client.get('/api/export?format=csv&kind=fitness')
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert [(row['kind'], row['exercise'], row['kcal_burned']) for row in rows] == [('fitness', 'Running', '300')]
+    assert 'attachment' in response.headers['Content-Disposition']
+
+def test_export_gzip(client, login):
+    """Test that a gzip export decompresses to the plain export."""
+    add_logs(client)
+    plain = client.get('/api/export').get_data()
+    response = client.get('/api/export?gzip=true')
+    assert response.mimetype == 'application/gzip'
+    assert gzip.decompress(response.get_data()) == plain
+
+def test_export_includes_archived_entries(client, login, app, tmp_path):
+    """Test that archived entries are part of the export."""
+    app.config['ARCHIVE_DIR'] = str(tmp_path)
+    add_logs(client)
+    archive_logs(older_than=0)
+
+    lines = client.get('/api/export?kind=food').get_data(as_text=True).splitlines()
+    assert [json.loads(line)['food'] for line in lines] == ['Oats', 'Milk']
+
+def test_export_invalid_parameters(client, login):
+    """Test that unknown formats and kinds are rejected."""
+    assert client.get('/api/export?format=xml').status_code == 400
+    assert client.get('/api/export?kind=sleep').status_code == 400
+
+def test_chunked_groups_lines():
+    """Test that lines are grouped into chunks of about the requested size."""
+    chunks = list(chunked(['a' * 10] * 5, size=25))
+    assert chunks == [b'a' * 30, b'a' * 20]
@@ -83,4 +83,50 @@ def test_delete_fitness_unauthorized(client, login):
     })
 
     response = client.delete('/api/fitness', json={'fitness_id': fitness_id})
-    assert response.status_code == 404
\ No newline at end of file
+    assert response.status_code == 404
+
+def test_add_fitness_batch(client, login):
+    """Test adding several fitness logs in one request."""
+    response = client.post('/api/fitness/batch', json=[
+        {'date': '2023-10-15', 'exercise': 'Running', 'kcal_burned': 300},
+        {'date': '2023-10-16', 'exercise': 'Cycling', 'kcal_burned': 200},
+        {'date': '2023-10-16', 'exercise': 'Rowing', 'kcal_burned': -5}
+    ])
+    assert response.status_code == 201
+    data = response.get_json()
+    assert len(data['ids']) == 2
+    assert 'kcal_burned' in data['errors']['2']
+
+    summary = client.get('/daily-summary?date=2023-10-16').get_json()
+    assert summary['total_calories_burned'] == 200
+
+def test_delete_fitness_batch_other_user(client, login):
+    """Test that the bulk delete never removes another user's fitness logs."""
+    ids = client.post('/api/fitness/batch', json=[
+        {'date': '2023-10-15', 'exercise': 'Running', 'kcal_burned': 300}
+    ]).get_json()['ids']
+
+    client.post('/logout')
+    client.post('/register', data={'username': 'otheruser', 'password': 'password'})
+    client.post('/login', data={'username': 'otheruser', 'password': 'password'})
+
+    response = client.delete('/api/fitness/batch', json={'ids': ids})
+    assert response.status_code == 200
+    assert response.get_json()['deleted_ids'] == []
+
+
+def test_list_fitness_history(client, login):
+    """Test paging through the fitness history, including entries of the same day."""
+    client.post('/api/fitness/batch', json=[
+        {'date': '2023-10-15', 'exercise': 'Running', 'kcal_burned': 300},
+        {'date': '2023-10-15', 'exercise': 'Swimming', 'kcal_burned': 200},
+        {'date': '2023-10-14', 'exercise': 'Cycling', 'kcal_burned': 250}
+    ])
+
+    first = client.get('/api/fitness?limit=1').get_json()
+    assert first['columns'] == ['id', 'date', 'exercise', 'kcal_burned']
+    assert first['rows'][0][2] == 'Swimming'
+
+    rest = client.get(f"/api/fitness?limit=5&cursor={first['next_cursor']}").get_json()
+    assert [row[2] for row in rest['rows']] == ['Running', 'Cycling']
+    assert rest['next_cursor'] is None
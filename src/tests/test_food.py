@@ -101,4 +101,109 @@ def test_delete_food_unauthorized(client, login):
     })
 
     response = client.delete('/api/food', json={'food_id': food_id})
-    assert response.status_code == 404
\ No newline at end of file
+    assert response.status_code == 404
+
+def test_add_food_batch(client, login):
+    """Test adding several food logs in one request with a per-item error."""
+    response = client.post('/api/food/batch', json=[
+        {'date': '2023-10-15', 'food': 'Oats', 'calories': 300, 'protein': 10, 'fat': 5, 'carbs': 50},
+        {'date': '2023-10-15', 'food': 'Milk', 'calories': 120, 'protein': 8, 'fat': 5, 'carbs': 12},
+        {'date': 'yesterday', 'food': 'Toast', 'calories': 90, 'protein': 3, 'fat': 1, 'carbs': 15}
+    ])
+    assert response.status_code == 201
+    data = response.get_json()
+    assert len(data['ids']) == 2
+    assert list(data['errors']) == ['2']
+
+    summary = client.get('/daily-summary?date=2023-10-15').get_json()
+    assert summary['total_calories_consumed'] == 420
+    assert [item['id'] for item in summary['food_log']] == data['ids']
+
+
+def test_add_food_batch_all_invalid(client, login):
+    """Test that a batch without any valid entry is rejected."""
+    response = client.post('/api/food/batch', json=[{'food': 'Banana'}])
+    assert response.status_code == 400
+    assert b'date' in response.data
+
+
+def test_add_food_batch_not_a_list(client, login):
+    """Test that the batch endpoint requires a JSON array."""
+    response = client.post('/api/food/batch', json={'food': 'Banana'})
+    assert response.status_code == 400
+
+
+def test_delete_food_batch_by_ids(client, login):
+    """Test deleting several food logs by id, reporting ids that were not removed."""
+    ids = client.post('/api/food/batch', json=[
+        {'date': '2023-10-15', 'food': 'Oats', 'calories': 300, 'protein': 10, 'fat': 5, 'carbs': 50},
+        {'date': '2023-10-15', 'food': 'Milk', 'calories': 120, 'protein': 8, 'fat': 5, 'carbs': 12}
+    ]).get_json()['ids']
+
+    response = client.delete('/api/food/batch', json={'ids': [ids[0], 99999]})
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['deleted_ids'] == [ids[0]]
+    assert data['not_found'] == [99999]
+
+    summary = client.get('/daily-summary?date=2023-10-15').get_json()
+    assert summary['total_calories_consumed'] == 120
+
+
+def test_delete_food_batch_by_date(client, login):
+    """Test clearing a whole day of food logs."""
+    client.post('/api/food/batch', json=[
+        {'date': '2023-10-15', 'food': 'Oats', 'calories': 300, 'protein': 10, 'fat': 5, 'carbs': 50},
+        {'date': '2023-10-16', 'food': 'Milk', 'calories': 120, 'protein': 8, 'fat': 5, 'carbs': 12}
+    ])
+    response = client.delete('/api/food/batch', json={'date': '2023-10-15'})
+    assert response.status_code == 200
+    assert len(response.get_json()['deleted_ids']) == 1
+    assert client.get('/daily-summary?date=2023-10-15').get_json()['food_log'] == []
+    assert client.get('/daily-summary?date=2023-10-16').get_json()['total_calories_consumed'] == 120
+
+
+def test_delete_food_batch_invalid_selector(client, login):
+    """Test that the bulk delete requires exactly one valid selector."""
+    assert client.delete('/api/food/batch', json={}).status_code == 400
+    assert client.delete('/api/food/batch', json={'ids': [1], 'date': '2023-10-15'}).status_code == 400
+    assert client.delete('/api/food/batch', json={'ids': ['a']}).status_code == 400
+
+
+def test_list_food_pages_with_cursor(client, login):
+    """Test paging through the food history newest first with keyset cursors."""
+    client.post('/api/food/batch', json=[
+        {'date': f'2023-10-{day:02d}', 'food': f'Meal {day}', 'calories': day, 'protein': 0, 'fat': 0, 'carbs': 0}
+        for day in range(1, 6)
+    ])
+
+    response = client.get('/api/food?limit=2')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['columns'] == ['id', 'date', 'food', 'calories', 'protein', 'fat', 'carbs']
+    assert [row[1] for row in data['rows']] == ['2023-10-05', '2023-10-04']
+
+    seen = [row[2] for row in data['rows']]
+    while data['next_cursor']:
+        data = client.get(f"/api/food?limit=2&cursor={data['next_cursor']}").get_json()
+        seen += [row[2] for row in data['rows']]
+    assert seen == [f'Meal {day}' for day in range(5, 0, -1)]
+
+
+def test_list_food_date_filters(client, login):
+    """Test restricting the food history to a date range."""
+    client.post('/api/food/batch', json=[
+        {'date': f'2023-10-{day:02d}', 'food': f'Meal {day}', 'calories': day, 'protein': 0, 'fat': 0, 'carbs': 0}
+        for day in range(1, 6)
+    ])
+    data = client.get('/api/food?start=2023-10-02&end=2023-10-03').get_json()
+    assert [row[1] for row in data['rows']] == ['2023-10-03', '2023-10-02']
+    assert data['next_cursor'] is None
+
+
+def test_list_food_invalid_arguments(client, login):
+    """Test that bad page sizes, cursors and dates are rejected."""
+    assert client.get('/api/food?limit=0').status_code == 400
+    assert client.get('/api/food?limit=100000').status_code == 400
+    assert client.get('/api/food?cursor=not-a-cursor').status_code == 400
+    assert client.get('/api/food?start=15-10-2023').status_code == 400
@@ -58,4 +58,4 @@ def test_update_goals_invalid_values(client, login):
         'fat_goal': 70,
         'carbs_goal': 300
     })
-    assert response.status_code == 400
\ No newline at end of file
+    assert response.status_code == 400
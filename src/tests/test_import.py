@@ -0,0 +1,92 @@
+# tests/test_import.py
+import datetime
+import gzip
+import io
+import json
+from app import db
+from app.importer import import_logs
+from app.models.models import FoodLog, FitnessLog
+
+NDJSON = '\n'.join([
+    json.dumps({'kind': 'food', 'date': '2023-10-15', 'food': 'Oats', 'calories': 300, 'protein': 10, 'fat': 5, 'carbs': 50}),
+    json.dumps({'kind': 'fitness', 'date': '2023-10-15', 'exercise': 'Running', 'kcal_burned': 300}),
+    '{not json',
+    json.dumps({'kind': 'food', 'date': '15-10-2023', 'food': 'Milk', 'calories': 120, 'protein': 8, 'fat': 5, 'carbs': 12}),
+    json.dumps({'kind': 'sleep', 'date': '2023-10-15'})
+]) + '\n'
+
+CSV = (
+    'date,food,calories,protein,fat,carbs\n'
+    '2023-10-15,Oats,300,10,5,50\n'
+    '2023-10-16,Milk,-1,8,5,12\n'
+)
+
+def test_import_ndjson_upload(client, login):
+    """Test importing an NDJSON upload, reporting rejected rows by line number."""
+    response = client.post('/api/import', data={'file': (io.BytesIO(NDJSON.encode()), 'logs.ndjson')})
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['accepted'] == 2
+    assert data['rejected'] == 3
+    assert [error['line'] for error in data['errors']] == [3, 4, 5]
+    assert 'date' in data['errors'][1]['errors']
+
+    summary = client.get('/daily-summary?date=2023-10-15').get_json()
+    assert summary['total_calories_consumed'] == 300
+    assert summary['total_calories_burned'] == 300
+
+def test_import_csv_body_with_kind(client, login):
+    """Test importing a CSV request body for one log kind."""
+    response = client.post('/api/import?format=csv&kind=food', data=CSV.encode(), content_type='text/csv')
+    data = response.get_json()
+    assert data['accepted'] == 1
+    assert data['errors'] == [{'line': 3, 'errors': {'calories': ['Calories must not be negative.']}}]
+
+def test_import_gzip_upload(client, login):
+    """Test importing a gzip-compressed upload."""
+    upload = io.BytesIO(gzip.compress(NDJSON.encode()))
+    response = client.post('/api/import', data={'file': (upload, 'logs.ndjson.gz')})
+    assert response.get_json()['accepted'] == 2
+
+def test_import_round_trips_export(client, login):
+    """Test that an export can be imported again."""
+    client.post('/api/import', data={'file': (io.BytesIO(NDJSON.encode()), 'logs.ndjson')})
+    exported = client.get('/api/export?format=csv').get_data()
+
+    response = client.post('/api/import', data={'file': (io.BytesIO(exported), 'export.csv')})
+    assert response.get_json() == {'accepted': 2, 'rejected': 0, 'errors': []}
+    assert db.session.query(FoodLog).count() == 2
+    assert db.session.query(FitnessLog).count() == 2
+
+def test_import_commits_in_chunks(client, login):
+    """Test that rows are inserted chunk by chunk."""
+    lines = [json.dumps({'date': '2023-10-15', 'exercise': f'Set {i}', 'kcal_burned': 10}) for i in range(25)]
+    result = import_logs(lines, 1, kind='fitness', chunk_size=10)
+    assert result['accepted'] == 25
+    assert client.get('/daily-summary?date=2023-10-15').get_json()['total_calories_burned'] == 250
+
+def test_import_error_rolls_back_pending_rows(client, login, monkeypatch):
+    """Test that an unexpected import failure discards the uncommitted chunk."""
+    def failing_import(lines, user_id, import_format, kind):
+        db.session.add(FoodLog(user_id=user_id, date=datetime.date(2023, 10, 15), food='Oats', calories=300, protein=10, fat=5, carbs=50))
+        db.session.flush()
+        raise RuntimeError('database went away')
+    monkeypatch.setattr('app.routes.routes_import.import_logs', failing_import)
+
+    assert client.post('/api/import?format=ndjson', data=NDJSON).status_code == 500
+    db.session.commit()
+    assert db.session.query(FoodLog).count() == 0
+
+def test_import_invalid_parameters(client, login):
+    """Test that unknown formats and kinds are rejected."""
+    assert client.post('/api/import?format=xml', data=b'').status_code == 400
+    assert client.post('/api/import?kind=sleep', data=b'').status_code == 400
+
+def test_import_cli(app, client, login, tmp_path):
+    """Test the import command line entry point."""
+    path = tmp_path / 'logs.csv'
+    path.write_text(CSV)
+    result = app.test_cli_runner().invoke(args=['import-logs', str(path), '--username', 'testuser', '--kind', 'food'])
+    assert result.exit_code == 0
+    assert 'Accepted 1 rows, rejected 1' in result.output
+    assert 'line 3' in result.output
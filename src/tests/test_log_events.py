@@ -0,0 +1,23 @@
+# tests/test_log_events.py
+import logging
+from app.log_events import log_event, parse_sample_rates
+
+def test_parse_sample_rates():
+    """Test parsing and clamping of per-event sampling rates."""
+    assert parse_sample_rates('route_access=0.01, login_success=2') == {'route_access': 0.01, 'login_success': 1.0}
+    assert parse_sample_rates('') == {}
+
+def test_disabled_level_never_builds_payload(app):
+    """Test that payload callables are not invoked for disabled levels."""
+    def payload():
+        raise AssertionError('payload should not be built')
+
+    assert log_event(logging.DEBUG, 'request_received', payload) is False
+
+def test_sampling_drops_events(app):
+    """Test that a zero sampling rate suppresses an event without building it."""
+    app.config['LOG_SAMPLE_RATES'] = {'route_access': 0.0}
+    built = []
+    assert log_event(logging.INFO, 'route_access', lambda: built.append(1) or {}) is False
+    assert built == []
+    assert log_event(logging.INFO, 'login_success', {'message': 'kept'}) is True
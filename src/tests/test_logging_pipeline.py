@@ -0,0 +1,92 @@
+# tests/test_logging_pipeline.py
+import gc
+import logging
+from app import logging_pipeline
+from app.logging_pipeline import LogPipeline, BoundedQueueHandler
+
+class RecordingHandler(logging.Handler):
+    """Collect handled records and the batches they arrived in."""
+
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+
+    def emit_batch(self, records):
+        self.batches.append([record.msg for record in records])
+
+def _logger(pipeline):
+    logger = logging.getLogger('tests.logging_pipeline')
+    logger.handlers = [BoundedQueueHandler(pipeline)]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    return logger
+
+def test_pipeline_emits_structured_records_in_batches():
+    """Test that dict messages reach the handler unchanged and are counted as emitted."""
+    sink = RecordingHandler()
+    pipeline = LogPipeline([sink], maxsize=100, batch_size=10)
+    logger = _logger(pipeline)
+
+    for number in range(25):
+        logger.info({'event': 'test', 'number': number})
+    pipeline.start()
+    pipeline.stop()
+
+    received = [msg for batch in sink.batches for msg in batch]
+    assert received == [{'event': 'test', 'number': number} for number in range(25)]
+    assert all(len(batch) <= 10 for batch in sink.batches)
+    assert pipeline.stats() == {'emitted': 25, 'failed': 0, 'dropped': 0, 'queued': 0}
+
+def test_pipeline_drops_when_full():
+    """Test that the drop policy discards and counts records once the queue is full."""
+    sink = RecordingHandler()
+    pipeline = LogPipeline([sink], maxsize=3, policy='drop')
+    logger = _logger(pipeline)
+
+    for number in range(5):
+        logger.info({'event': 'test', 'number': number})
+
+    assert pipeline.stats()['dropped'] == 2
+    pipeline.start()
+    pipeline.stop()
+    assert pipeline.stats()['emitted'] == 3
+
+def test_pipeline_block_policy_times_out():
+    """Test that the block policy waits for room and then drops."""
+    pipeline = LogPipeline([], maxsize=1, policy='block', block_timeout=0.01)
+    logger = _logger(pipeline)
+
+    logger.info({'event': 'first'})
+    logger.info({'event': 'second'})
+    assert pipeline.stats()['dropped'] == 1
+
+class BrokenHandler(logging.Handler):
+    """Handler whose sink is down."""
+
+    def handle(self, record):
+        raise OSError('sink unavailable')
+
+def test_pipeline_counts_failed_records():
+    """Test that records a handler raised on are counted as failed, not emitted."""
+    pipeline = LogPipeline([BrokenHandler()], maxsize=10)
+    logger = _logger(pipeline)
+
+    for number in range(3):
+        logger.info({'event': 'test', 'number': number})
+    pipeline.start()
+    pipeline.stop()
+    assert pipeline.stats() == {'emitted': 0, 'failed': 3, 'dropped': 0, 'queued': 0}
+
+def test_pipelines_tracked_weakly_for_fork_and_exit():
+    """Test that only running pipelines are restarted after fork or stopped at exit, without holding them alive."""
+    pipeline = LogPipeline([RecordingHandler()])
+    assert pipeline not in logging_pipeline._live_pipelines
+    pipeline.start()
+    assert pipeline in logging_pipeline._live_pipelines
+    pipeline.stop()
+    assert pipeline not in logging_pipeline._live_pipelines
+
+    live = len(logging_pipeline._live_pipelines)
+    logging_pipeline._live_pipelines.add(LogPipeline([]))
+    gc.collect()
+    assert len(logging_pipeline._live_pipelines) == live
@@ -0,0 +1,59 @@
+# tests/test_metrics.py
+import json
+import os
+from app.metrics import MetricsRegistry, metrics
+
+def test_metrics_endpoint_reports_requests(client, login):
+    """Test that requests show up as counters, latency and database histograms."""
+    client.get('/daily-summary?date=2023-10-15')
+    body = client.get('/metrics').get_data(as_text=True)
+
+    assert '# TYPE nutrinube_http_requests_total counter' in body
+    assert 'nutrinube_http_requests_total{endpoint="/daily-summary",method="GET",status="200"} 1' in body
+    assert 'nutrinube_http_request_duration_seconds_bucket{endpoint="/daily-summary",method="GET",le="+Inf"} 1' in body
+    assert 'nutrinube_db_time_seconds_count{endpoint="/daily-summary"} 1' in body
+    assert 'nutrinube_db_queries_total{endpoint="/daily-summary"} 0' not in body
+    assert 'nutrinube_db_queries_total{endpoint="/daily-summary"}' in body
+    assert 'nutrinube_http_requests_in_flight 1' in body
+
+def test_metrics_unmatched_routes(client):
+    """Test that unknown URLs share one endpoint label."""
+    client.get('/no-such-page')
+    body = client.get('/metrics').get_data(as_text=True)
+    assert 'nutrinube_http_requests_total{endpoint="unmatched",method="GET",status="404"} 1' in body
+
+def test_metrics_token(app, client):
+    """Test that a configured token is required to scrape."""
+    app.config['METRICS_TOKEN'] = 'secret'
+    assert client.get('/metrics').status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer secret'}).status_code == 200
+
+def test_metrics_aggregate_worker_snapshots(app, tmp_path):
+    """Test that snapshots of other processes are summed, ignoring the gauges of exited ones."""
+    registry = MetricsRegistry()
+    registry.directory = str(tmp_path)
+    registry.inc('nutrinube_http_requests_total', endpoint='/', method='GET', status='200')
+    registry.observe('nutrinube_http_request_duration_seconds', 0.02, endpoint='/', method='GET')
+
+    other = registry.snapshot()
+    other['pid'] = os.getppid()
+    (tmp_path / 'metrics_1.json').write_text(json.dumps(other))
+
+    exited = {**registry.snapshot(), 'pid': 2 ** 22 + 1, 'gauges': [['nutrinube_http_requests_in_flight', {}, 5]]}
+    (tmp_path / 'metrics_2.json').write_text(json.dumps(exited))
+
+    body = registry.render()
+    assert 'nutrinube_http_requests_total{endpoint="/",method="GET",status="200"} 3' in body
+    assert 'nutrinube_http_request_duration_seconds_bucket{endpoint="/",method="GET",le="0.025"} 3' in body
+    assert 'nutrinube_http_request_duration_seconds_bucket{endpoint="/",method="GET",le="0.01"} 0' in body
+    assert 'nutrinube_http_requests_in_flight' not in body
+
+def test_metrics_flush_writes_snapshot(tmp_path):
+    """Test that a flush writes this process' snapshot atomically."""
+    registry = MetricsRegistry()
+    registry.directory = str(tmp_path)
+    registry.inc('nutrinube_http_requests_total', endpoint='/', method='GET', status='200')
+    registry.flush()
+
+    data = json.loads((tmp_path / f'metrics_{os.getpid()}.json').read_text())
+    assert data['counters'] == [['nutrinube_http_requests_total', {'endpoint': '/', 'method': 'GET', 'status': '200'}, 1]]
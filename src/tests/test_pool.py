@@ -0,0 +1,69 @@
+# tests/test_pool.py
+import pytest
+from sqlalchemy import create_engine, exc, text
+from app import db
+from app.pool import engine_options, instrument_engine, pool_stats, TimedQueuePool
+
+def test_engine_options_from_environment(monkeypatch):
+    """Test that pool sizing comes from the environment for server databases."""
+    monkeypatch.setenv('DB_POOL_SIZE', '7')
+    monkeypatch.setenv('DB_MAX_OVERFLOW', '3')
+    monkeypatch.setenv('DB_POOL_PRE_PING', 'false')
+    options = engine_options('postgresql://user:secret@db:5432/flaskdb')
+    assert options['poolclass'] is TimedQueuePool
+    assert options['pool_size'] == 7
+    assert options['max_overflow'] == 3
+    assert options['pool_pre_ping'] is False
+
+def test_engine_options_in_memory_sqlite():
+    """Test that in-memory SQLite keeps its single shared connection."""
+    options = engine_options('sqlite:///:memory:')
+    assert 'poolclass' not in options
+    assert 'pool_size' not in options
+
+def test_pool_metrics_track_checkouts(tmp_path):
+    """Test that checkouts, in-use connections and waits are counted through pool events."""
+    engine = create_engine(f'sqlite:///{tmp_path}/pool.db', poolclass=TimedQueuePool, pool_size=2, max_overflow=0)
+    metrics = instrument_engine('default', engine)
+
+    first = engine.connect()
+    second = engine.connect()
+    assert metrics.in_use == 2
+    first.close()
+    second.close()
+
+    stats = metrics.snapshot(engine.pool)
+    assert stats['checkouts'] == 2
+    assert stats['in_use'] == 0
+    assert stats['max_in_use'] == 2
+    assert stats['pool_size'] == 2
+    assert stats['wait_total_ms'] > 0
+
+def test_pool_metrics_count_timeouts(tmp_path):
+    """Test that an exhausted pool records a checkout timeout."""
+    engine = create_engine(
+        f'sqlite:///{tmp_path}/pool.db', poolclass=TimedQueuePool, pool_size=1, max_overflow=0, pool_timeout=0.01
+    )
+    metrics = instrument_engine('default', engine)
+
+    with engine.connect():
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+    assert metrics.timeouts == 1
+
+def test_pool_metrics_survive_dispose(tmp_path):
+    """Test that a disposed pool keeps reporting to the same metrics."""
+    engine = create_engine(f'sqlite:///{tmp_path}/pool.db', poolclass=TimedQueuePool)
+    metrics = instrument_engine('default', engine)
+    engine.dispose()
+    with engine.connect() as connection:
+        connection.execute(text('SELECT 1'))
+    assert engine.pool.metrics is metrics
+    assert metrics.checkouts == 1
+
+def test_app_pool_stats(app, client):
+    """Test that every engine of the app is instrumented."""
+    client.get('/login')
+    stats = pool_stats(app, db)
+    assert set(stats) == {'default', 'sessions'}
+    assert stats['default']['connects'] >= 1
@@ -0,0 +1,51 @@
+# tests/test_profiling.py
+import pytest
+import time
+from app.profiling import RateLimiter
+
+@pytest.fixture
+def profiling(app, tmp_path):
+    """Enable profiling with a token and a temporary artifact directory."""
+    app.config['PROFILE_TOKEN'] = 'secret'
+    app.config['PROFILE_DIR'] = str(tmp_path)
+    return {'X-Profile-Token': 'secret'}
+
+def test_profile_request(client, login, profiling):
+    """Test that a profiled request stores downloadable CPU and memory artifacts."""
+    response = client.get('/daily-summary?date=2023-10-15', headers={**profiling, 'X-Profile': 'cpu,memory'})
+    assert response.status_code == 200
+    profile_id = response.headers['X-Profile-Id']
+
+    profiles = client.get('/api/profiles', headers=profiling).get_json()['profiles']
+    assert {(profile['id'], profile['kind']) for profile in profiles} == {(profile_id, 'cpu'), (profile_id, 'memory')}
+
+    download = client.get(f'/api/profiles/{profile_id}.prof', headers=profiling)
+    assert download.status_code == 200
+    assert 'attachment' in download.headers['Content-Disposition']
+    assert 'cumulative' in client.get(f'/api/profiles/{profile_id}.prof?format=text', headers=profiling).get_data(as_text=True)
+    assert 'peak_bytes=' in client.get(f'/api/profiles/{profile_id}.txt', headers=profiling).get_data(as_text=True)
+
+def test_profile_requires_token(client, login, profiling):
+    """Test that profiling is ignored and profiles are hidden without the token."""
+    response = client.get('/daily-summary?date=2023-10-15&_profile=cpu', headers={'X-Profile-Token': 'wrong'})
+    assert 'X-Profile-Id' not in response.headers
+    assert client.get('/api/profiles').status_code == 401
+    assert client.get('/api/profiles/missing.prof', headers=profiling).status_code == 404
+    assert client.get('/api/profiles/..%2Fdefault.db', headers=profiling).status_code == 404
+
+def test_profile_rate_limit(app, client, login, profiling):
+    """Test that profiling requests beyond the rate limit are served without a profile."""
+    headers = {**profiling, 'X-Profile': 'cpu'}
+    for _ in range(app.config['PROFILE_RATE_LIMIT']):
+        assert 'X-Profile-Id' in client.get('/daily-summary?date=2023-10-15', headers=headers).headers
+    response = client.get('/daily-summary?date=2023-10-15', headers=headers)
+    assert response.status_code == 200
+    assert response.headers['X-Profile'] == 'rate-limited'
+
+def test_rate_limiter_window():
+    """Test that the limiter admits new events once old ones leave the window."""
+    limiter = RateLimiter(2, 0.05)
+    assert limiter.allow() and limiter.allow()
+    assert not limiter.allow()
+    time.sleep(0.06)
+    assert limiter.allow()
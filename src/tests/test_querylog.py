@@ -0,0 +1,80 @@
+# tests/test_querylog.py
+import logging
+from sqlalchemy import event
+from app import create_app, db
+from app.models.models import User
+from app.querylog import statement_shape, QueryStats
+
+def test_statement_shape():
+    """Test that statements differing only in parameters share a shape."""
+    first = statement_shape("SELECT id FROM user WHERE id IN (?, ?, ?) AND name = 'a'")
+    second = statement_shape("SELECT id\n  FROM user WHERE id IN (?) AND name = 'b'")
+    assert first == second == 'SELECT id FROM user WHERE id IN (?) AND name = ?'
+    assert statement_shape('SELECT * FROM food_log WHERE user_id = %(user_id_1)s LIMIT 5') == 'SELECT * FROM food_log WHERE user_id = ? LIMIT ?'
+
+def test_repeated_shapes():
+    """Test that only shapes above the threshold are reported."""
+    stats = QueryStats()
+    for number in range(4):
+        stats.record(f'SELECT * FROM user WHERE id = {number}', 0.001)
+    stats.record('SELECT * FROM food_log', 0.001)
+    assert stats.count == 5
+    assert stats.repeated(3) == [('SELECT * FROM user WHERE id = ?', 4)]
+
+def test_debug_headers(app, client, login):
+    """Test that statement counts and database time are sent back when enabled."""
+    assert 'X-DB-Queries' not in client.get('/daily-summary?date=2023-10-15').headers
+
+    app.config['SQL_DEBUG_HEADERS'] = True
+    response = client.get('/daily-summary?date=2023-10-14')
+    assert int(response.headers['X-DB-Queries']) >= 1
+    assert response.headers['Server-Timing'].startswith('db;dur=')
+
+def test_repeated_query_warning(app, client, caplog):
+    """Test that a statement run in a loop is reported as a possible N+1 query."""
+    def loop():
+        for user_id in range(app.config['SQL_REPEAT_THRESHOLD'] + 1):
+            db.session.get(User, user_id + 1)
+            db.session.expunge_all()
+        return 'done'
+    app.add_url_rule('/test-loop', 'test_loop', loop)
+
+    with caplog.at_level(logging.WARNING, logger=app.logger.name):
+        client.get('/test-loop')
+    warnings = [record.msg for record in caplog.records if isinstance(record.msg, dict) and record.msg.get('event') == 'repeated_query']
+    assert len(warnings) == 1
+    assert warnings[0]['count'] == app.config['SQL_REPEAT_THRESHOLD'] + 1
+    assert warnings[0]['endpoint'] == '/test-loop'
+
+def test_debug_headers_count_session_statements(monkeypatch):
+    """Test that the statements loading and saving a database session are part of the reported count."""
+    monkeypatch.setenv('SECRET_KEY', 'test-secret')
+    monkeypatch.setenv('SESSION_BACKEND', 'database')
+    app = create_app()
+    app.config.update(TESTING=True, SQL_DEBUG_HEADERS=True)
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        db.create_all()
+        for engine in db.engines.values():
+            event.listen(engine, 'after_cursor_execute', count)
+        try:
+            client = app.test_client()
+            client.post('/register', data={'username': 'queryuser', 'password': 'secret'})
+
+            statements.clear()
+            response = client.post('/login', data={'username': 'queryuser', 'password': 'secret'})
+            assert any('server_session' in statement for statement in statements)
+            assert int(response.headers['X-DB-Queries']) == len(statements)
+
+            statements.clear()
+            response = client.get('/api/food')
+            assert any(statement.startswith('SELECT') and 'server_session' in statement for statement in statements)
+            assert int(response.headers['X-DB-Queries']) == len(statements)
+        finally:
+            for engine in db.engines.values():
+                event.remove(engine, 'after_cursor_execute', count)
+            db.drop_all()
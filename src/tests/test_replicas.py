@@ -0,0 +1,81 @@
+# tests/test_replicas.py
+import pytest
+from werkzeug.security import generate_password_hash
+from app import create_app, db
+from app.cache import summary_cache
+from app.models.models import User
+from app.replicas import replica_bind_keys
+
+@pytest.fixture
+def replica_app(monkeypatch, tmp_path):
+    """Application with a primary and a replica SQLite file."""
+    monkeypatch.setenv('DATABASE_URL', f'sqlite:///{tmp_path}/primary.db')
+    monkeypatch.setenv('DATABASE_REPLICA_URLS', f'sqlite:///{tmp_path}/replica.db')
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.app_context():
+        # Stand in for replication by creating the schema on the replica as well
+        db.metadatas[None].create_all(db.engines['replica_0'])
+        yield app
+        db.drop_all()
+    # Other tests create apps without the replica bind
+    db.metadatas.pop('replica_0', None)
+
+@pytest.fixture
+def replica_client(replica_app):
+    client = replica_app.test_client()
+    client.post('/register', data={'username': 'testuser', 'password': 'testpassword'})
+    client.post('/login', data={'username': 'testuser', 'password': 'testpassword'})
+    return client
+
+def add_replica_user(**goals):
+    with db.engines['replica_0'].begin() as conn:
+        conn.execute(db.insert(User).values(
+            id=1, username='testuser', password_hash=generate_password_hash('testpassword'), **goals
+        ))
+
+def test_replica_bind_keys():
+    """Test naming of the replica binds."""
+    assert replica_bind_keys('sqlite:///a.db, sqlite:///b.db') == {
+        'replica_0': 'sqlite:///a.db',
+        'replica_1': 'sqlite:///b.db'
+    }
+    assert replica_bind_keys('') == {}
+
+def test_summary_reads_from_replica(replica_app, replica_client):
+    """Test that the daily summary is served from the replica outside the sticky window."""
+    replica_app.config['REPLICA_STICKY_SECONDS'] = 0
+    add_replica_user(calorie_goal=1234)
+    summary_cache.clear()
+
+    response = replica_client.get('/daily-summary?date=2024-01-01')
+    assert response.status_code == 200
+    assert response.get_json()['calories_goal'] == 1234
+
+def test_reads_stick_to_primary_after_write(replica_app, replica_client):
+    """Test that a user who just wrote reads their own write from the primary."""
+    summary_cache.clear()
+    response = replica_client.post('/api/food', json={
+        'food': 'Apple', 'calories': 95, 'protein': 0, 'fat': 0, 'carbs': 25, 'date': '2024-01-01'
+    })
+    assert response.status_code == 201
+
+    # The replica has not caught up: it does not even know the user yet
+    response = replica_client.get('/daily-summary?date=2024-01-01')
+    assert response.status_code == 200
+    assert response.get_json()['total_calories_consumed'] == 95
+
+    replica_app.config['REPLICA_STICKY_SECONDS'] = 0
+    summary_cache.clear()
+    response = replica_client.get('/daily-summary?date=2024-01-01')
+    assert response.status_code == 404
+
+def test_writes_go_to_primary(replica_app, replica_client):
+    """Test that write routes never touch the replica."""
+    replica_app.config['REPLICA_STICKY_SECONDS'] = 0
+    replica_client.post('/api/update-goal', json={
+        'calorie_goal': 2000, 'protein_goal': 100, 'fat_goal': 70, 'carbs_goal': 250
+    })
+    assert db.session.get(User, 1).calorie_goal == 2000
+    with db.engines['replica_0'].connect() as conn:
+        assert conn.execute(db.select(User.id)).first() is None
@@ -0,0 +1,38 @@
+# tests/test_seed.py
+from datetime import date
+import pytest
+from sqlalchemy import select, func
+from app import db
+from app.models.models import User, FoodLog, FitnessLog, DailyTotals
+from app.seed import seed_database, user_rows
+import random
+
+def test_seed_database(app, client):
+    """Test that seeding creates users with 3-10 meals and 0-3 workouts a day and a matching rollup."""
+    counts = seed_database(3, 5, seed=1, end=date(2024, 1, 5), prefix='seeded', passwords=('one', 'two'))
+
+    assert counts['users'] == 3
+    assert db.session.execute(select(func.count()).select_from(FoodLog)).scalar() == counts['food']
+    assert db.session.execute(select(func.count()).select_from(FitnessLog)).scalar() == counts['fitness']
+    per_day = db.session.execute(select(func.count()).select_from(FoodLog).group_by(FoodLog.user_id, FoodLog.date)).scalars().all()
+    assert len(per_day) == 15 and all(3 <= count <= 10 for count in per_day)
+    assert db.session.execute(select(func.count()).select_from(DailyTotals)).scalar() == 15
+
+    # Passwords are assigned round-robin and hashed once each
+    hashes = db.session.execute(select(User.password_hash).order_by(User.id)).scalars().all()
+    assert hashes[0] == hashes[2] != hashes[1]
+    assert client.post('/login', data={'username': 'seeded_1', 'password': 'two'}).status_code == 200
+
+def test_seed_is_deterministic():
+    """Test that the same seed and user produce the same rows."""
+    first = user_rows(random.Random('7:0'), 1, date(2024, 1, 1), 30, (3, 10), (0, 3))
+    second = user_rows(random.Random('7:0'), 1, date(2024, 1, 1), 30, (3, 10), (0, 3))
+    other = user_rows(random.Random('8:0'), 1, date(2024, 1, 1), 30, (3, 10), (0, 3))
+    assert first == second
+    assert first != other
+
+def test_seed_refuses_existing_prefix(app):
+    """Test that seeding twice with the same prefix is rejected."""
+    seed_database(1, 1, prefix='seeded', rollup=False)
+    with pytest.raises(ValueError):
+        seed_database(1, 1, prefix='seeded', rollup=False)
@@ -0,0 +1,103 @@
+# tests/test_server.py
+from types import SimpleNamespace
+from app import db
+from app.server import server_options, post_fork, serve, NutriNubeServer
+
+SERVER_VARIABLES = ('HOST', 'PORT', 'WEB_WORKERS', 'WEB_THREADS', 'WEB_TIMEOUT', 'WEB_GRACEFUL_TIMEOUT',
+                    'WEB_KEEPALIVE', 'WEB_MAX_REQUESTS', 'WEB_MAX_REQUESTS_JITTER')
+
+def test_server_options_defaults(monkeypatch):
+    """Test the gunicorn settings used when nothing is configured."""
+    for name in SERVER_VARIABLES:
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setattr('multiprocessing.cpu_count', lambda: 4)
+
+    options = server_options()
+    assert options['bind'] == '0.0.0.0:8000'
+    assert (options['workers'], options['threads'], options['worker_class']) == (9, 2, 'gthread')
+    assert (options['timeout'], options['graceful_timeout'], options['keepalive']) == (30, 30, 5)
+    assert (options['max_requests'], options['max_requests_jitter']) == (0, 0)
+    assert options['preload_app'] is True
+    assert options['post_fork'] is post_fork
+
+def test_server_options_from_environment(monkeypatch):
+    """Test that the environment overrides the defaults and a single thread selects sync workers."""
+    monkeypatch.setenv('HOST', '127.0.0.1')
+    monkeypatch.setenv('PORT', '5000')
+    monkeypatch.setenv('WEB_WORKERS', '3')
+    monkeypatch.setenv('WEB_THREADS', '1')
+    monkeypatch.setenv('WEB_TIMEOUT', '60')
+    monkeypatch.setenv('WEB_MAX_REQUESTS', '1000')
+
+    options = server_options()
+    assert options['bind'] == '127.0.0.1:5000'
+    assert (options['workers'], options['threads'], options['worker_class']) == (3, 1, 'sync')
+    assert options['timeout'] == 60
+    assert options['max_requests'] == 1000
+
+def test_server_options_explicit_overrides(monkeypatch):
+    """Test that explicit options win over the environment and None leaves the setting alone."""
+    monkeypatch.setenv('WEB_WORKERS', '3')
+    monkeypatch.setenv('WEB_THREADS', '1')
+
+    options = server_options(bind='localhost:9000', workers=None, threads=4)
+    assert options['bind'] == 'localhost:9000'
+    assert options['workers'] == 3
+    assert (options['threads'], options['worker_class']) == (4, 'gthread')
+    assert server_options(threads=4, worker_class='sync')['worker_class'] == 'sync'
+
+def test_post_fork_replaces_inherited_connections(app, monkeypatch):
+    """Test that a new worker drops the master's connections without closing them and warms up its own."""
+    disposed = {}
+    for name, engine in db.engines.items():
+        monkeypatch.setattr(engine, 'dispose', lambda close=True, name=name: disposed.update({name: close}))
+    warmed = []
+    monkeypatch.setattr('app.pool.warm_up', lambda application, database: warmed.append(application))
+
+    post_fork(SimpleNamespace(app=SimpleNamespace(application=app)), None)
+    assert disposed == {name: False for name in db.engines}
+    assert warmed == [app]
+
+def test_log_pipeline_restarts_after_fork(app):
+    """Test that the fork hook gives the child a fresh queue and listener thread that still emit."""
+    pipeline = app.extensions['log_pipeline']
+    queue, thread = pipeline.queue, pipeline._thread
+
+    pipeline._after_fork()
+    try:
+        assert pipeline.queue is not queue
+        assert pipeline._thread is not thread and pipeline._thread.is_alive()
+        app.logger.info({'event': 'after_fork'})
+    finally:
+        pipeline.stop()
+        # The replaced listener is still draining the old queue
+        queue.put(None)
+        pipeline._thread = thread
+    assert pipeline.stats()['emitted'] == 1
+
+def test_serve_configures_gunicorn(app, monkeypatch, tmp_path):
+    """Test that serve hands the options to gunicorn, clears stale metrics and closes the master's connections."""
+    app.config['METRICS_DIR'] = str(tmp_path)
+    (tmp_path / 'metrics_1.json').write_text('{}')
+    disposed = []
+    for name, engine in db.engines.items():
+        monkeypatch.setattr(engine, 'dispose', lambda close=True, name=name: disposed.append(name))
+    configs = []
+    monkeypatch.setattr(NutriNubeServer, 'run', lambda self: configs.append(self.cfg))
+
+    serve(app, bind='127.0.0.1:9000', workers=2, threads=1)
+    assert set(disposed) == set(db.engines)
+    assert list(tmp_path.iterdir()) == []
+    cfg = configs[0]
+    assert (cfg.bind, cfg.workers, cfg.threads, cfg.preload_app) == (['127.0.0.1:9000'], 2, 1, True)
+    assert cfg.post_fork is post_fork
+
+def test_serve_command_passes_options(app, monkeypatch):
+    """Test that 'flask serve' builds the bind address from its options and the environment."""
+    monkeypatch.delenv('HOST', raising=False)
+    calls = []
+    monkeypatch.setattr('app.server.serve', lambda application, **options: calls.append(options))
+
+    result = app.test_cli_runner().invoke(args=['serve', '--port', '9000', '--workers', '2'])
+    assert result.exit_code == 0, result.output
+    assert calls == [{'bind': '0.0.0.0:9000', 'workers': 2, 'threads': None}]
@@ -0,0 +1,92 @@
+# tests/test_sessions.py
+from datetime import datetime, timedelta, timezone
+import pytest
+from flask import session
+from app import create_app, db
+from app.models.models import ServerSession, User
+from app.sessions import DatabaseSessionInterface, cleanup_expired_sessions
+
+@pytest.fixture
+def session_app(monkeypatch):
+    """Application storing sessions in the database with a fixed secret key."""
+    monkeypatch.setenv('SECRET_KEY', 'test-secret')
+    monkeypatch.setenv('SESSION_BACKEND', 'database')
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.drop_all()
+
+def register_and_login(client):
+    client.post('/register', data={'username': 'sessionuser', 'password': 'secret'})
+    return client.post('/login', data={'username': 'sessionuser', 'password': 'secret'})
+
+def test_secret_key_from_environment(session_app):
+    """Test that the secret key is read from SECRET_KEY."""
+    assert session_app.secret_key == 'test-secret'
+    assert isinstance(session_app.session_interface, DatabaseSessionInterface)
+
+def test_database_session_login(session_app):
+    """Test that a login stores the session server-side and authenticates later requests."""
+    client = session_app.test_client()
+    assert register_and_login(client).status_code == 200
+    assert db.session.query(ServerSession).count() == 1
+
+    response = client.get('/daily-summary?date=2024-01-01')
+    assert response.status_code == 200
+
+def test_database_session_shared_between_apps(session_app):
+    """Test that a session cookie issued by one app instance is accepted by another."""
+    client = session_app.test_client()
+    register_and_login(client)
+    cookie = client.get_cookie('session')
+
+    other = create_app()
+    other_client = other.test_client()
+    other_client.set_cookie('session', cookie.value)
+    with other.app_context():
+        response = other_client.get('/daily-summary?date=2024-01-01')
+    assert response.status_code == 200
+
+def test_tampered_session_cookie_rejected(session_app):
+    """Test that a session id with an invalid signature starts a fresh session."""
+    client = session_app.test_client()
+    register_and_login(client)
+    sid = db.session.query(ServerSession).one().id
+    client.set_cookie('session', f'{sid}.forged')
+
+    response = client.get('/daily-summary?date=2024-01-01')
+    assert response.status_code == 302
+
+def test_session_save_leaves_request_transaction_alone(session_app):
+    """Test that saving the session does not commit changes the view left uncommitted."""
+    def pending_write():
+        db.session.add(User(username='uncommitted', password_hash='x'))
+        session['visited'] = True
+        return 'done'
+    session_app.add_url_rule('/test-pending', 'test_pending', pending_write)
+    client = session_app.test_client()
+
+    assert client.get('/test-pending').status_code == 200
+    assert client.get_cookie('session') is not None
+    db.session.rollback()
+    assert db.session.query(User).filter_by(username='uncommitted').count() == 0
+    assert db.session.query(ServerSession).count() == 1
+
+def test_logout_deletes_session(session_app):
+    """Test that logging out removes the stored session."""
+    client = session_app.test_client()
+    register_and_login(client)
+    client.post('/logout')
+    assert db.session.query(ServerSession).count() == 0
+
+def test_cleanup_expired_sessions(session_app):
+    """Test that only expired sessions are removed by the cleanup."""
+    now = datetime.now(timezone.utc)
+    db.session.add(ServerSession(id='old', data='{}', expires_at=now - timedelta(minutes=1)))
+    db.session.add(ServerSession(id='new', data='{}', expires_at=now + timedelta(days=1)))
+    db.session.commit()
+
+    assert cleanup_expired_sessions() == 1
+    assert [row.id for row in db.session.query(ServerSession)] == ['new']
@@ -0,0 +1,127 @@
+# tests/test_shards.py
+import pytest
+from sqlalchemy import select, func
+from sqlalchemy.exc import UnboundExecutionError
+from app import create_app, db
+from app.models.models import FoodLog, DailyTotals, UserShard
+from app.rollup import rebuild_daily_totals
+from app.shards import shard_bind_keys, shard_for, using_shard, move_user, pin_user_shards
+
+FOOD = {'food': 'Apple', 'calories': 95, 'protein': 0, 'fat': 0, 'carbs': 25, 'date': '2024-01-01'}
+
+@pytest.fixture
+def sharded_app(monkeypatch, tmp_path):
+    """Application with a directory database and two log shards."""
+    monkeypatch.setenv('DATABASE_URL', f'sqlite:///{tmp_path}/directory.db')
+    monkeypatch.setenv('SHARD_DATABASE_URLS', f'sqlite:///{tmp_path}/shard0.db,sqlite:///{tmp_path}/shard1.db')
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.app_context():
+        yield app
+        db.drop_all()
+    # Other tests create apps without the shard binds
+    for key in ('shard_0', 'shard_1'):
+        db.metadatas.pop(key, None)
+
+@pytest.fixture
+def sharded_client(sharded_app):
+    client = sharded_app.test_client()
+    client.post('/register', data={'username': 'testuser', 'password': 'testpassword'})
+    client.post('/login', data={'username': 'testuser', 'password': 'testpassword'})
+    return client
+
+def count_rows(shard, table):
+    with db.engines[shard].connect() as conn:
+        return conn.execute(select(func.count()).select_from(table)).scalar()
+
+def test_shard_bind_keys():
+    """Test naming of the shard binds."""
+    assert shard_bind_keys('sqlite:///a.db,sqlite:///b.db') == {'shard_0': 'sqlite:///a.db', 'shard_1': 'sqlite:///b.db'}
+
+def test_logs_written_to_user_shard(sharded_client):
+    """Test that a user's logs and rollup land on their shard and are read back from it."""
+    assert shard_for(1) == 'shard_1'
+    assert sharded_client.post('/api/food', json=FOOD).status_code == 201
+
+    assert count_rows('shard_1', FoodLog.__table__) == 1
+    assert count_rows('shard_1', DailyTotals.__table__) == 1
+    assert count_rows('shard_0', FoodLog.__table__) == 0
+
+    response = sharded_client.get('/daily-summary?date=2024-01-01')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['total_calories_consumed'] == 95
+    assert data['calories_goal'] == 2000
+
+def test_move_user_between_shards(sharded_client):
+    """Test that moving a user copies their rows, repoints the directory and clears the source."""
+    sharded_client.post('/api/food', json=FOOD)
+
+    assert move_user(1, 'shard_0') == {'daily_totals': 1, 'food_log': 1, 'fitness_log': 0}
+    assert shard_for(1) == 'shard_0'
+    assert count_rows('shard_0', FoodLog.__table__) == 1
+    assert count_rows('shard_1', FoodLog.__table__) == 0
+    assert move_user(1, 'shard_0') == {}
+
+    response = sharded_client.get('/range-summary?start=2024-01-01&end=2024-01-01')
+    assert response.get_json()['days'][0]['total_calories_consumed'] == 95
+
+def test_interrupted_move_user_resumes(sharded_client, monkeypatch):
+    """Test that rerunning a move that died before deleting the source rows finishes it without duplicates."""
+    sharded_client.post('/api/food', json=FOOD)
+
+    def crash(entry):
+        raise RuntimeError('killed')
+    monkeypatch.setattr('app.shards.finish_move', crash)
+    with pytest.raises(RuntimeError):
+        move_user(1, 'shard_0')
+    assert db.session.get(UserShard, 1).moving_from == 'shard_1'
+    assert count_rows('shard_1', FoodLog.__table__) == count_rows('shard_0', FoodLog.__table__) == 1
+
+    monkeypatch.undo()
+    assert move_user(1, 'shard_0') == {}
+    assert db.session.get(UserShard, 1).moving_from is None
+    assert count_rows('shard_1', FoodLog.__table__) == 0
+    rebuild_daily_totals()
+    with using_shard('shard_0'):
+        assert db.session.get(DailyTotals, (1, FoodLog.date.type.python_type(2024, 1, 1))).calories == 95
+
+def test_open_session_follows_move(sharded_client):
+    """Test that a session opened before a move reads from and writes to the new shard without signing in again."""
+    sharded_client.post('/api/food', json=FOOD)
+    assert sharded_client.get('/daily-summary?date=2024-01-01').get_json()['total_calories_consumed'] == 95
+
+    move_user(1, 'shard_0')
+    data = sharded_client.get('/daily-summary?date=2024-01-01').get_json()
+    assert data['total_calories_consumed'] == 95
+    assert [item['food'] for item in data['food_log']] == ['Apple']
+
+    assert sharded_client.post('/api/food', json=FOOD).status_code == 201
+    assert count_rows('shard_0', FoodLog.__table__) == 2
+    assert count_rows('shard_1', FoodLog.__table__) == 0
+
+def test_move_user_unknown_shard(sharded_client):
+    """Test that moving to an unknown shard is rejected."""
+    with pytest.raises(ValueError):
+        move_user(1, 'shard_9')
+
+def test_rebuild_daily_totals_on_every_shard(sharded_client):
+    """Test that the rollup rebuild visits every shard."""
+    sharded_client.post('/api/food', json=FOOD)
+    with db.engines['shard_1'].begin() as conn:
+        conn.execute(DailyTotals.__table__.delete())
+
+    assert rebuild_daily_totals() == 1
+    with using_shard('shard_1'):
+        assert db.session.get(DailyTotals, (1, FoodLog.date.type.python_type(2024, 1, 1))).calories == 95
+
+def test_pin_user_shards(sharded_client):
+    """Test that pinning records the current shard of unpinned users once."""
+    assert pin_user_shards() == 1
+    assert db.session.get(UserShard, 1).shard == 'shard_1'
+    assert pin_user_shards() == 0
+
+def test_sharded_table_requires_shard(sharded_app):
+    """Test that sharded tables cannot silently fall back to the directory database."""
+    with pytest.raises(UnboundExecutionError):
+        db.session.execute(select(FoodLog.id))
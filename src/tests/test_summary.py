@@ -0,0 +1,75 @@
+# tests/test_summary.py
+def test_daily_summary_totals(client, login):
+    client.post('/api/food', json={
+        'date': '2023-10-01', 'food': 'Oats', 'calories': 300, 'protein': 10, 'fat': 5, 'carbs': 50
+    })
+    client.post('/api/fitness', json={
+        'date': '2023-10-01', 'exercise': 'Running', 'kcal_burned': 200
+    })
+    response = client.get('/daily-summary?date=2023-10-01')
+    assert response.status_code == 200
+    summary = response.get_json()
+    assert summary['total_calories_consumed'] == 300
+    assert summary['total_calories_burned'] == 200
+    assert summary['net_calories'] == 100
+    assert len(summary['food_log']) == 1
+
+def test_daily_summary_invalid_date(client, login):
+    response = client.get('/daily-summary?date=01.10.2023')
+    assert response.status_code == 400
+
+def test_daily_summary_after_delete(client, login):
+    response = client.post('/api/food', json={
+        'date': '2023-10-02', 'food': 'Toast', 'calories': 120, 'protein': 4, 'fat': 2, 'carbs': 20
+    })
+    food_id = response.get_json()['id']
+    client.post('/api/food', json={
+        'date': '2023-10-02', 'food': 'Egg', 'calories': 80, 'protein': 6, 'fat': 5, 'carbs': 1
+    })
+    client.delete('/api/food', json={'food_id': food_id})
+
+    summary = client.get('/daily-summary?date=2023-10-02').get_json()
+    assert summary['total_calories_consumed'] == 80
+    assert summary['total_protein'] == 6
+    assert [item['food'] for item in summary['food_log']] == ['Egg']
+
+def test_range_summary(client, login):
+    client.post('/api/food', json={
+        'date': '2023-10-01', 'food': 'Pasta', 'calories': 2100, 'protein': 60, 'fat': 40, 'carbs': 300
+    })
+    client.post('/api/fitness', json={
+        'date': '2023-10-03', 'exercise': 'Cycling', 'kcal_burned': 500
+    })
+    response = client.get('/range-summary?start=2023-10-01&end=2023-10-03')
+    assert response.status_code == 200
+    days = response.get_json()['days']
+    assert [day['date'] for day in days] == ['2023-10-01', '2023-10-02', '2023-10-03']
+    assert days[0]['total_calories_consumed'] == 2100
+    assert days[0]['calories_delta'] == 100
+    assert days[1]['net_calories'] == 0
+    assert days[2]['net_calories'] == -500
+
+def test_range_summary_invalid_range(client, login):
+    assert client.get('/range-summary?start=2023-10-05&end=2023-10-01').status_code == 400
+    assert client.get('/range-summary?start=2023-10-01').status_code == 400
+    assert client.get('/range-summary?start=2020-01-01&end=2023-01-01').status_code == 400
+
+def test_daily_summary_etag_not_modified(client, login):
+    response = client.get('/daily-summary?date=2023-10-04')
+    etag = response.headers['ETag']
+    response = client.get('/daily-summary?date=2023-10-04', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+
+def test_daily_summary_cache_invalidated_on_write(client, login):
+    etag = client.get('/daily-summary?date=2023-10-04').headers['ETag']
+    client.post('/api/fitness', json={'date': '2023-10-04', 'exercise': 'Yoga', 'kcal_burned': 90})
+    response = client.get('/daily-summary?date=2023-10-04', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_json()['total_calories_burned'] == 90
+
+def test_daily_summary_cache_invalidated_on_goal_update(client, login):
+    client.get('/daily-summary?date=2023-10-04')
+    client.post('/api/update-goal', json={
+        'calorie_goal': 1800, 'protein_goal': 120, 'fat_goal': 60, 'carbs_goal': 200
+    })
+    assert client.get('/daily-summary?date=2023-10-04').get_json()['calories_goal'] == 1800
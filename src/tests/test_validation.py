@@ -0,0 +1,43 @@
+# tests/test_validation.py
+import pytest
+from marshmallow import ValidationError
+from app.models.models import food_log_schema, fitness_log_schema
+from app.validation import load_log_entry
+
+FOOD_PAYLOADS = [
+    {'date': '2023-10-15', 'food': 'Banana', 'calories': 105, 'protein': 1.3, 'fat': 0.3, 'carbs': 27},
+    {'date': '2023-1-5', 'food': '', 'calories': '105', 'protein': 1, 'fat': 0, 'carbs': 27},
+    {'food': 'Banana', 'calories': 105},
+    {'date': '15.10.2023', 'food': 3, 'calories': 'many', 'protein': -1, 'fat': None, 'carbs': True},
+    {'date': '2023-10-15', 'food': 'Banana', 'calories': 1, 'protein': 1, 'fat': 1, 'carbs': 1, 'colour': 'yellow'},
+    ['not', 'a', 'dict']
+]
+
+FITNESS_PAYLOADS = [
+    {'date': '2023-10-15', 'exercise': 'Running', 'kcal_burned': 300},
+    {'date': '2023-10-15', 'exercise': '', 'kcal_burned': -3},
+    {'exercise': 'Running'}
+]
+
+def _load(app, schema, payload, fast):
+    app.config['FAST_LOG_VALIDATION'] = fast
+    try:
+        return load_log_entry(schema, payload, 1)
+    except ValidationError as err:
+        return err.messages
+
+@pytest.mark.parametrize('payload', FOOD_PAYLOADS)
+def test_fast_food_validation_matches_schema(app, payload):
+    """Test that the fast path accepts, coerces and rejects food payloads like the schema."""
+    assert _load(app, food_log_schema, payload, True) == _load(app, food_log_schema, payload, False)
+
+@pytest.mark.parametrize('payload', FITNESS_PAYLOADS)
+def test_fast_fitness_validation_matches_schema(app, payload):
+    """Test that the fast path accepts, coerces and rejects fitness payloads like the schema."""
+    assert _load(app, fitness_log_schema, payload, True) == _load(app, fitness_log_schema, payload, False)
+
+def test_payload_cannot_choose_owner(app):
+    """Test that a user_id in the payload is replaced by the session user."""
+    payload = {'date': '2023-10-15', 'exercise': 'Running', 'kcal_burned': 300, 'user_id': 42}
+    assert _load(app, fitness_log_schema, payload, True)['user_id'] == 1
+    assert _load(app, fitness_log_schema, payload, False)['user_id'] == 1